@@ -5,21 +5,40 @@
 # Author: Bongani Jele <jelebongani43@gmail.com>
 
 from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
-                               QHBoxLayout, QLineEdit, QListWidget, QListWidgetItem,
+                               QHBoxLayout, QLineEdit, QListWidget, QListWidgetItem, QListView,
                                QPushButton, QLabel, QMessageBox, QComboBox, QProgressBar,
                                QTextEdit, QDialog, QMenuBar, QMenu, QSpacerItem, QSizePolicy,QToolTip, QScrollArea, QStackedWidget,
-                               QFormLayout, QCheckBox, QInputDialog, QDialogButtonBox, QFileDialog, QStyle, QGroupBox, QGridLayout, QTabWidget, QFrame)
+                               QFormLayout, QCheckBox, QInputDialog, QDialogButtonBox, QFileDialog, QStyle, QGroupBox, QGridLayout, QTabWidget, QFrame,
+                               QTableWidget, QTableWidgetItem, QHeaderView)
 from PySide6.QtGui import QIcon, QAction,  QCursor, QShowEvent, QColor, QPainter, QFont
+from PySide6.QtGui import QTextDocument, QAbstractTextDocumentLayout, QDesktopServices
 from PySide6.QtCore import QSize, QThread, Signal, QEvent, QTimer, QPoint, Slot, QSettings,QProcess, QMetaObject, Qt, Q_ARG, QRect
+from PySide6.QtCore import QAbstractListModel, QSortFilterProxyModel, QModelIndex, QUrl
+from collections import OrderedDict
 from threading import Thread
 from packaging import version
-import importlib.metadata
+from packaging.utils import canonicalize_name
 
-from package import MODULE_POPULARITY, MODULE_CATEGORIES, MODULE_DEPENDENCIES, MODULE_DOCS
+from catalog import get_catalog, DEFAULT_CATEGORY
+from search_index import build_search_index
 from system_service_window import PackageSystemService
 from environment_window import SettingsDialog
 from settings import SystemPackages
-import subprocess
+from install_engine import InstallEngine
+from install_plan import PlanError
+from process_supervisor import SupervisedProcess
+from pip_worker import shutdown_session_workers
+from progress import ProgressTracker, format_bytes
+from wheelhouse import get_wheelhouse
+from installed_index import get_installed_index
+from dependency_graph import get_dependency_graph
+from env_discovery import EnvironmentDiscovery, default_roots
+from lock_snapshot import environment_fingerprint, short_fingerprint, write_snapshot, read_snapshot, replay_requirements
+from site_watcher import SiteWatcher
+from outdated import OutdatedChecker, python_version_of
+from index_client import IndexClient, IndexClientError, get_release_catalog
+from install_plan import requirement_key
+from job_queue import JobQueue, PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW
 import threading
 import requests
 import getpass
@@ -29,108 +48,102 @@ import psutil  # For system health monitoring
 import signal
 import time
 import json
-import re
 import sys
 import os
 
 
+SEARCH_LIMIT = 200  # rows the search box shows for a query, best matches first
+FILTER_DEBOUNCE_MS = 150  # the list is filtered once typing pauses this long
+FULL_REFILTER_ROWS = 1000  # visibility changes beyond this many rows re-filter the whole list
+TOOLTIP_CACHE_SIZE = 256  # rendered module tooltips kept for hovering back over a row
+TOOLTIP_HIDE_MS = 4000
+TOOLTIP_MARGIN = 9
+
+
 class InstallThread(QThread):
     progress = Signal(float)  # Signal to update the progress bar with percentage
+    progress_detail = Signal(dict)  # Bytes done/total, throughput and ETA summed over the job
     status_message = Signal(str)
     error_occurred = Signal(str)
     conflict_message = Signal(str)
     module_not_installed = Signal(str)
     module_uninstalled = Signal(str)  # Fix the signal name here
+    cancelled = Signal(float)  # Seconds between the cancel request and the whole process tree being gone
     finished = Signal()
 
-    def __init__(self, modules, action):
+    def __init__(self, modules, action, offline=False, plan=None, python=None):
         super().__init__()
         self.modules = modules
         self.action = action
+        self.python = python or sys.executable  # Interpreter whose environment the job changes
+        self.offline = offline  # Install only from the local wheelhouse
+        self.plan = plan  # InstallPlan to install from without resolving again
         
         self.error_occurred_flag = False
-        self.proc = None  # Store subprocess instance here for termination
+        self.engine = None  # InstallEngine running the job
+        self.tracker = ProgressTracker(on_update=self.emit_progress)  # UI updates are rate capped
+        self.cancel_started = None
         
     def is_module_installed(self, module):
-        try:
-            result = subprocess.run(
-                [sys.executable, '-m', 'pip', 'show', module],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            return result.returncode == 0 and 'Name:' in result.stdout
-        except Exception as e:
-            self.error_occurred.emit(f"Error checking installation status of {module}: {str(e)}")
-            return False
+        # A lookup in the environment's installed index, no `pip show` subprocess per module
+        return get_installed_index(self.python).is_installed(module)
 
     def run(self):
-        for module in self.modules:
-            if self.isInterruptionRequested():
-                self.cleanup()
-                return
-
-            try:
-                if self.action == 'install':
-                    command = [sys.executable, '-m', 'pip', 'install', module]
-                elif self.action == 'uninstall':
-                        if not self.is_module_installed(module):
-                            self.module_not_installed.emit(f"{module} is not installed")
-                            continue
-                        
-                        command = [sys.executable, '-m', 'pip', 'uninstall', '-y', module]
-                elif self.action == 'update':
-                    command = [sys.executable, '-m', 'pip', 'install', '--upgrade', module]
-                else:
-                    self.error_occurred.emit(f"Unknown action: {self.action}")
+        # One pip transaction for the whole selection; installs fetch their wheels in parallel first
+        self.engine = InstallEngine(python=self.python,
+                                    on_status=self.status_message.emit,
+                                    on_error=self.report_error,
+                                    should_stop=self.isInterruptionRequested,
+                                    progress=self.tracker,
+                                    wheelhouse=get_wheelhouse(),
+                                    offline=self.offline)
+        not_installed = []
+        if self.action == 'install' and self.plan:
+            succeeded, failed = self.engine.install_plan(self.plan)
+        elif self.action == 'install':
+            succeeded, failed = self.engine.install(self.modules)
+        elif self.action == 'update':
+            succeeded, failed = self.engine.update(self.modules)
+        elif self.action == 'uninstall':
+            succeeded, not_installed, failed = self.engine.uninstall(self.modules)
+        else:
+            self.report_error(f"Unknown action: {self.action}")
+            succeeded = []
 
-                self.proc = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        if self.isInterruptionRequested():
+            self.cleanup()
+            return
 
-                # Monitor the process for output and interruption requests
-                for line in iter(self.proc.stdout.readline, ''):
-                    if self.isInterruptionRequested():
-                        self.proc.terminate()  # Terminate the subprocess if cancellation is requested
-                        self.cleanup()
-                        return
+        for module in succeeded:
+            self.module_uninstalled.emit(module)
+        for module in not_installed:
+            self.module_not_installed.emit(f"{module} is not installed")
 
-                    self.parse_progress(line)
+        self.tracker.flush()
+        self.progress.emit(0)
+        self.finished.emit()
 
-                stdout, stderr = self.proc.communicate()  # Wait for the process to complete
+    def report_error(self, error_message):
+        self.error_occurred_flag = True
+        self.error_occurred.emit(error_message)
+        if 'conflict' in error_message.lower():
+            self.conflict_message.emit(f"Conflict detected: {error_message}")
 
-                if self.proc.returncode == 0:
-                    self.module_uninstalled.emit(module)
-                    self.status_message.emit(f"{module} {self.action}ed successfully.")
-                else:
-                    error_message = stderr.strip()
-                    self.error_occurred_flag = True
-                    self.error_occurred.emit(f"Error {self.action}ing {module}: {error_message}")
-                    self.error_occurred(f"Error uninstalling {module}: {error_message}")
-                    if 'conflict' in error_message.lower():
-                        self.conflict_message.emit(f"Conflict detected: {error_message}")
-
-            except Exception as e:
-                self.error_occurred_flag = True
-                self.error_occurred.emit(f"An unexpected error occurred while {self.action}ing {module}: {str(e)}")
-
-        self.progress.emit(0)  # Reset progress bar to 0 after finishing
-        self.finished.emit()
+    def emit_progress(self, snapshot):
+        self.progress.emit(snapshot['percent'])
+        self.progress_detail.emit(snapshot)
 
-    def parse_progress(self, line):
-        # This regex matches patterns like 'Downloading XX MB', 'Downloading XX kB', etc.
-        match = re.search(r'(\d+\.\d+|\d+)\s*(kB|MB|GB)', line)
-        if match:
-            size, unit = match.groups()
-            size = float(size)
-            if unit == 'kB':
-                size /= 1024  # Convert kB to MB
-            elif unit == 'GB':
-                size *= 1024  # Convert GB to MB
-            self.progress.emit(size)
+    def requestInterruption(self):
+        self.cancel_started = time.monotonic()
+        super().requestInterruption()
 
     def cleanup(self):
-        if self.proc and self.proc.poll() is None:
-            self.proc.terminate()  # Ensure the subprocess is terminated
-            self.proc.wait()  # Wait for it to exit
+        # Running pip processes notice the request within ~100 ms and stop their
+        # whole process tree (SIGTERM, then SIGKILL), this catches any leftovers
+        if self.engine:
+            self.engine.cancel()
+        if self.cancel_started is not None:
+            self.cancelled.emit(time.monotonic() - self.cancel_started)
         self.finished.emit()
         self.quit()
         
@@ -138,6 +151,221 @@ class InstallThread(QThread):
 
         
 
+################################################################################################################
+                    #PlanThread QThread
+
+class PlanThread(QThread):
+    plan_ready = Signal(object)  # InstallPlan
+    error_occurred = Signal(str)
+
+    def __init__(self, modules, offline=False, python=None):
+        super().__init__()
+        self.modules = modules
+        self.offline = offline
+        self.python = python
+
+    def run(self):
+        # Dry-run resolution of the whole selection, nothing is installed here
+        engine = InstallEngine(python=self.python,
+                               should_stop=self.isInterruptionRequested,
+                               wheelhouse=get_wheelhouse(),
+                               offline=self.offline)
+        try:
+            self.plan_ready.emit(engine.plan(self.modules))
+        except PlanError as e:
+            self.error_occurred.emit(str(e))
+        except Exception as e:
+            # A missing interpreter, a disk error or a truncated report must still end the wait
+            self.error_occurred.emit(f"Could not resolve the selection: {e}")
+
+
+################################################################################################################
+                    #OutdatedThread QThread
+
+class OutdatedThread(QThread):
+    outdated_ready = Signal(object)  # OutdatedResult
+
+    def __init__(self, python=None, parent=None):
+        super().__init__(parent)
+        self.python = python
+
+    def run(self):
+        # Every installed distribution at once, conditional requests keep repeat checks cheap
+        checker = OutdatedChecker(self.python, should_stop=self.isInterruptionRequested)
+        self.outdated_ready.emit(checker.check())
+
+
+################################################################################################################
+                    #VersionPrefetchThread QThread
+
+class VersionPrefetchThread(QThread):
+    versions_ready = Signal(list)  # names whose release lists are now cached
+
+    def __init__(self, names, parent=None):
+        super().__init__(parent)
+        self.names = names
+
+    def run(self):
+        loaded = get_release_catalog().prefetch(self.names, should_stop=self.isInterruptionRequested)
+        self.versions_ready.emit(loaded)
+
+
+################################################################################################################
+                    #CatalogSyncThread QThread
+
+class CatalogSyncThread(QThread):
+    sync_finished = Signal(int, int)  # names added, catalog size
+    error_occurred = Signal(str)
+
+    def run(self):
+        # The index's full project listing goes into the on-disk catalog, curated entries stay as they are
+        try:
+            names = IndexClient().project_names()
+        except IndexClientError as e:
+            self.error_occurred.emit(str(e))
+            return
+        catalog = get_catalog()
+        added = catalog.add_projects(names)
+        self.sync_finished.emit(added, len(catalog))
+
+
+################################################################################################################
+                    #SearchIndexThread QThread
+
+class SearchIndexThread(QThread):
+    index_ready = Signal(object)  # SearchIndex over the catalog and the installed distributions
+
+    def __init__(self, python=None, parent=None):
+        super().__init__(parent)
+        self.python = python
+
+    def run(self):
+        catalog = get_catalog()
+        installed = [dist.name for dist in get_installed_index(self.python).distributions()
+                     if not catalog.contains(dist.name)]
+        index = build_search_index(catalog, installed)
+        if not self.isInterruptionRequested():
+            self.index_ready.emit(index)
+
+
+################################################################################################################
+                    #ModuleFilterThread QThread
+
+class ModuleFilterThread(QThread):
+    filter_ready = Signal(int, list, bool)  # generation, names, ranked search results or curated rows to show
+
+    def __init__(self, generation, query, category, candidates=(), categories=None, search_index=None, parent=None):
+        super().__init__(parent)
+        self.generation = generation
+        self.query = query
+        self.category = category
+        self.candidates = candidates
+        self.categories = categories  # name -> category, None when the candidates are already in the category
+        self.search_index = search_index
+
+    def run(self):
+        if self.search_index is not None:
+            names = self.search_index.search(self.query, SEARCH_LIMIT, self.category)
+            ranked = True
+        else:
+            names = []
+            for position, name in enumerate(self.candidates):
+                if position % 1000 == 0 and self.isInterruptionRequested():
+                    return  # A newer query replaced this one
+                if self.query in name.lower() and (
+                        self.categories is None or self.categories.get(name, DEFAULT_CATEGORY) == self.category):
+                    names.append(name)
+            ranked = False
+        if not self.isInterruptionRequested():
+            self.filter_ready.emit(self.generation, names, ranked)
+
+
+################################################################################################################
+                    #EnvironmentDiscoveryThread QThread
+
+class EnvironmentDiscoveryThread(QThread):
+    environments_found = Signal(list)  # [Environment], each with its installed index built
+
+    def __init__(self, roots, parent=None):
+        super().__init__(parent)
+        self.roots = roots
+
+    def run(self):
+        discovery = EnvironmentDiscovery(self.roots, should_stop=self.isInterruptionRequested)
+        environments = discovery.index(discovery.discover())
+        if not self.isInterruptionRequested():
+            self.environments_found.emit(environments)
+
+
+################################################################################################################
+                    #EnvironmentSwitchThread QThread
+
+class EnvironmentSwitchThread(QThread):
+    switch_ready = Signal(object, object, object, str)  # python, InstalledIndex, DependencyGraph, fingerprint
+    error_occurred = Signal(object, str)  # python, message
+
+    def __init__(self, python, paths=None, parent=None):
+        super().__init__(parent)
+        self.python = python
+        self.paths = paths
+
+    def run(self):
+        # The site-packages scan and the interpreter's marker environment are the slow parts of a switch
+        try:
+            index = get_installed_index(self.python, self.paths)
+            index.distributions()
+            graph = get_dependency_graph(self.python)
+            fingerprint = environment_fingerprint(self.python)
+        except Exception as e:
+            self.error_occurred.emit(self.python, str(e))
+            return
+        if not self.isInterruptionRequested():
+            self.switch_ready.emit(self.python, index, graph, fingerprint)
+
+
+################################################################################################################
+                    #InstallPlanDialog  QDialog
+
+class InstallPlanDialog(QDialog):
+    def __init__(self, plan, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle('Installation Plan')
+        self.resize(620, 420)
+
+        layout = QVBoxLayout()
+
+        summary = f"{len(plan.items)} package(s) will be installed, download size {format_bytes(plan.total_download_bytes)}."
+        if plan.unknown_sizes:
+            summary += f" Size unknown for {len(plan.unknown_sizes)} package(s)."
+        if plan.satisfied:
+            summary += f"<br>Already satisfied: {', '.join(plan.satisfied)}"
+        summary_label = QLabel(summary)
+        summary_label.setWordWrap(True)
+        layout.addWidget(summary_label)
+
+        # Full transitive set, requested modules first
+        items = sorted(plan.items, key=lambda item: (not item.requested, item.name.lower()))
+        table = QTableWidget(len(items), 4)
+        table.setHorizontalHeaderLabels(['Package', 'Version', 'Download', 'Source'])
+        table.verticalHeader().setVisible(False)
+        table.setEditTriggers(QTableWidget.NoEditTriggers)
+        table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        for row, item in enumerate(items):
+            size = 'unknown' if item.size is None and not item.cached else format_bytes(item.download_bytes)
+            source = 'wheelhouse' if item.cached else ('requested' if item.requested else 'dependency')
+            for column, text in enumerate([item.name, item.version, size, source]):
+                table.setItem(row, column, QTableWidgetItem(text))
+        layout.addWidget(table)
+
+        button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        button_box.button(QDialogButtonBox.Ok).setText('Install')
+        button_box.accepted.connect(self.accept)
+        button_box.rejected.connect(self.reject)
+        layout.addWidget(button_box)
+
+        self.setLayout(layout)
+
+
 ################################################################################################################
                     #ModuleInputDialog  QDialog
                     
@@ -170,11 +398,40 @@ class ModuleInputDialog(QDialog):
 #######################################################################################################
                             ## InstalledModulesWindow  QDialog
 
+class InstalledListingThread(QThread):
+    chunk_ready = Signal(list)  # rows of (name, version, size, location, installer)
+    listing_done = Signal(int)
+
+    CHUNK_SIZE = 100
+
+    def __init__(self, python=None, parent=None):
+        super().__init__(parent)
+        self.python = python
+
+    def run(self):
+        # Read in-process from the installed index, sizes come from each RECORD file
+        chunk, count = [], 0
+        for dist in get_installed_index(self.python).distributions():
+            if self.isInterruptionRequested():
+                return
+            size = dist.size
+            chunk.append((dist.name, dist.version, format_bytes(size) if size is not None else '',
+                          dist.location, dist.installer))
+            if len(chunk) >= self.CHUNK_SIZE:
+                count += len(chunk)
+                self.chunk_ready.emit(chunk)
+                chunk = []
+        count += len(chunk)
+        if chunk:
+            self.chunk_ready.emit(chunk)
+        self.listing_done.emit(count)
+
+
 class InstalledModulesWindow(QDialog):
-    def __init__(self, installed_modules, parent=None):
+    def __init__(self, python=None, parent=None):
         super().__init__(parent)
         self.setWindowTitle('Installed Modules')
-        self.resize(500, 400)
+        self.resize(800, 450)
         
        
 
@@ -186,36 +443,188 @@ class InstalledModulesWindow(QDialog):
         self.search_bar.textChanged.connect(self.filter_modules)
         layout.addWidget(self.search_bar)
         
-        # List to display installed modules
-        self.installed_modules_list = QListWidget()
-        self.installed_modules_list.addItems(installed_modules)
+        # Table to display installed modules, filled in chunks while the listing runs
+        self.installed_modules_list = QTableWidget(0, 5)
+        self.installed_modules_list.setHorizontalHeaderLabels(['Name', 'Version', 'Size', 'Location', 'Installer'])
+        self.installed_modules_list.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.installed_modules_list.horizontalHeader().setStretchLastSection(True)
+        self.installed_modules_list.verticalHeader().setVisible(False)
+        self.installed_modules_list.setEditTriggers(QTableWidget.NoEditTriggers)
         layout.addWidget(self.installed_modules_list)
 
+        self.count_label = QLabel('Listing installed modules...')
+        layout.addWidget(self.count_label)
+
         self.setLayout(layout)
+
+        # Filter index: lower-case name per row, the rows currently shown and the text they match
+        self.names = []
+        self.visible = set()
+        self.filter_text = ''
+
+        self.listing_thread = InstalledListingThread(python, self)
+        self.listing_thread.chunk_ready.connect(self.add_rows)
+        self.listing_thread.listing_done.connect(lambda count: self.count_label.setText(f'{count} modules installed.'))
+        self.listing_thread.start()
+
+    def add_rows(self, rows):
+        table = self.installed_modules_list
+        first = table.rowCount()
+        table.setUpdatesEnabled(False)
+        table.setRowCount(first + len(rows))
+        for offset, values in enumerate(rows):
+            row = first + offset
+            for column, value in enumerate(values):
+                table.setItem(row, column, QTableWidgetItem(value))
+            self.names.append(values[0].lower())
+            if self.filter_text in self.names[row]:
+                self.visible.add(row)
+            else:
+                table.setRowHidden(row, True)
+        table.setUpdatesEnabled(True)
+        self.count_label.setText(f'Listing installed modules... {table.rowCount()}')
         
     def filter_modules(self):
         search_text = self.search_bar.text().lower()
-        for index in range(self.installed_modules_list.count()):
-            item = self.installed_modules_list.item(index)
-            item.setHidden(search_text not in item.text().lower())
+        # A longer query can only match a subset of what the previous one matched
+        if self.filter_text and search_text.startswith(self.filter_text):
+            candidates = self.visible
+        else:
+            candidates = range(len(self.names))
+        matches = {row for row in candidates if search_text in self.names[row]}
+
+        # Only rows whose visibility changes are touched
+        for row in self.visible - matches:
+            self.installed_modules_list.setRowHidden(row, True)
+        for row in matches - self.visible:
+            self.installed_modules_list.setRowHidden(row, False)
+        self.visible = matches
+        self.filter_text = search_text
+
+    def done(self, result):
+        # Also reached when the window is closed
+        self.listing_thread.requestInterruption()
+        self.listing_thread.wait()
+        super().done(result)
     
     
+#######################################################################################################
+                            ## WheelhouseWindow  QDialog
+
+class WheelhouseWindow(QDialog):
+    def __init__(self, wheelhouse, parent=None):
+        super().__init__(parent)
+        self.wheelhouse = wheelhouse
+        self.setWindowTitle('Local Wheelhouse')
+        self.resize(600, 420)
+
+        layout = QVBoxLayout()
+
+        self.summary_label = QLabel()
+        self.summary_label.setWordWrap(True)
+        layout.addWidget(self.summary_label)
+
+        # Wheels, most recently used first
+        self.entries_list = QListWidget()
+        layout.addWidget(self.entries_list)
+
+        button_layout = QHBoxLayout()
+        evict_button = QPushButton('Trim to size limit')
+        evict_button.clicked.connect(self.evict)
+        button_layout.addWidget(evict_button)
+        clear_button = QPushButton('Clear wheelhouse')
+        clear_button.clicked.connect(self.clear)
+        button_layout.addWidget(clear_button)
+        button_layout.addStretch()
+        layout.addLayout(button_layout)
+
+        self.setLayout(layout)
+        self.refresh()
+
+    def refresh(self):
+        status = self.wheelhouse.status()
+        self.summary_label.setText(
+            f"Location: {status['root']}<br>"
+            f"Wheels: {status['count']}<br>"
+            f"Size: {format_bytes(status['total_bytes'])} of {format_bytes(status['max_bytes'])}"
+        )
+        self.entries_list.clear()
+        for entry in status['entries']:
+            last_used = time.strftime('%Y-%m-%d %H:%M', time.localtime(entry['last_used']))
+            self.entries_list.addItem(f"{entry['filename']}  ({format_bytes(entry['size'])}, last used {last_used})")
+
+    def evict(self):
+        evicted = self.wheelhouse.evict()
+        self.refresh()
+        QMessageBox.information(self, 'Wheelhouse', f"Removed {len(evicted)} wheel(s).")
+
+    def clear(self):
+        reply = QMessageBox.question(self, 'Wheelhouse', 'Remove every wheel from the local wheelhouse?',
+                                     QMessageBox.Yes | QMessageBox.No)
+        if reply == QMessageBox.Yes:
+            self.wheelhouse.clear()
+            self.refresh()
+
+
 #############################################################################################
                         # CustomTooltip  QWidget
                         
 class CustomTooltip(QWidget):
-    def __init__(self, text, parent=None):
+    """
+    The main window's one tooltip. Each content is rendered into a QTextDocument the
+    first time it is shown and kept in a small LRU, so moving back over a row only swaps
+    the document and repaints: no new widget, no rich-text parse, no layout pass.
+    """
+    def __init__(self, parent=None, cache_size=TOOLTIP_CACHE_SIZE):
         super().__init__(parent)
         self.parent_widget = parent
         self.setWindowFlags(Qt.ToolTip | Qt.FramelessWindowHint)
         self.setAttribute(Qt.WA_ShowWithoutActivating)
 
-        layout = QVBoxLayout()
-        self.label = QLabel(text)
-        self.label.setWordWrap(True)
-        self.label.setOpenExternalLinks(True)
-        layout.addWidget(self.label)
-        self.setLayout(layout)
+        self.cache_size = cache_size
+        self.documents = OrderedDict()  # content key -> laid out document, least recently shown first
+        self.content_key = None
+        self.document = None
+        self.hide_timer = QTimer(self)
+        self.hide_timer.setSingleShot(True)
+        self.hide_timer.setInterval(TOOLTIP_HIDE_MS)
+        self.hide_timer.timeout.connect(self.hide)
+
+    def set_content(self, key, render):
+        """Show the document cached under key. render() gives its rich text, and is only called on a miss."""
+        if key == self.content_key:
+            return
+        document = self.documents.get(key)
+        if document is None:
+            while len(self.documents) >= self.cache_size:
+                self.documents.popitem(last=False)[1].deleteLater()
+            document = QTextDocument(self)
+            document.setDefaultFont(self.font())
+            document.setDocumentMargin(TOOLTIP_MARGIN)
+            document.setHtml(render())
+            document.adjustSize()
+            self.documents[key] = document
+        else:
+            self.documents.move_to_end(key)
+        self.content_key = key
+        self.document = document
+        self.resize(document.size().toSize())
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.fillRect(self.rect(), self.palette().window())
+        if self.document is not None:
+            context = QAbstractTextDocumentLayout.PaintContext()
+            context.palette = self.palette()
+            self.document.documentLayout().draw(painter, context)
+
+    def mousePressEvent(self, event):
+        # The documentation link, as the label's external links were
+        anchor = self.document.documentLayout().anchorAt(event.position()) if self.document is not None else ''
+        if anchor and anchor != '#':
+            QDesktopServices.openUrl(QUrl(anchor))
+        super().mousePressEvent(event)
 
     def show_tooltip(self, pos):
         # self.move(pos + QPoint(2, 2))
@@ -239,8 +648,8 @@ class CustomTooltip(QWidget):
         self.move(tooltip_pos)
         self.show()
         
-        # Hide the tooltip after 4 seconds
-        QTimer.singleShot(4000, self.hide)
+        # Hide the tooltip after 4 seconds, counted from the last hover
+        self.hide_timer.start()
 
     def update_tooltip_position(self):
         # Method to reposition the tooltip when the parent widget moves
@@ -249,35 +658,193 @@ class CustomTooltip(QWidget):
             self.show_tooltip(current_pos)
 
 #####################################################################################################
-                    # HoverListWidget QListWidget
+                    # ModuleListModel QAbstractListModel
+
+class ModuleListModel(QAbstractListModel):
+    """
+    Module names as rows. A row's tooltip, icon and sort keys are only looked up when
+    the view asks for them, so filling the model costs the same for any catalog size.
+    The model sorts itself with plain Python keys, which on a long list is far cheaper
+    than a proxy asking for a role on every comparison.
+    """
+    TooltipRole = Qt.UserRole
+    VisibleRole = Qt.UserRole + 1
+    PopularityRole = Qt.UserRole + 2
+    VersionRole = Qt.UserRole + 3
+
+    def __init__(self, tooltip, is_outdated, installed_version, parent=None):
+        super().__init__(parent)
+        self.names = []
+        self.hidden = set()  # rows the filter leaves out
+        self.tooltip = tooltip
+        self.is_outdated = is_outdated
+        self.installed_version = installed_version
+        self.outdated_icon = QIcon('icons/updating.png')
+        self.sort_role = Qt.DisplayRole
+        self.sort_column = -1  # below 0 the names keep the order they were given in
+        self.sort_order = Qt.AscendingOrder
+        self._given = []  # the names in the order they were given
+        self._order = []  # _given position of every row
+        self._rows = None  # normalized name -> rows, built on the first row refresh
+        self._popularity = None  # name -> popularity, read from the catalog on the first popularity sort
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.names)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        name = self.names[index.row()]
+        if role == Qt.DisplayRole:
+            return name
+        if role == self.TooltipRole:
+            return self.tooltip(name)
+        if role == Qt.DecorationRole:
+            return self.outdated_icon if self.is_outdated(name) else None
+        if role == self.VisibleRole:
+            return index.row() not in self.hidden
+        if role == self.PopularityRole:
+            return self.popularity().get(name, 0)
+        if role == self.VersionRole:
+            return self.installed_version(name)
+        return None
+
+    def popularity(self):
+        if self._popularity is None:
+            self._popularity = get_catalog().column('popularity', self._given)
+        return self._popularity
+
+    def set_names(self, names):
+        self.beginResetModel()
+        self._given = list(names)
+        self.hidden = set()
+        self._popularity = None
+        self._order = self._sorted_order()
+        self.names = [self._given[position] for position in self._order]
+        self._rows = None
+        self.endResetModel()
+
+    def _sorted_order(self):
+        positions = range(len(self._given))
+        if self.sort_column < 0:
+            return list(positions)
+        if self.sort_role == self.PopularityRole:
+            popularity = self.popularity()
+            key = lambda position: popularity.get(self._given[position], 0)
+        elif self.sort_role == self.VersionRole:
+            # Not installed rows come last in either order, they have nothing to compare
+            versions = [self.installed_version(name) for name in self._given]
+            installed = [position for position in positions if versions[position]]
+            missing = [position for position in positions if not versions[position]]
+            return sorted(installed, key=lambda position: self.version_key(versions[position]),
+                          reverse=self.sort_order == Qt.DescendingOrder) + missing
+        else:
+            key = lambda position: self._given[position].lower()
+        return sorted(positions, key=key, reverse=self.sort_order == Qt.DescendingOrder)
+
+    @staticmethod
+    def version_key(text):
+        # 10.0 after 2.0; a version packaging cannot parse sorts below every valid one
+        try:
+            return (1, version.Version(text))
+        except version.InvalidVersion:
+            return (0, text)
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        """Sort by sort_role, or restore the given order when column is below 0. Hidden rows and selections move along."""
+        self.sort_column, self.sort_order = column, order
+        self.layoutAboutToBeChanged.emit()
+        order = self._sorted_order()
+        new_rows = [0] * len(order)
+        for row, position in enumerate(order):
+            new_rows[position] = row
+        old_rows = [new_rows[position] for position in self._order]
+        persistent = self.persistentIndexList()
+        self.changePersistentIndexList(persistent, [self.index(old_rows[index.row()]) for index in persistent])
+        self.hidden = {old_rows[row] for row in self.hidden}
+        self._order = order
+        self.names = [self._given[position] for position in order]
+        self._rows = None
+        self.layoutChanged.emit()
+
+    def refresh(self, keys=None):
+        """Rows of the given normalized names (all rows when None) show their current version and state."""
+        if keys is None:
+            rows = range(len(self.names))
+        else:
+            if self._rows is None:
+                self._rows = {}
+                for row, name in enumerate(self.names):
+                    self._rows.setdefault(canonicalize_name(name.strip()), []).append(row)
+            rows = [row for key in keys for row in self._rows.get(key, [])]
+        self.rows_changed(rows, [self.TooltipRole, Qt.DecorationRole, self.VersionRole])
+
+    def rows_changed(self, rows, roles):
+        # One dataChanged per run of consecutive rows
+        rows = sorted(rows)
+        start = 0
+        for position in range(1, len(rows) + 1):
+            if position == len(rows) or rows[position] != rows[position - 1] + 1:
+                self.dataChanged.emit(self.index(rows[start]), self.index(rows[position - 1]), roles)
+                start = position
+
+
+#####################################################################################################
+                    # ModuleFilterProxy QSortFilterProxyModel
+
+class ModuleFilterProxy(QSortFilterProxyModel):
+    """
+    Shows the rows the model does not hide and leaves sorting to the model. A small
+    visibility change re-filters only its own rows; a large one rebuilds the mapping
+    in one pass instead of sending a change notification per row.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setFilterRole(ModuleListModel.VisibleRole)  # dataChanged on this role re-filters those rows
+        self.setDynamicSortFilter(True)
 
-class HoverListWidget(QListWidget):
+    def filterAcceptsRow(self, source_row, source_parent):
+        return source_row not in self.sourceModel().hidden
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.sourceModel().sort(column, order)
+
+    def set_visible(self, names=None):
+        """Show only the given names (all rows when None)."""
+        model = self.sourceModel()
+        if names is None:
+            hidden = set()
+        else:
+            visible = set(names)
+            hidden = {row for row, name in enumerate(model.names) if name not in visible}
+        changed = model.hidden ^ hidden
+        if len(changed) > FULL_REFILTER_ROWS:
+            self.beginResetModel()
+            model.hidden = hidden
+            self.endResetModel()
+        else:
+            model.hidden = hidden
+            model.rows_changed(changed, [ModuleListModel.VisibleRole])
+
+
+#####################################################################################################
+                    # HoverListView QListView
+
+class HoverListView(QListView):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        self.setStyleSheet("QListWidget::item { border: 1px solid transparent; }")
+        self.setStyleSheet("QListView::item { border: 1px solid transparent; }")
         self.setMouseTracking(True)  # Enable mouse tracking for hover detection
-        self.hovered_item = None
-        self.tooltip = CustomTooltip(self)
+        self.setUniformItemSizes(True)  # Row heights are not measured one by one
+        self.hovered_index = QModelIndex()
 
     def mouseMoveEvent(self, event):
-        pos = event.pos()
-        current_item = self.itemAt(pos)
+        current_index = self.indexAt(event.pos())
 
-        if current_item != self.hovered_item:
-            self.hovered_item = current_item
+        if current_index != self.hovered_index:
+            self.hovered_index = current_index
             self.viewport().update()  # Trigger a repaint to update hover effect
         super().mouseMoveEvent(event)
-        
-        
-
-    def paintEvent(self, event):
-        super().paintEvent(event)
-        painter = QPainter(self.viewport())
-        for index in range(self.count()):
-            item = self.item(index)
-            rect = self.visualItemRect(item)
-            # if item == self.hovered_item:
-            #     painter.fillRect(rect, QColor(0,159,255))  # Background color for hovered items   
 
 
 ###################################################################################################################
@@ -296,14 +863,18 @@ class CommandThread(QThread):
     def run(self):
         env = {f"DEBIAN_FRONTEND": "noninteractive"}
         full_command = ['sudo', '-S'] + self.command
-        process = subprocess.Popen(full_command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
-                                   stderr=subprocess.PIPE, text=True, env=env)
-        stdout, stderr = process.communicate(input=self.password + '\n')
-        for line in stdout.splitlines():
-            self.output_received.emit(line)
-        for line in stderr.splitlines():
-            self.error_received.emit(line)
-        self.finished.emit(process.returncode)
+        process = SupervisedProcess(full_command, on_chunk=self.emit_chunk, input_text=self.password + '\n',
+                                    keep_lines=False, env=env)
+        self.finished.emit(process.run())
+
+    def emit_chunk(self, lines):
+        # One signal per stream and chunk instead of one per line
+        stdout = ''.join(line.text for line in lines if line.stream == 'stdout')
+        stderr = ''.join(line.text for line in lines if line.stream == 'stderr')
+        if stdout:
+            self.output_received.emit(stdout.rstrip('\n'))
+        if stderr:
+            self.error_received.emit(stderr.rstrip('\n'))
 
 
 
@@ -317,20 +888,72 @@ class CommandThread(QThread):
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__() 
-        self.module_list =HoverListWidget(self)
-        self.tooltip = None
-        self.tooltip_timer = QTimer(self)
-        self.tooltip_timer.setSingleShot(True)
-        self.tooltip_timer.timeout.connect(self.show_custom_tooltip)
+        self.module_list =HoverListView(self)
+        # Rows are looked up and sorted by the model, the proxy filters them
+        self.module_model = ModuleListModel(self.module_tooltip, self.module_is_outdated, self.installed_version, self)
+        self.module_proxy = ModuleFilterProxy(self)
+        self.module_proxy.setSourceModel(self.module_model)
+        self.module_list.setModel(self.module_proxy)
+        self.tooltip = CustomTooltip(self)  # Reused for every row
 
         self.last_cursor_pos = None
-        self.install_thread = None # Initialize install_thread here
+        self.target_python = None  # Interpreter every action targets, None for the one running the app
+        self.environments = {}  # python -> Environment found by discovery
+        self.discovery_thread = None
+        self.switch_thread = None  # EnvironmentSwitchThread preparing the environment picked last
+        self.switch_threads = []  # switch threads still running, kept alive until they finish
+        self.catalog_thread = None
+        self.search_index = None  # SearchIndex once built, the search box scans the curated list until then
+        self.search_thread = None
+        self.search_rebuild = False
+        # Filtering runs off the GUI thread; each query gets a generation and only the newest one's result is applied
+        self.filter_generation = 0
+        self.filter_request = None  # (query, category) of the newest query
+        self.filter_state = None  # (query, category, names, ranked) of the result on screen
+        self.filter_threads = []  # ModuleFilterThreads still running, kept alive until they finish
+        self.module_categories = None  # curated module -> category, read on the first category filter
+        self.plan_threads = []  # PlanThreads still resolving, kept alive until they finish
+        # Every install / update / uninstall goes through the job queue, one job per environment at a time
+        self.job_queue = JobQueue(self.create_job_thread, parent=self)
         self.load_settings()
         self.iniUI()
         
         # Initialize cancel_requested to False in the constructor
         self.cancel_requested = False
 
+        self.job_queue.queue_changed.connect(self.refresh_queue_panel)
+        self.job_queue.job_started.connect(self.on_job_started)
+        self.job_queue.job_finished.connect(self.on_job_finished)
+        self.refresh_queue_panel()
+
+        # Registered with the index before the watcher, so the graph is current when rows refresh
+        self.dependency_graph = get_dependency_graph()
+
+        # Installs, upgrades and removals (also from a terminal) only refresh the rows they affect
+        self.site_watcher = SiteWatcher(get_installed_index(), self)
+        self.site_watcher.distributions_changed.connect(self.refresh_module_rows)
+
+        # Every catalog and installed name becomes searchable once the index is built
+        QTimer.singleShot(0, self.build_search_index)
+
+        # Other interpreters, virtualenvs and conda prefixes on this host, found in the background
+        QTimer.singleShot(0, self.discover_environments)
+
+        # Latest versions for everything installed, checked in the background
+        self.outdated = None  # OutdatedResult once the first check finished
+        self.outdated_thread = None
+        self.outdated_recheck = False
+        QTimer.singleShot(0, self.check_outdated)
+
+        # Identifies the package set, so two machines can be compared at a glance
+        self.fingerprint = None
+        self.fingerprint_label = QLabel('')
+        self.statusBar().addPermanentWidget(self.fingerprint_label)
+        self.update_fingerprint()
+        held = [job for job in self.job_queue.pending if job.held]
+        if held:
+            self.log_output.append(f"{len(held)} job(s) from the last session are held in the queue, press 'Resume Held' to run them.")
+
     def iniUI(self):
         
         self.setWindowTitle("Python Module Installer")
@@ -338,18 +961,18 @@ class MainWindow(QMainWindow):
         
         #Applying stylesheet to the QListWidget to ensure text visibility and hover effect
         self.module_list.setStyleSheet("""
-            QListWidget::item {
+            QListView::item {
                 color: white; 
             }
-            QListWidget::item:selected {
+            QListView::item:selected {
                 background-color: #3b3b3b; 
                 color:  black; 
             }
-            QListWidget::item:hover {
+            QListView::item:hover {
                 background-color: #3b3b3b; 
                 color: white; 
             }
-            QListWidget::item:focus {
+            QListView::item:focus {
                 background-color: #3b3b3b; 
                 color: white; 
             }
@@ -374,9 +997,30 @@ class MainWindow(QMainWindow):
         
         menu = self.menuBar()
         
+        wheelhouseAction = QAction("&Wheelhouse", self)
+        wheelhouseAction.setShortcut('Ctrl+W')
+        wheelhouseAction.triggered.connect(self.show_wheelhouse)
+        
+        exportLockAction = QAction("E&xport Lock Snapshot...", self)
+        exportLockAction.triggered.connect(self.export_lock_snapshot)
+        
+        replayLockAction = QAction("&Replay Lock Snapshot...", self)
+        replayLockAction.triggered.connect(self.replay_lock_snapshot)
+        
+        environmentRootsAction = QAction("Environment &Roots...", self)
+        environmentRootsAction.triggered.connect(self.edit_environment_roots)
+        
+        syncCatalogAction = QAction("&Sync Catalog with Index", self)
+        syncCatalogAction.triggered.connect(self.sync_catalog)
+        
         file_menu = menu.addMenu("&File")
         file_menu.addAction(minimizeAction)
         file_menu.addAction(maximizeAction)
+        file_menu.addAction(wheelhouseAction)
+        file_menu.addAction(exportLockAction)
+        file_menu.addAction(replayLockAction)
+        file_menu.addAction(environmentRootsAction)
+        file_menu.addAction(syncCatalogAction)
         file_menu.addAction(exitAction)
         
          
@@ -458,7 +1102,12 @@ class MainWindow(QMainWindow):
         self.line_edit = QLineEdit()
         self.line_edit.setPlaceholderText("Search for modules...")
         self.line_edit.setFixedHeight(30)
-        self.line_edit.textChanged.connect(self.filter_modules)
+        # Typing only filters once it pauses
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(FILTER_DEBOUNCE_MS)
+        self.filter_timer.timeout.connect(self.filter_modules)
+        self.line_edit.textChanged.connect(lambda: self.filter_timer.start())
         
         
         self.combo_box1 = QComboBox()
@@ -475,16 +1124,36 @@ class MainWindow(QMainWindow):
         combo_box2 = QComboBox()
         combo_box2.setFixedHeight(30)
         combo_box2.addItems(["Sort by", "Name", "Popularity", "Version"])
-        
+        combo_box2.currentTextChanged.connect(self.sort_modules)
+        
+        # Version picker for the current module, filled from the release catalog
+        self.version_combo = QComboBox()
+        self.version_combo.setFixedHeight(30)
+        self.version_combo.setMinimumWidth(160)
+        self.version_combo.addItem("Latest version", "")
+        self.version_combo.setToolTip('Version to install for the selected module.')
+        self.version_combo.currentIndexChanged.connect(
+            lambda index: self.change_version(self.version_combo.itemData(index) or ''))
+        
+        # Environment every action targets, the running interpreter until discovery lists more
+        self.env_combo = QComboBox()
+        self.env_combo.setFixedHeight(30)
+        self.env_combo.setMinimumWidth(200)
+        self.env_combo.addItem(f"This interpreter (Python {python_version_of()})", "")
+        self.env_combo.setToolTip(sys.executable)
+        self.env_combo.currentIndexChanged.connect(
+            lambda index: self.change_environment(self.env_combo.itemData(index) or None))
+        
+        top_layout.addWidget(self.env_combo)
         top_layout.addWidget(self.line_edit)
         top_layout.addWidget(self.combo_box1)
         top_layout.addWidget(combo_box2)
+        top_layout.addWidget(self.version_combo)
         
         
         
         # Package list widget
-        self.install_thread = None
-        self.modules = list(MODULE_CATEGORIES.keys())
+        self.modules = get_catalog().names(curated_only=True)
         self.update_module_list()
         
 
@@ -565,6 +1234,33 @@ class MainWindow(QMainWindow):
         deps_layout.setSpacing(0)
         log_and_deps_layout.addLayout(deps_layout)
 
+        # Job Queue Area
+        queue_layout = QVBoxLayout()
+        self.queue_list = QListWidget()
+        self.queue_list.setContentsMargins(10, 10, 10, 10)
+        queue_layout.addWidget(QLabel("Job Queue:"))
+        queue_layout.addWidget(self.queue_list)
+        queue_layout.setSpacing(0)
+
+        queue_buttons = QHBoxLayout()
+        self.cancel_job_button = QPushButton('Cancel Job')
+        self.cancel_job_button.setToolTip('Remove the selected job from the queue, or stop it if it is running.')
+        self.cancel_job_button.clicked.connect(self.cancel_selected_job)
+        queue_buttons.addWidget(self.cancel_job_button)
+
+        self.prioritize_job_button = QPushButton('Prioritize')
+        self.prioritize_job_button.setToolTip('Run the selected queued job before the others for its environment.')
+        self.prioritize_job_button.clicked.connect(self.prioritize_selected_job)
+        queue_buttons.addWidget(self.prioritize_job_button)
+
+        self.resume_jobs_button = QPushButton('Resume Held')
+        self.resume_jobs_button.setToolTip('Run the jobs that were still queued when the app was last closed.')
+        self.resume_jobs_button.clicked.connect(self.job_queue.resume_held)
+        queue_buttons.addWidget(self.resume_jobs_button)
+        queue_buttons.setSpacing(2)
+        queue_layout.addLayout(queue_buttons)
+        log_and_deps_layout.addLayout(queue_layout)
+
         layout.addLayout(log_and_deps_layout)
         
        
@@ -647,14 +1343,26 @@ class MainWindow(QMainWindow):
         
         
             # Connect module selection to version update and dependencies display
-        self.module_list.currentItemChanged.connect(self.display_dependencies)
+        self.module_list.selectionModel().currentChanged.connect(self.display_dependencies)
+        self.module_list.selectionModel().currentChanged.connect(self.show_versions)
+
+        # Release lists are prefetched for the rows on screen, shortly after scrolling or filtering stops
+        self.version_module = None  # module the version picker currently shows
+        self.selected_version = None
+        self.prefetch_thread = None
+        self.prefetch_timer = QTimer(self)
+        self.prefetch_timer.setSingleShot(True)
+        self.prefetch_timer.setInterval(200)
+        self.prefetch_timer.timeout.connect(self.prefetch_visible_versions)
+        self.module_list.verticalScrollBar().valueChanged.connect(lambda: self.prefetch_timer.start())
+        self.prefetch_timer.start()
     
     
     
     
-    # Enable mouse tracking and connect the itemEntered signal to show tooltips
+    # Enable mouse tracking and connect the entered signal to show tooltips
         self.module_list.setMouseTracking(True)
-        self.module_list.itemEntered.connect(self.show_custom_tooltip)
+        self.module_list.entered.connect(self.show_custom_tooltip)
         
     def open_systems_services(self):
         system_services = PackageSystemService(self)
@@ -669,17 +1377,17 @@ class MainWindow(QMainWindow):
         setting_dialog = SettingsDialog(self)
         setting_dialog.exec()
         
-    def show_custom_tooltip(self, item):
+    def show_custom_tooltip(self, index):
         # Hide the default tooltip
         QToolTip.hideText()
 
-        # Hide any existing custom tooltip
-        if hasattr(self, 'tooltip') and self.tooltip:
-            self.tooltip.hide()
-
-        # Create and show a new custom tooltip
-        tooltip_text = item.data(Qt.UserRole)  # Get tooltip text from custom data
-        self.tooltip = CustomTooltip(tooltip_text, self)
+        # The text only changes with the installed version or an available update,
+        # it is built by the model and rendered the first time this content is shown
+        module = index.data()
+        key = canonicalize_name(str(module).strip())
+        latest = self.outdated.latest(key) if getattr(self, 'outdated', None) else None
+        self.tooltip.set_content((key, self.get_installed_version(module), latest),
+                                 lambda: index.data(ModuleListModel.TooltipRole))
 
         # Get the cursor's position (global screen coordinates)
         cursor_pos = QCursor.pos()
@@ -695,38 +1403,80 @@ class MainWindow(QMainWindow):
         # Show the tooltip at the adjusted position
         self.tooltip.show_tooltip(cursor_pos)
 
+    def installed_version(self, module_name):
+        # One scan of site-packages serves every row, it is only repeated after something changed there
+        return get_installed_index(self.target_python).version(module_name)
+
     def get_installed_version(self, module_name):
-        try:
-            version = importlib.metadata.version(module_name)
-            return version
-        except importlib.metadata.PackageNotFoundError:
-            return "Not installed"
+        return self.installed_version(module_name) or "Not installed"
    
-    def update_module_list(self):
-        self.module_list.clear()
-        
-        for module in self.modules:
-            module_name = str(module).strip()
-            
-            installed_version = self.get_installed_version(module)
+    def module_tooltip(self, module):
+        module_name = str(module).strip()
+        installed_version = self.get_installed_version(module)
+
+        catalog = get_catalog()
+        docs_url = catalog.docs(module_name) or '#'
+        latest = self.outdated.latest(canonicalize_name(module_name)) if getattr(self, 'outdated', None) else None
+        return (
+            f"Category: {self.get_module_category(module_name)}<br>"
+            f"Popularity: {catalog.popularity(module_name):g}<br>"
+            f"Version: {installed_version}<br>"
+            + (f"Update available: {latest}<br>" if latest else "") +
+            f"Documentation: <a href='{docs_url}'>Docs</a>"
+        )
 
-            docs_url = MODULE_DOCS.get(module, '#')
-            tooltip_text = (
-                f"Category: {self.get_module_category(module_name)}<br>"
-                f"Popularity: {MODULE_POPULARITY.get(module_name, 0)}<br>"
-                f"Version: {installed_version}<br>"
-                f"Documentation: <a href='{docs_url}'>Docs</a>"
-            )
+    def update_module_list(self, modules=None):
+        # The curated list, or the ranked results of a search
+        self.showing_results = modules is not None
+        self.result_names = list(modules) if modules is not None else None
+        self.module_model.set_names(self.modules if modules is None else modules)
 
-            item = QListWidgetItem(module)
-            item.setData(Qt.UserRole, tooltip_text)  # Store tooltip in UserRole to suppress default
+    def module_is_outdated(self, module):
+        outdated = getattr(self, 'outdated', None)
+        return outdated is not None and outdated.is_outdated(canonicalize_name(str(module).strip()))
 
-            # Do not set a tooltip using setToolTip() to prevent default behavior
-            self.module_list.addItem(item)
+    def current_module(self):
+        index = self.module_list.currentIndex()
+        return index.data() if index.isValid() else None
 
-        # Connect the custom tooltip display to item hover
-        self.module_list.itemEntered.connect(self.show_custom_tooltip)
+    def selected_module_names(self):
+        indexes = sorted(self.module_list.selectionModel().selectedIndexes(), key=lambda index: index.row())
+        return [index.data() for index in indexes]
     
+    def refresh_module_rows(self, keys):
+        # Called by the site watcher with the names whose installed version changed
+        self.add_installed_to_search(keys)
+        self.module_model.refresh(keys)
+        self.log_output.append(f"Installed packages changed: {', '.join(keys)}")
+        self.display_dependencies()
+        self.check_outdated()
+
+    def check_outdated(self):
+        if self.outdated_thread and self.outdated_thread.isRunning():
+            self.outdated_recheck = True  # Run again once the current check is done
+            return
+        self.outdated_recheck = False
+        self.outdated_thread = OutdatedThread(self.target_python, parent=self)
+        self.outdated_thread.outdated_ready.connect(self.on_outdated_ready)
+        self.outdated_thread.start()
+
+    def on_outdated_ready(self, result):
+        if self.outdated_thread.python != self.target_python:
+            # Checked the environment that was selected before, check the current one instead
+            QTimer.singleShot(0, self.check_outdated)
+            return
+        previous = set(self.outdated.outdated.items()) if self.outdated else set()
+        self.outdated = result
+        # Only rows whose outdated state or latest version changed are touched
+        changed = {key for key, _ in previous ^ set(result.outdated.items())}
+        self.module_model.refresh(changed)
+        if result.outdated:
+            self.log_output.append(f"{len(result.outdated)} of {result.checked} installed packages have updates: "
+                                   + ', '.join(f"{key} {installed} -> {latest}"
+                                               for key, (installed, latest) in sorted(result.outdated.items())))
+        if self.outdated_recheck:
+            QTimer.singleShot(0, self.check_outdated)
+
     ########################################################################################################################
                          # check_updates func
     
@@ -759,6 +1509,14 @@ class MainWindow(QMainWindow):
     def closeEvent(self, event):
         # Save the settings (size and position) when the window is closed
         self.save_settings()
+        # Running jobs are interrupted and, with everything still queued, held for the next session
+        self.job_queue.shutdown()
+        for thread in (self.outdated_thread, self.prefetch_thread, self.discovery_thread, self.catalog_thread,
+                       self.search_thread, *self.filter_threads, *self.switch_threads):
+            if thread and thread.isRunning():
+                thread.requestInterruption()
+                thread.wait()
+        shutdown_session_workers()
         event.accept()  # Accept the close event to allow the window to close
 
     def save_settings(self):
@@ -856,106 +1614,143 @@ class MainWindow(QMainWindow):
         
     def get_installed_modules(self):
         """Retrieve the list of installed modules."""
-        try:
-            result = subprocess.check_output([sys.executable, '-m', 'pip', 'list'], text=True)
-            installed_modules = [line.split()[0] for line in result.split('\n')[2:] if line]
-            return installed_modules
-        except subprocess.CalledProcessError as e:
-            QMessageBox.critical(self, 'Error', f"Failed to retrieve installed modules: {e}")
-            return []
+        return [dist.name for dist in get_installed_index(self.target_python).distributions()]
+
+    def show_wheelhouse(self):
+        """Show what the local wheelhouse holds and how much space it uses."""
+        dialog = WheelhouseWindow(get_wheelhouse(), self)
+        dialog.exec()
 
     def show_installed_modules(self):
         """Show the installed modules in a new window."""
-        installed_modules = self.get_installed_modules()  # Retrieve the list of installed modules
-        dialog = InstalledModulesWindow(installed_modules)  # Pass the list of installed modules to the dialog
+        dialog = InstalledModulesWindow(python=self.target_python, parent=self)  # Opens at once, rows stream in from a listing thread
         dialog.exec()  # Show the dialog
 
 
   
     def filter_modules(self):
-        search_text = self.line_edit.text().lower()
+        query = self.line_edit.text().strip().lower()
         category = self.combo_box1.currentText()
-        print(f"Filtering modules with search text: '{search_text}' and category: '{category}'")
-        
-        for index in range(self.module_list.count()):
-            item = self.module_list.item(index)
-            module_name = item.text()
-            item_category = self.get_module_category(module_name)
-            print(f"Module: {module_name}, Category: {item_category}")
-            
-            item.setHidden(
-                (search_text not in module_name.lower()) or
-                (category != 'All Categories' and self.get_module_category(item.text()) != category)
-            )
-           
-
-
-        # # Update dependencies after filtering
-        
-        self.display_dependencies()
+        category = None if category == 'All Categories' else category
+
+        # Whatever is still running answers an older query
+        self.filter_timer.stop()
+        self.filter_generation += 1
+        self.filter_request = (query, category)
+        for thread in self.filter_threads:
+            thread.requestInterruption()
+        self.filter_threads = [thread for thread in self.filter_threads if not thread.isFinished()]
+
+        if query and self.search_index is not None:
+            # The best matches over every known name. A longer query can bring in names below the
+            # last cutoff, so the index is asked again rather than the last results narrowed
+            thread = ModuleFilterThread(self.filter_generation, query, category,
+                                        search_index=self.search_index, parent=self)
+        else:
+            previous = self.filter_state
+            if previous and not previous[3] and previous[1] == category and query.startswith(previous[0]):
+                # A longer query only drops rows, so only the rows shown now need checking
+                thread = ModuleFilterThread(self.filter_generation, query, category, previous[2], parent=self)
+            else:
+                thread = ModuleFilterThread(self.filter_generation, query, category, self.modules,
+                                            self.curated_categories() if category else None, parent=self)
+        thread.filter_ready.connect(self.on_filter_ready)
+        self.filter_threads.append(thread)
+        thread.start()
+
+    def on_filter_ready(self, generation, names, ranked):
+        if generation != self.filter_generation:
+            return  # A newer query is on its way
+        query, category = self.filter_request
+        if ranked:
+            if not (self.showing_results and names == self.result_names):
+                self.update_module_list(names)
+        else:
+            if self.showing_results:
+                self.update_module_list()
+            # Only rows whose visibility changed are touched
+            self.module_proxy.set_visible(names)
+        self.filter_state = (query, category, names, ranked)
+        self.prefetch_timer.start()
+
+    def curated_categories(self):
+        if self.module_categories is None:
+            self.module_categories = get_catalog().column('category', self.modules)
+        return self.module_categories
 
-  
     def sort_modules(self, sort_by):
-        if sort_by == 'Name':
-            self.modules.sort()
-        elif sort_by == 'Popularity':
-            self.modules.sort(key=lambda m: MODULE_POPULARITY.get(m, 0), reverse=True)
-        elif sort_by == 'Version':
-            self.modules.sort(key=lambda m: self.get_installed_version(m), reverse=True)
+        # The model sorts whatever the list shows, 'Sort by' restores catalog or search rank order
+        orders = {
+            'Name': (Qt.DisplayRole, Qt.AscendingOrder),
+            'Popularity': (ModuleListModel.PopularityRole, Qt.DescendingOrder),
+            'Version': (ModuleListModel.VersionRole, Qt.DescendingOrder),
+        }
+        if sort_by not in orders:
+            self.module_proxy.sort(-1)
+            return
+        self.module_model.sort_role, order = orders[sort_by]
+        self.module_proxy.sort(0, order)
         
      
     def get_module_category(self, module):
-        # Return module category from mock data
-        return MODULE_CATEGORIES.get(module, 'Others')
+        # Return module category from the catalog
+        return get_catalog().category(module)
     
 
     def display_dependencies(self):
-        selected_module = self.module_list.currentItem()
-        if selected_module:
-            module_name = selected_module.text()
-            dependencies = MODULE_DEPENDENCIES.get(module_name, [])
+        module_name = self.current_module()
+        if module_name:
             self.dependencies_list.clear()
-            self.dependencies_list.addItems(dependencies if dependencies else ['No dependencies'])
+            index = get_installed_index(self.target_python)
+            if not index.is_installed(module_name):
+                self.dependencies_list.addItem('Not installed')
+                return
+
+            # Real Requires-Dist edges of the installed distribution, markers evaluated
+            graph = self.dependency_graph
+            dependencies = graph.dependencies(module_name)
+            for dependency in dependencies:
+                installed_version = index.version(dependency)
+                self.dependencies_list.addItem(f"{dependency} {installed_version}" if installed_version
+                                               else f"{dependency} (not installed)")
+            if not dependencies:
+                self.dependencies_list.addItem('No dependencies')
+
+            total = len(graph.transitive_dependencies(module_name))
+            if total > len(dependencies):
+                self.dependencies_list.addItem(f"{total} dependencies in total, including indirect ones")
+            dependents = graph.dependents(module_name)
+            if dependents:
+                self.dependencies_list.addItem(f"Required by: {', '.join(dependents)}")
 
 ########################################################################################
                                 # UNINSTALL MODULE FUNC
     def uninstall_modules(self):
-        selected_modules = [self.module_list.item(i).text() for i in range(self.module_list.count()) if self.module_list.item(i).isSelected()]
+        selected_modules = self.selected_module_names()
         uninstall_action = 'uninstall'
         
         if not selected_modules:
             QMessageBox.warning(self, 'Warning', 'No modules selected for uninstallation.')
             return
 
-        # Start the uninstallation thread
-        self.uninstall_thread = InstallThread(selected_modules, uninstall_action)
-        
-        self.modules_not_installed = [] 
-        self.module_uninstalled = []
-
-        
-        # Connect signals and slots
-        self.uninstall_thread.progress.connect(self.update_progress_bar)
-        self.uninstall_thread.finished.connect(self.on_uninstall_finished)
-        self.uninstall_thread.finished.connect(self.re_enable_buttons)
-        # self.uninstall_thread.error_occurred.connect(self.show_error_message)
-        self.uninstall_thread.status_message.connect(self.show_status_message)
-        self.uninstall_thread.conflict_message.connect(self.show_conflict_message)
-        self.uninstall_thread.error_occurred.connect(self.handle_uninstall_error)
-        self.uninstall_thread.finished.connect(self.check_uninstallation_status)
-        
-    
-        # self.uninstall_thread.finished.connect(lambda: self.status_label.setText('Uninstallation completed.'))
-         # Capture the module_uninstalled and module_not_installed signals
-        self.uninstall_thread.module_uninstalled.connect(lambda module: self.module_uninstalled.append(module))
-        self.uninstall_thread.module_not_installed.connect(lambda module: self.modules_not_installed.append(module))
-
+        # Show what the removal would break before anything is queued
+        impact = self.dependency_graph.removal_impact(selected_modules)
+        if impact:
+            reply = QMessageBox.question(
+                self, 'Uninstall Impact',
+                f"Uninstalling {', '.join(selected_modules)} leaves {len(impact.broken)} installed "
+                f"package(s) with missing requirements:\n\n{impact.describe()}\n\nUninstall anyway?",
+                QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+            if reply != QMessageBox.Yes:
+                self.status_label.setText("Uninstallation cancelled.")
+                return
 
-        # Start the thread
-        self.uninstall_thread.start()
+        # Queue the uninstallation, it runs once earlier jobs for this environment are done
+        job = self.job_queue.submit(uninstall_action, selected_modules, env=self.target_python, priority=PRIORITY_NORMAL)
+        self.status_label.setText(f"Uninstallation queued as job #{job.id}.")
         
         
-    def check_uninstallation_status(self):
+    def check_uninstallation_status(self, job):
         
         """
          Function to indicate the uninstallation status of modules.
@@ -974,21 +1769,17 @@ class MainWindow(QMainWindow):
             any_uninstalled = False
 
             # Check if there are modules not installed
-            if hasattr(self, 'modules_not_installed') and self.modules_not_installed:
-                not_installed_modules = self.modules_not_installed.copy()  # Capture and clear list
-                self.modules_not_installed.clear()
+            if job.not_installed:
                 self.progress_bar.setValue(0)
-                QMessageBox.information(self, 'Module Not Installed', '\n'.join(not_installed_modules))
+                QMessageBox.information(self, 'Module Not Installed', '\n'.join(job.not_installed))
 
             # Check if any module was uninstalled
-            if hasattr(self, 'module_uninstalled') and self.module_uninstalled:
-                uninstalled_modules = self.module_uninstalled.copy()  # Capture and clear list
-                self.module_uninstalled.clear()
+            if job.succeeded:
                 self.progress_bar.setValue(0)
-                QMessageBox.information(self, 'Uninstallation Complete', '\n'.join(uninstalled_modules))
+                QMessageBox.information(self, 'Uninstallation Complete', '\n'.join(job.succeeded))
                 any_uninstalled = True
 
-            if not any_uninstalled and not self.modules_not_installed:
+            if not any_uninstalled and not job.not_installed:
                 # Show only if no modules were uninstalled and no modules were reported as not installed
                 QMessageBox.information(self, 'Uninstallation Status', 'No uninstallation actions were performed.')
 
@@ -996,15 +1787,13 @@ class MainWindow(QMainWindow):
             self._display_message_shown = False
 
 
-    def on_uninstall_finished(self):
-        self.re_enable_buttons()
-
+    def on_uninstall_finished(self, job):
         # Close the cancel message if it's open
-        if hasattr(self, 'cancel_message'):
+        if hasattr(self, 'cancel_message') and job.state != 'cancelled':
             self.cancel_message.close()
 
         # Call the function to check uninstallation status and display the appropriate message
-        self.check_uninstallation_status()
+        self.check_uninstallation_status(job)
 
         # Ensure progress bar ends at 100%
         self.progress_bar.setValue(100)
@@ -1033,31 +1822,34 @@ class MainWindow(QMainWindow):
     def install_modules(self):
          # Reset cancel_requested when starting a new installation
         self.cancel_requested = False
-        
-        if self.install_thread and self.install_thread.isRunning():
-            # Request the current thread to stop
-            self.install_thread.requestInterruption()
-            self.install_thread.wait()  # Wait for the thread to finish
 
-        selected_modules = [self.module_list.item(i).text() for i in range(self.module_list.count()) if self.module_list.item(i).isSelected()]
-        action = 'install'
+        selected_modules = self.selected_module_names()
 
         if not selected_modules:
             QMessageBox.warning(self, 'Warning', 'No modules selected for installation.')
             return
 
-        # Check for internet connection
-        if not self.is_internet_available():
-            QMessageBox.critical(self, 'No Internet', 'No internet connection detected. Please check your connection and try again.')
-            self.status_label.setText('Installation failed: No internet connection')
-            return
+        # Check for internet connection, without it only the local wheelhouse can be used
+        offline = not self.is_internet_available()
+        if offline:
+            if get_wheelhouse().is_empty():
+                QMessageBox.critical(self, 'No Internet', 'No internet connection detected. Please check your connection and try again.')
+                self.status_label.setText('Installation failed: No internet connection')
+                return
+            self.log_output.append('No internet connection detected, installing from the local wheelhouse only.')
             
         # List to hold selected modules that are already installed
         already_installed_modules = []
 
-        # Check if each selected module is already installed
+        # A version picked in the version picker is pinned in the install command
+        selected_modules = [self.pinned_requirement(module) for module in selected_modules]
+
+        # Check if each selected module is already installed (in the pinned version, if one was picked)
         for module in selected_modules[:]:
-            if self.is_module_installed(module):
+            installed_version = get_installed_index(self.target_python).version(requirement_key(module))
+            pinned_version = module.split('==', 1)[1] if '==' in module else None
+            if installed_version and (pinned_version is None
+                                      or version.parse(installed_version) == version.parse(pinned_version)):
                 already_installed_modules.append(module)
                 selected_modules.remove(module)
 
@@ -1068,109 +1860,366 @@ class MainWindow(QMainWindow):
             self.status_label.setText('All selected modules are already installed.')
             return
 
-        # Start the installation thread for the selected modules
-        self.install_thread = InstallThread(selected_modules, action)
-        
+        # Resolve the whole selection first so the user sees what it pulls in
+        self.status_label.setText('Resolving installation plan...')
+        self.plan_threads = [thread for thread in self.plan_threads if not thread.isFinished()]
+        plan_thread = PlanThread(selected_modules, offline, self.target_python)
+        plan_thread.plan_ready.connect(lambda plan: self.on_plan_ready(plan, offline))
+        plan_thread.error_occurred.connect(self.on_plan_error)
+        self.plan_threads.append(plan_thread)
+        plan_thread.start()
+
+    def on_plan_ready(self, plan, offline):
+        dialog = InstallPlanDialog(plan, self)
+        if dialog.exec() != QDialog.Accepted:
+            self.status_label.setText('Installation cancelled.')
+            return
+        self.start_install_thread(plan.modules, offline, plan)
+
+    def on_plan_error(self, error_message):
+        self.status_label.setText('Installation failed: the selection could not be resolved')
+        self.handle_install_error(error_message)
+
+    def start_install_thread(self, selected_modules, offline=False, plan=None):
+        # Queue the installation, it runs once earlier jobs for this environment are done
+        job = self.job_queue.submit('install', selected_modules, env=self.target_python, offline=offline, plan=plan)
+        self.status_label.setText(f"Installation queued as job #{job.id}.")
+
+    def create_job_thread(self, job):
+        # Called by the job queue when the job's environment is free
+        thread = InstallThread(job.modules, job.action, offline=job.offline, plan=job.plan, python=job.env)
+        error_handlers = {'install': self.handle_install_error,
+                          'uninstall': self.handle_uninstall_error,
+                          'update': self.handle_update_error}
+
         # Connect signals and slots
-        self.install_thread.progress.connect(self.update_progress_bar)
-        self.install_thread.finished.connect(self.on_install_finished)
-        self.install_thread.finished.connect(self.re_enable_buttons)
-        # self.install_thread.error_occurred.connect(self.show_error_message)
-        self.install_thread.status_message.connect(self.show_status_message)
-        self.install_thread.conflict_message.connect(self.show_conflict_message)
-        self.install_thread.error_occurred.connect(self.handle_install_error)
+        thread.progress.connect(self.update_progress_bar)
+        thread.progress_detail.connect(self.update_progress_details)
+        thread.status_message.connect(self.show_status_message)
+        thread.conflict_message.connect(self.show_conflict_message)
+        thread.error_occurred.connect(error_handlers.get(job.action, self.handle_install_error))
+        thread.cancelled.connect(self.check_cancel_complete)
+
+        # Results are collected on the job, the queue reports it through job_finished
+        thread.error_occurred.connect(lambda message: job.errors.append(message))
+        thread.module_uninstalled.connect(lambda module: job.succeeded.append(module))
+        thread.module_not_installed.connect(lambda module: job.not_installed.append(module))
+        return thread
+
+    def on_job_started(self, job):
+        self.progress_bar.setValue(0)
+        self.status_label.setText(f"Running job #{job.id}: {job.action} {', '.join(job.modules)}")
+
+    def on_job_finished(self, job):
+        self.check_outdated()
+        self.update_fingerprint()
+        if job.action == 'install':
+            self.on_install_finished(job)
+        elif job.action == 'uninstall':
+            self.on_uninstall_finished(job)
+        elif job.action == 'update':
+            self.on_update_finished(job)
+        self.re_enable_buttons()
 
-        # Handle successful completion
-        self.install_thread.finished.connect(lambda: self.status_label.setText('Installation completed.'))
+    def update_fingerprint(self, fingerprint=None):
+        if fingerprint is None:
+            fingerprint = environment_fingerprint(self.target_python)
+        if self.fingerprint is not None and fingerprint != self.fingerprint:
+            self.log_output.append(f"Environment fingerprint changed: {short_fingerprint(self.fingerprint)} -> {short_fingerprint(fingerprint)}")
+        self.fingerprint = fingerprint
+        self.fingerprint_label.setText(f"Environment {short_fingerprint(fingerprint)}")
+        self.fingerprint_label.setToolTip(f"Environment fingerprint (installed names, versions and wheel tags):\n{fingerprint}")
+
+    def export_lock_snapshot(self):
+        path, _ = QFileDialog.getSaveFileName(self, 'Export Lock Snapshot', 'environment.lock.json', 'Lock snapshots (*.json)')
+        if not path:
+            return
+        try:
+            snapshot = write_snapshot(path, self.target_python)
+        except OSError as e:
+            QMessageBox.critical(self, 'Export Failed', f"Could not write {path}: {e}")
+            return
+        message = f"Exported {len(snapshot['packages'])} packages, fingerprint {short_fingerprint(snapshot['fingerprint'])}."
+        if snapshot['skipped']:
+            message += f"\n\nInstalled from local paths, cannot be replayed: {', '.join(snapshot['skipped'])}"
+        QMessageBox.information(self, 'Lock Snapshot Exported', message)
+
+    def replay_lock_snapshot(self):
+        path, _ = QFileDialog.getOpenFileName(self, 'Replay Lock Snapshot', '', 'Lock snapshots (*.json)')
+        if not path:
+            return
+        try:
+            snapshot = read_snapshot(path)
+        except (OSError, ValueError) as e:
+            QMessageBox.critical(self, 'Replay Failed', f"Could not read {path}: {e}")
+            return
+        if snapshot['fingerprint'] == self.fingerprint:
+            QMessageBox.information(self, 'Replay Lock Snapshot', 'This environment already matches the snapshot.')
+            return
 
-        # Start the thread
-        self.install_thread.start()
+        requirements = replay_requirements(snapshot, self.target_python)
+        if not requirements:
+            QMessageBox.information(self, 'Replay Lock Snapshot', 'Every package in the snapshot is already installed at its pinned version.')
+            return
+        # Pinned requirements go through the batch engine as one install transaction,
+        # offline it can still be replayed from the local wheelhouse
+        offline = not self.is_internet_available()
+        job = self.job_queue.submit('install', requirements, env=self.target_python, priority=PRIORITY_NORMAL, offline=offline)
+        self.status_label.setText(f"Replaying {len(requirements)} pinned packages as job #{job.id}.")
+
+    def environment_roots(self):
+        settings = QSettings("MyApp", "MainWindow")
+        roots = settings.value("environmentRoots", None)
+        if isinstance(roots, str):
+            roots = [roots]  # QSettings hands back a single-item list as a plain string
+        return roots if roots else default_roots()
+
+    def edit_environment_roots(self):
+        text, ok = QInputDialog.getMultiLineText(self, 'Environment Roots',
+                                                 'Directories searched for virtualenvs and conda environments, one per line:',
+                                                 '\n'.join(self.environment_roots()))
+        if not ok:
+            return
+        roots = [line.strip() for line in text.splitlines() if line.strip()]
+        QSettings("MyApp", "MainWindow").setValue("environmentRoots", roots)
+        self.discover_environments()
+
+    def sync_catalog(self):
+        if self.catalog_thread and self.catalog_thread.isRunning():
+            return
+        self.status_label.setText('Downloading the project list from the package index...')
+        self.catalog_thread = CatalogSyncThread(self)
+        self.catalog_thread.sync_finished.connect(self.on_catalog_synced)
+        self.catalog_thread.error_occurred.connect(self.on_catalog_sync_failed)
+        self.catalog_thread.start()
+
+    def on_catalog_synced(self, added, total):
+        self.status_label.setText(f"Catalog synced: {added} new projects, {total} in total.")
+        if added:
+            self.build_search_index()  # The new names become searchable
+
+    def build_search_index(self):
+        if self.search_thread and self.search_thread.isRunning():
+            self.search_rebuild = True  # Build again once the current build is done
+            return
+        self.search_rebuild = False
+        self.search_thread = SearchIndexThread(self.target_python, self)
+        self.search_thread.index_ready.connect(self.on_search_index_ready)
+        self.search_thread.start()
+
+    def on_search_index_ready(self, index):
+        self.search_index = index
+        if self.search_thread.python != self.target_python:
+            # Built while another environment was selected
+            self.add_installed_to_search(dist.key for dist in get_installed_index(self.target_python).distributions())
+        if self.line_edit.text().strip():
+            self.filter_modules()
+        if self.search_rebuild:
+            QTimer.singleShot(0, self.build_search_index)
+
+    def add_installed_to_search(self, keys):
+        # Installed distributions the catalog does not know are searchable as well
+        if self.search_index is None:
+            return
+        index = get_installed_index(self.target_python)
+        catalog = get_catalog()
+        for key in keys:
+            dist = index.get(key)
+            if dist is not None and not catalog.contains(dist.name):
+                self.search_index.add(dist.name, category=DEFAULT_CATEGORY)
+
+    def on_catalog_sync_failed(self, message):
+        self.status_label.setText(f"Catalog sync failed: {message}")
+
+    def discover_environments(self):
+        if self.discovery_thread and self.discovery_thread.isRunning():
+            return
+        self.discovery_thread = EnvironmentDiscoveryThread(self.environment_roots(), self)
+        self.discovery_thread.environments_found.connect(self.on_environments_found)
+        self.discovery_thread.start()
+
+    def on_environments_found(self, environments):
+        self.environments = {env.python: env for env in environments if not env.is_current}
+        self.env_combo.blockSignals(True)
+        while self.env_combo.count() > 1:
+            self.env_combo.removeItem(1)
+        for env in self.environments.values():
+            self.env_combo.addItem(env.describe(), env.python)
+            self.env_combo.setItemData(self.env_combo.count() - 1, env.prefix, Qt.ToolTipRole)
+        selected = self.env_combo.findData(self.target_python or "")
+        self.env_combo.setCurrentIndex(max(selected, 0))
+        self.env_combo.blockSignals(False)
+        if selected < 0:
+            self.change_environment(None)  # The selected environment is gone
+        self.log_output.append(f"Found {len(self.environments)} other Python environment(s) on this host.")
+
+    def change_environment(self, python):
+        if python == self.target_python and self.switch_thread is None:
+            return
+        # Indexing the environment and asking its interpreter for markers happen off the GUI thread
+        for thread in self.switch_threads:
+            thread.requestInterruption()
+        self.switch_threads = [thread for thread in self.switch_threads if not thread.isFinished()]
+        environment = self.environments.get(python)
+        self.switch_thread = EnvironmentSwitchThread(python, environment.index_paths() if environment else None, self)
+        self.switch_thread.switch_ready.connect(self.on_environment_ready)
+        self.switch_thread.error_occurred.connect(self.on_environment_failed)
+        self.switch_threads.append(self.switch_thread)
+        self.switch_thread.start()
+        self.status_label.setText(f"Switching to {python or sys.executable}...")
+
+    def on_environment_ready(self, python, index, graph, fingerprint):
+        if self.sender() is not self.switch_thread:
+            return  # Another environment was picked meanwhile
+        self.switch_thread = None
+        self.target_python = python
+
+        # The graph registers with the new index before the watcher, as at startup
+        self.dependency_graph = graph
+        self.site_watcher.close()
+        self.site_watcher.deleteLater()
+        self.site_watcher = SiteWatcher(index, self)
+        self.site_watcher.distributions_changed.connect(self.refresh_module_rows)
+        self.add_installed_to_search(dist.key for dist in index.distributions())
+
+        # Every row shows the new environment's versions; update badges come with the next check
+        self.outdated = None
+        self.module_model.refresh()
+        self.fingerprint = None
+        self.update_fingerprint(fingerprint)
+        self.display_dependencies()
+        self.check_outdated()
+        self.show_versions(self.module_list.currentIndex())  # Requires-Python is checked against the new interpreter
+        self.status_label.setText(f"Now targeting {python or sys.executable}.")
+        self.log_output.append(f"Now targeting {python or sys.executable}.")
+
+    def on_environment_failed(self, python, message):
+        if self.sender() is not self.switch_thread:
+            return
+        self.switch_thread = None
+        # Go back to the environment that is still targeted
+        self.env_combo.blockSignals(True)
+        self.env_combo.setCurrentIndex(max(self.env_combo.findData(self.target_python or ""), 0))
+        self.env_combo.blockSignals(False)
+        self.status_label.setText(f"Could not switch to {python or sys.executable}")
+        self.log_output.append(f"Could not switch to {python or sys.executable}: {message}")
+
+    def refresh_queue_panel(self):
+        selected = self.selected_job_id()
+        self.queue_list.clear()
+        for job in self.job_queue.jobs()[:50]:
+            item = QListWidgetItem(job.describe())
+            item.setData(Qt.UserRole, job.id)
+            self.queue_list.addItem(item)
+            if job.id == selected:
+                item.setSelected(True)
+        self.resume_jobs_button.setEnabled(any(job.held for job in self.job_queue.pending))
+
+    def selected_job_id(self):
+        items = self.queue_list.selectedItems()
+        return items[0].data(Qt.UserRole) if items else None
+
+    def cancel_selected_job(self):
+        job_id = self.selected_job_id()
+        if job_id is None:
+            QMessageBox.warning(self, 'Warning', 'No job selected in the queue.')
+            return
+        job = self.job_queue.find(job_id)
+        if job is None or job.state not in ('queued', 'running'):
+            self.status_label.setText(f"Job #{job_id} is no longer queued.")
+            return
+        if job.state == 'running':
+            self.show_cancel_message()
+        self.job_queue.cancel(job_id)
+        self.refresh_queue_panel()
+
+    def prioritize_selected_job(self):
+        job_id = self.selected_job_id()
+        if job_id is None or not self.job_queue.set_priority(job_id, PRIORITY_HIGH):
+            self.status_label.setText('Only queued jobs can be prioritized.')
 
     def update_progress_bar(self, progress):
         # Update the progress bar based on the emitted progress (can be % or download size)
         if isinstance(progress, str):
             self.progress_bar.setFormat(progress)  # Set the text format for MB downloaded
         else:
-            self.progress_bar.setValue(progress)  # 
+            self.progress_bar.setValue(int(progress))
+
+    def update_progress_details(self, snapshot):
+        """Show bytes downloaded, throughput and ETA for the running job."""
+        if not snapshot['bytes_total']:
+            self.download_size_label.setText("Progress bar:")
+            return
+        text = (f"Downloaded {format_bytes(snapshot['bytes_done'])} of {format_bytes(snapshot['bytes_total'])}"
+                f"  ({format_bytes(snapshot['rate'])}/s")
+        if snapshot['eta'] is not None and snapshot['bytes_done'] < snapshot['bytes_total']:
+            text += f", {int(snapshot['eta'])}s left"
+        text += ")"
+        files = snapshot['files']
+        if files:
+            text += "  " + ", ".join(f"{f['name']} {format_bytes(f['rate'])}/s" for f in files[:3])
+        self.download_size_label.setText(text)
             
    
     def cancel_installation(self):
-        if self.install_thread and self.install_thread.isRunning():
-            # Set the flag to indicate cancellation is requested
-            self.cancel_requested = True
-            
-            # Show a message box without buttons to alert the user
-            self.cancel_message = QMessageBox(self)
-            self.cancel_message.setWindowTitle("Cancelling Installation")
-            self.cancel_message.setText("Cancelling the installation process. Please wait...")
-            self.cancel_message.setStandardButtons(QMessageBox.NoButton)  # No buttons in the message box
-            self.cancel_message.setIcon(QMessageBox.Information)
-            self.cancel_message.show()
+        if self.job_queue.is_busy():
+            self.show_cancel_message()
 
-            # Request cancellation of the thread
-            self.install_thread.requestInterruption()
+            # Request cancellation of the running jobs, each reports back through its cancelled signal
+            self.job_queue.cancel_running()
             self.status_label.setText("Cancelling...")
-
-            # Start checking for thread completion
-            QTimer.singleShot(200, self.check_cancel_complete)  # Poll every 200ms
         else:
             QMessageBox.critical(self, "Warning", "No installation to canel")
             self.status_label.setText('No installation to cancel')
 
-    def on_install_finished(self):
-        self.re_enable_buttons()
+    def show_cancel_message(self):
+        # Set the flag to indicate cancellation is requested
+        self.cancel_requested = True
 
-        # Close the cancel message if it's open
-        if hasattr(self, 'cancel_message') and self.cancel_message:
+        # Show a message box without buttons to alert the user
+        self.cancel_message = QMessageBox(self)
+        self.cancel_message.setWindowTitle("Cancelling Installation")
+        self.cancel_message.setText("Cancelling the installation process. Please wait...")
+        self.cancel_message.setStandardButtons(QMessageBox.NoButton)  # No buttons in the message box
+        self.cancel_message.setIcon(QMessageBox.Information)
+        self.cancel_message.show()
+
+    def on_install_finished(self, job):
+        cancelled = job.state == 'cancelled'
+
+        # Close the cancel message if it's open, after a cancellation check_cancel_complete handles it
+        if hasattr(self, 'cancel_message') and self.cancel_message and not cancelled:
             self.cancel_message.close()
 
+        self.status_label.setText('Installation cancelled.' if cancelled else 'Installation completed.')
+
         if not hasattr(self, '_installation_complete_shown'):
             self._installation_complete_shown = False
             self.progress_bar.setValue(0)
 
-        if self.install_thread:
-            if not self.install_thread.error_occurred_flag and not self.cancel_requested:
-                self.progress_bar.setValue(100)
-                if not self._installation_complete_shown:
-                    self._installation_complete_shown = True
-                    QMessageBox.information(self, 'Installation Complete', 'Installation has completed.')
-            elif self.cancel_requested:
-                
+        if not job.errors and not cancelled:
+            self.progress_bar.setValue(100)
+            if not self._installation_complete_shown:
+                self._installation_complete_shown = True
+                QMessageBox.information(self, 'Installation Complete', 'Installation has completed.')
+        elif cancelled:
             # Reset the cancel_requested flag for future operations
-                self.cancel_requested = False
-
-            # Clean up the thread
-            if self.install_thread.isRunning():
-                self.install_thread.quit()
-                self.install_thread.wait()
-            
-            self.install_thread = None
+            self.cancel_requested = False
 
         self._installation_complete_shown = False
 
-    def check_cancel_complete(self):
-        if not self.install_thread or not self.install_thread.isRunning():
-            # If the thread is no longer running, update the cancel message
-            if hasattr(self, 'cancel_message') and self.cancel_message:
-                self.cancel_message.setText("Cancellation completed.")
-                self.cancel_message.setStandardButtons(QMessageBox.Ok)  # Add "OK" button
-                self.cancel_message.setIcon(QMessageBox.Information)
-                self.status_label.setText("Installation cancelled.")
-                
-                # Optionally, remove the message box after a few seconds
-                QTimer.singleShot(3000, self.cancel_message.close)  # Close the message box after 3 seconds
+    def check_cancel_complete(self, seconds):
+        # Called by InstallThread.cancelled once every process of the job is gone
+        if hasattr(self, 'cancel_message') and self.cancel_message:
+            self.cancel_message.setText(f"Cancellation completed in {seconds:.1f} s.")
+            self.cancel_message.setStandardButtons(QMessageBox.Ok)  # Add "OK" button
+            self.cancel_message.setIcon(QMessageBox.Information)
+
+            # Optionally, remove the message box after a few seconds
+            QTimer.singleShot(3000, self.cancel_message.close)  # Close the message box after 3 seconds
+        self.log_output.append(f"Installation cancelled, all pip processes stopped in {seconds:.2f} s.")
 
-        else:
-            # Continue checking
-            QTimer.singleShot(200, self.check_cancel_complete)  # Poll every 200ms
 
-       
-    def closeEvent(self, event):
-        if self.install_thread and self.install_thread.isRunning():
-            self.install_thread.isInterruptionRequested()
-            self.install_thread.wait()
-        event.accept()
-    
             
     def handle_install_error(self, error_message):
         if error_message:
@@ -1199,31 +2248,15 @@ class MainWindow(QMainWindow):
         self.install_button.setDisabled(False)
         self.uninstall_button.setDisabled(False)
         self.update_button.setDisabled(False)
-        
-        if not hasattr(self, '__warning_messagebox'):
-            self.__warning_messagebox = False
-        
-        if self.install_thread and self.install_thread.isRunning():
-            if not self.__warning_messagebox or not self.__warning_messagebox.isVisible():
-                self.__warning_messagebox =  QMessageBox.warning(self, 'Warning', 'Another operation is still running. Please wait.')
-                
-            return
-        
-        self.__warning_messagebox = False
     
     def is_module_installed(self, module_name):
-        try:
-            import pkg_resources
-            pkg_resources.get_distribution(module_name)
-            return True
-        except pkg_resources.DistributionNotFound:
-            return False
+        return get_installed_index(self.target_python).is_installed(module_name)
         
 #################################################################################################################### 
                             # UPDATE MODULES FUNC.
         
     def update_modules(self):
-        selected_modules = [self.module_list.item(i).text() for i in range(self.module_list.count()) if self.module_list.item(i).isSelected()]
+        selected_modules = self.selected_module_names()
         update_action = 'update'
         if not selected_modules:
             QMessageBox.warning(self, 'Warning', 'No modules selected for update.')
@@ -1233,20 +2266,30 @@ class MainWindow(QMainWindow):
         if not self.is_internet_available():
             QMessageBox.critical(self, 'No Internet', 'No internet connection detected. Please check your connection and try again.')
             self.status_label.setText('Installation failed: No internet connection')
-            
-            
-        self.update_thread = InstallThread(selected_modules, update_action)
-        self.update_thread.progress.connect(self.update_progress_bar)
-        self.update_thread.finished.connect(self.on_update_finished)
-    
-        self.update_thread.status_message.connect(self.show_status_message)
-        self.update_thread.conflict_message.connect(self.show_conflict_message)
-        self.update_thread.error_occurred.connect(self.handle_update_error)
-        self.update_thread.finished.connect(lambda: self.status_label.setText('Update completed.'))
-        self.update_thread.start()
+            return
+
+        # Installed modules that are known to be current would only cost pip a resolve
+        if self.outdated is not None:
+            up_to_date = [module for module in selected_modules
+                          if self.is_module_installed(module) and not self.outdated.is_outdated(canonicalize_name(module.strip()))]
+            if up_to_date:
+                QMessageBox.information(self, 'Information', f'Modules already up to date: {", ".join(up_to_date)}')
+            selected_modules = [module for module in selected_modules if module not in up_to_date]
+            if not selected_modules:
+                self.status_label.setText('All selected modules are up to date.')
+                return
+
+        # Updates are the least urgent, queued installs and uninstalls for the same environment go first
+        job = self.job_queue.submit(update_action, selected_modules, env=self.target_python, priority=PRIORITY_LOW)
+        self.status_label.setText(f"Update queued as job #{job.id}.")
          
         
-    def on_update_finished(self):
+    def on_update_finished(self, job):
+        if job.state == 'cancelled':
+            self.status_label.setText('Update cancelled.')
+            return
+        self.status_label.setText('Update completed.')
+
         if not hasattr(self, '_update_complete_shown'):
             self._update_complete_shown = False
 
@@ -1269,8 +2312,83 @@ class MainWindow(QMainWindow):
     def change_version(self, version):
         # This method is triggered when a version is selected from the combobox
         selected_version = version.strip()  # Get the selected version
-        if selected_version:
-            self.selected_version = selected_version
+        self.selected_version = selected_version or None  # None installs the latest release
+
+    def visible_module_names(self):
+        """Names of the rows currently on screen."""
+        viewport = self.module_list.viewport()
+        first = self.module_list.indexAt(QPoint(1, 1)).row()
+        last = self.module_list.indexAt(QPoint(1, viewport.height() - 2)).row()
+        if first < 0:
+            return []
+        if last < 0:
+            last = self.module_proxy.rowCount() - 1
+        # Filtered out rows are not in the proxy at all
+        return [self.module_proxy.index(row, 0).data().strip() for row in range(first, last + 1)]
+
+    def prefetch_visible_versions(self):
+        if self.prefetch_thread and self.prefetch_thread.isRunning():
+            self.prefetch_timer.start()  # Try again once the running prefetch is done
+            return
+        catalog = get_release_catalog()
+        names = [name for name in self.visible_module_names() if name and catalog.cached(name) is None]
+        if not names:
+            return
+        self.prefetch_thread = VersionPrefetchThread(names, self)
+        self.prefetch_thread.versions_ready.connect(self.on_versions_ready)
+        self.prefetch_thread.start()
+
+    def on_versions_ready(self, names):
+        if self.version_module and canonicalize_name(self.version_module) in {canonicalize_name(n) for n in names}:
+            self.populate_versions(self.version_module)
+
+    def show_versions(self, current, previous=None):
+        if not current.isValid():
+            return
+        module_name = current.data().strip()
+        if module_name != self.version_module:
+            self.version_module = module_name
+            self.selected_version = None
+        if get_release_catalog().cached(module_name) is not None:
+            self.populate_versions(module_name)
+            return
+        self.version_combo.blockSignals(True)
+        self.version_combo.clear()
+        self.version_combo.addItem("Loading versions...", "")
+        self.version_combo.blockSignals(False)
+        if not (self.prefetch_thread and self.prefetch_thread.isRunning()):
+            self.prefetch_thread = VersionPrefetchThread([module_name], self)
+            self.prefetch_thread.versions_ready.connect(self.on_versions_ready)
+            self.prefetch_thread.start()
+        else:
+            self.prefetch_timer.start()
+
+    def populate_versions(self, module_name):
+        releases = get_release_catalog().cached(module_name) or []
+        python_version = python_version_of(self.target_python)
+        self.version_combo.blockSignals(True)
+        self.version_combo.clear()
+        self.version_combo.addItem("Latest version", "")
+        for release in releases:
+            label = release.version
+            if release.yanked:
+                label += f" (yanked{': ' + release.yanked_reason if release.yanked_reason else ''})"
+            supported = release.supports(python_version)
+            if not supported:
+                label += f" (requires Python {release.requires_python})"
+            self.version_combo.addItem(label, release.version)
+            if not supported:
+                # A release pip would refuse for this interpreter cannot be picked
+                self.version_combo.model().item(self.version_combo.count() - 1).setEnabled(False)
+        index = self.version_combo.findData(self.selected_version or "")
+        self.version_combo.setCurrentIndex(max(index, 0))
+        self.version_combo.blockSignals(False)
+
+    def pinned_requirement(self, module):
+        """'module==version' when a version was picked for this module, otherwise module unchanged."""
+        if self.selected_version and module.strip() == self.version_module:
+            return f"{module.strip()}=={self.selected_version}"
+        return module
           
         
     # The following  Function is for Qmessagebox
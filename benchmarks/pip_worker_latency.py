@@ -0,0 +1,63 @@
+"""
+Per-module latency of installed-state queries: one `python -m pip show`
+subprocess per module (the old InstallThread.is_module_installed) against the
+long-lived pip worker.
+
+    python benchmarks/pip_worker_latency.py [module ...]
+
+Without arguments the first 20 installed distributions are queried.
+"""
+
+import importlib.metadata
+import subprocess
+import statistics
+import time
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pip_worker import PipWorker
+
+
+def subprocess_show(module):
+    result = subprocess.run([sys.executable, '-m', 'pip', 'show', module],
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    return result.returncode == 0 and 'Name:' in result.stdout
+
+
+def measure(func, modules):
+    timings = []
+    for module in modules:
+        start = time.perf_counter()
+        func(module)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(label, timings):
+    print(f"{label:<28} mean {statistics.mean(timings):8.2f} ms   "
+          f"median {statistics.median(timings):8.2f} ms   max {max(timings):8.2f} ms")
+
+
+def main(modules):
+    if not modules:
+        names = sorted({dist.metadata['Name'] for dist in importlib.metadata.distributions()
+                        if dist.metadata['Name']})
+        modules = names[:20]
+    print(f"Querying {len(modules)} module(s) with {sys.executable}\n")
+
+    report('pip show subprocess', measure(subprocess_show, modules))
+
+    worker = PipWorker()
+    start = time.perf_counter()
+    worker.request('ping')
+    print(f"{'worker startup (once)':<28} {(time.perf_counter() - start) * 1000:8.2f} ms")
+    try:
+        report('pip worker', measure(worker.is_installed, modules))
+    finally:
+        worker.close()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,86 @@
+"""
+Per-keystroke latency of the module search: a linear substring scan over
+every name (the old filter_modules) against the prefix / trigram search
+index, on a synthetic catalog the size of the full package index.
+
+    python benchmarks/search_latency.py [entries]
+
+Each query is typed one character at a time and every prefix of it is
+searched, as the search box does.
+"""
+
+import statistics
+import random
+import time
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from packaging.utils import canonicalize_name
+from search_index import SearchIndex
+
+
+QUERIES = ['numpy', 'pandas', 'django-rest', 'py', 'requests', 'scikit', 'sql', 'flask_', 'tensor', 'zzzq', 'qt', 'x']
+TYPOS = ['pandsa', 'sci-kit', 'reqeusts', 'djnago', 'tensorflwo', 'numpi', 'flsak']
+SYLLABLES = ['py', 'num', 'pan', 'das', 'req', 'sci', 'kit', 'learn', 'flask', 'django', 'rest', 'sql', 'alchemy',
+             'tensor', 'flow', 'torch', 'qt', 'gui', 'web', 'async', 'io', 'http', 'lib', 'core', 'utils', 'tools',
+             'data', 'cli', 'json', 'yaml', 'test', 'mock', 'aws', 'cloud', 'auth', 'db', 'ml', 'plot', 'viz', 'x']
+
+
+def synthetic_names(count, seed=7):
+    rng = random.Random(seed)
+    names = {canonicalize_name(name): name for name in ['numpy', 'pandas', 'requests', 'django', 'flask',
+                                                        'scikit-learn', 'sqlalchemy', 'tensorflow']}
+    while len(names) < count:
+        parts = [rng.choice(SYLLABLES) for _ in range(rng.randint(1, 4))]
+        separator = rng.choice(['', '-', '_', '.'])
+        name = separator.join(parts) + (str(rng.randint(0, 999)) if rng.random() < 0.3 else '')
+        names.setdefault(canonicalize_name(name), name)  # 'a-b' and 'a_b' are the same project
+    return sorted(names.values())
+
+
+def linear_search(names, query):
+    query = query.lower()
+    return [name for name in names if query in name.lower()]
+
+
+def keystrokes(queries):
+    for query in queries:
+        for length in range(1, len(query) + 1):
+            yield query[:length]
+
+
+def measure(func, queries):
+    timings = []
+    for query in keystrokes(queries):
+        start = time.perf_counter()
+        func(query)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def report(label, timings):
+    print(f"{label:<28} mean {statistics.mean(timings):8.3f} ms   "
+          f"median {statistics.median(timings):8.3f} ms   max {max(timings):8.3f} ms")
+
+
+def main(count):
+    names = synthetic_names(count)
+    rng = random.Random(11)
+    # A long tail: most names have no popularity at all, like the index listing next to the curated catalog
+    entries = [(name, rng.paretovariate(1.2) if rng.random() < 0.05 else 0.0, None) for name in names]
+
+    start = time.perf_counter()
+    index = SearchIndex(entries)
+    del entries  # As in the app, where only the index outlives the build
+    print(f"Indexed {len(index)} names in {time.perf_counter() - start:.2f} s\n")
+
+    report('linear substring scan', measure(lambda query: linear_search(names, query), QUERIES))
+    report('search index (top 50)', measure(lambda query: index.search(query, 50), QUERIES))
+    report('search index (top 500)', measure(lambda query: index.search(query, 500), QUERIES))
+    report('typos, index (top 50)', measure(lambda query: index.search(query, 50), TYPOS))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500000)
@@ -0,0 +1,248 @@
+"""
+On-disk module catalog.
+
+The curated catalog (category, popularity, docs link and related packages of
+a few hundred modules) used to be four dict literals in package.py that
+every window imported at startup. It now lives in a SQLite database keyed
+by normalized name, next to any number of plain project names imported from
+the package index. Nothing is read until the first lookup; single lookups
+are primary-key reads behind a small LRU, and the bulk accessors read one
+column at a time, so the full index (500k+ names) costs disk space, not
+memory. The curated rows are seeded from package.py, and seeded again when
+that file changes.
+"""
+
+from packaging.utils import canonicalize_name
+from functools import lru_cache
+import threading
+import sqlite3
+import runpy
+import os
+
+
+DEFAULT_CATEGORY = 'Others'
+LOOKUP_CACHE_SIZE = 4096
+BATCH_SIZE = 500  # names per `IN (...)` query, below SQLite's variable limit
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS categories (id INTEGER PRIMARY KEY, name TEXT UNIQUE NOT NULL);
+CREATE TABLE IF NOT EXISTS projects (
+    id INTEGER PRIMARY KEY,
+    key TEXT UNIQUE NOT NULL,
+    name TEXT NOT NULL,
+    category_id INTEGER REFERENCES categories(id),
+    popularity REAL NOT NULL DEFAULT 0,
+    docs TEXT,
+    curated INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS projects_curated ON projects(curated, id);
+CREATE INDEX IF NOT EXISTS projects_popularity ON projects(popularity DESC);
+CREATE TABLE IF NOT EXISTS related (key TEXT NOT NULL, related TEXT NOT NULL, position INTEGER NOT NULL);
+CREATE INDEX IF NOT EXISTS related_key ON related(key, position);
+"""
+
+COLUMNS = {
+    'name': 'p.name',
+    'category': f"COALESCE(c.name, '{DEFAULT_CATEGORY}')",
+    'popularity': 'p.popularity',
+    'docs': 'p.docs',
+}
+
+
+def default_catalog_path():
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'PythonModuleInstaller', 'catalog.sqlite3')
+
+
+def default_seed_path():
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), 'package.py')
+
+
+class Catalog:
+    def __init__(self, path=None, seed_path=None):
+        self.path = path or default_catalog_path()
+        self.seed_path = seed_path if seed_path is not None else default_seed_path()
+        self._local = threading.local()  # one connection per thread
+        self._write_lock = threading.Lock()
+        self._ready = False
+        self._ready_lock = threading.Lock()
+        self._lookup = lru_cache(maxsize=LOOKUP_CACHE_SIZE)(self._read_row)
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path)
+            connection.execute('PRAGMA journal_mode=WAL')
+            self._local.connection = connection
+        return connection
+
+    def _ensure_ready(self):
+        if self._ready:
+            return
+        with self._ready_lock:
+            if self._ready:
+                return
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            connection = self._connection()
+            connection.executescript(SCHEMA)
+            if self.seed_path and self._meta('seed') != self._seed_signature():
+                self._seed()
+            self._ready = True
+
+    def _meta(self, key):
+        row = self._connection().execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def _seed_signature(self):
+        try:
+            stat = os.stat(self.seed_path)
+        except OSError:
+            return None
+        return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+    def _seed(self):
+        """Load the curated entries from package.py. It is only read here, never imported at startup."""
+        signature = self._seed_signature()
+        if signature is None:
+            return
+        namespace = runpy.run_path(self.seed_path)
+        categories = namespace.get('MODULE_CATEGORIES', {})
+        popularity = namespace.get('MODULE_POPULARITY', {})
+        docs = namespace.get('MODULE_DOCS', {})
+        related = namespace.get('MODULE_DEPENDENCIES', {})
+
+        # Curated names keep the order they have in package.py. Spellings of the same
+        # name ('PyAudio' / 'pyaudio') become one entry, the first value of each field wins
+        entries = {}
+        for name in list(categories) + list(popularity) + list(docs) + list(related):
+            entry = entries.setdefault(canonicalize_name(name.strip()), {'name': name.strip()})
+            for field, source in (('category', categories), ('popularity', popularity), ('docs', docs)):
+                if entry.get(field) is None and source.get(name) is not None:
+                    entry[field] = source[name]
+        with self._write_lock:
+            connection = self._connection()
+            with connection:
+                connection.execute('UPDATE projects SET curated = 0')
+                connection.execute('DELETE FROM related')
+                category_ids = {}
+                for category in dict.fromkeys(categories.values()):
+                    connection.execute('INSERT OR IGNORE INTO categories(name) VALUES (?)', (category,))
+                    category_ids[category] = connection.execute(
+                        'SELECT id FROM categories WHERE name = ?', (category,)).fetchone()[0]
+                for key, entry in entries.items():
+                    # The module list shows the categorized names; the rest only lend their data
+                    values = (key, entry['name'], category_ids.get(entry.get('category')),
+                              float(entry.get('popularity') or 0), entry.get('docs'), int('category' in entry))
+                    # A name already imported from the index takes the curated data
+                    connection.execute(
+                        'INSERT INTO projects(key, name, category_id, popularity, docs, curated) VALUES (?, ?, ?, ?, ?, ?) '
+                        'ON CONFLICT(key) DO UPDATE SET name = excluded.name, category_id = excluded.category_id, '
+                        'popularity = excluded.popularity, docs = excluded.docs, curated = excluded.curated', values)
+                for name, others in related.items():
+                    connection.executemany('INSERT INTO related(key, related, position) VALUES (?, ?, ?)',
+                                           [(canonicalize_name(name.strip()), other.strip(), position)
+                                            for position, other in enumerate(others) if other.strip()])
+                connection.execute('INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)', ('seed', signature))
+        self._lookup.cache_clear()
+
+    def add_projects(self, names):
+        """Add plain project names (e.g. the index's full listing). Curated entries are left alone."""
+        self._ensure_ready()
+        rows = ((canonicalize_name(name.strip()), name.strip()) for name in names if name.strip())
+        with self._write_lock:
+            connection = self._connection()
+            with connection:
+                before = connection.total_changes
+                connection.executemany('INSERT OR IGNORE INTO projects(key, name) VALUES (?, ?)', rows)
+                added = connection.total_changes - before
+        return added
+
+    def _read_row(self, key):
+        return self._connection().execute(
+            f"SELECT {COLUMNS['name']}, {COLUMNS['category']}, {COLUMNS['popularity']}, {COLUMNS['docs']} "
+            'FROM projects p LEFT JOIN categories c ON c.id = p.category_id WHERE p.key = ?', (key,)).fetchone()
+
+    def _row(self, name):
+        self._ensure_ready()
+        return self._lookup(canonicalize_name(str(name).strip()))
+
+    def contains(self, name):
+        return self._row(name) is not None
+
+    def category(self, name):
+        row = self._row(name)
+        return row[1] if row else DEFAULT_CATEGORY
+
+    def popularity(self, name):
+        row = self._row(name)
+        return row[2] if row else 0
+
+    def docs(self, name):
+        row = self._row(name)
+        return row[3] if row else None
+
+    def related(self, name):
+        """The curated related packages (formerly MODULE_DEPENDENCIES)."""
+        self._ensure_ready()
+        rows = self._connection().execute('SELECT related FROM related WHERE key = ? ORDER BY position',
+                                          (canonicalize_name(str(name).strip()),))
+        return [row[0] for row in rows]
+
+    def names(self, curated_only=False):
+        """Project names in catalog order: curated ones in package.py order, then imported ones."""
+        return [name for name, _ in self.iter_column('name', curated_only)]
+
+    def iter_column(self, column, curated_only=False):
+        """(name, value) for every project in catalog order, read one column at a time."""
+        return self.iter_columns(column, curated_only=curated_only)
+
+    def iter_columns(self, *columns, curated_only=False):
+        """(name, value, ...) for every project in catalog order with only the given columns."""
+        self._ensure_ready()
+        expressions = ', '.join(COLUMNS[column] for column in columns)
+        # One walk of the (curated, id) index per group instead of a sort over the whole table
+        for curated in ((1,) if curated_only else (1, 0)):
+            yield from self._connection().execute(
+                f"SELECT p.name, {expressions} FROM projects p LEFT JOIN categories c ON c.id = p.category_id "
+                'WHERE p.curated = ? ORDER BY p.id', (curated,))
+
+    def column(self, column, names):
+        """{name: value} of one column for the given names; names not in the catalog are left out."""
+        self._ensure_ready()
+        expression = COLUMNS[column]
+        by_key = {}
+        for name in names:
+            by_key.setdefault(canonicalize_name(str(name).strip()), []).append(name)
+        keys = list(by_key)
+        values = {}
+        for start in range(0, len(keys), BATCH_SIZE):
+            batch = keys[start:start + BATCH_SIZE]
+            rows = self._connection().execute(
+                f"SELECT p.key, {expression} FROM projects p LEFT JOIN categories c ON c.id = p.category_id "
+                f"WHERE p.key IN ({', '.join('?' * len(batch))})", batch)
+            for key, value in rows:
+                for name in by_key[key]:
+                    values[name] = value
+        return values
+
+    def categories(self):
+        self._ensure_ready()
+        return [row[0] for row in self._connection().execute('SELECT name FROM categories ORDER BY id')]
+
+    def __len__(self):
+        self._ensure_ready()
+        return self._connection().execute('SELECT COUNT(*) FROM projects').fetchone()[0]
+
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_catalog():
+    """The app-wide catalog, opened on first use."""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = Catalog()
+        return _catalog
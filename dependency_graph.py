@@ -0,0 +1,212 @@
+"""
+Dependency graph of the installed distributions.
+
+Edges come from each distribution's `Requires-Dist` metadata. Environment
+markers are evaluated for the environment's interpreter, and requirements that
+only apply to extras are left out, so the graph shows what is actually
+needed here. Forward (requires) and reverse (required by) adjacency are
+both kept, so direct and transitive queries in either direction are a
+walk over sets. The graph listens to the installed index and re-reads only
+the distributions that changed.
+"""
+
+from packaging.requirements import Requirement, InvalidRequirement
+from packaging.markers import UndefinedEnvironmentName
+from packaging.utils import canonicalize_name
+from importlib.metadata import PathDistribution
+from installed_index import get_installed_index
+from collections import deque
+import subprocess
+import threading
+import pathlib
+import json
+import sys
+import os
+
+
+def read_requires_dist(dist):
+    """Raw Requires-Dist strings of an InstalledDistribution, reading only the metadata headers."""
+    if dist.path.endswith('.egg-info'):
+        return PathDistribution(pathlib.Path(dist.path)).requires or []
+
+    requires = []
+    try:
+        with open(os.path.join(dist.path, 'METADATA'), encoding='utf-8', errors='replace') as metadata:
+            for line in metadata:
+                if not line.strip():
+                    break  # end of the headers, the rest is the long description
+                if line[:14].lower() == 'requires-dist:':
+                    requires.append(line[14:].strip())
+    except OSError:
+        pass
+    return requires
+
+
+def active_requirements(requires, environment=None):
+    """Normalized names of the requirements that apply without extras in this environment."""
+    names = set()
+    for text in requires:
+        try:
+            requirement = Requirement(text)
+        except InvalidRequirement:
+            continue
+        if requirement.marker is not None:
+            try:
+                if not requirement.marker.evaluate({**(environment or {}), 'extra': ''}):
+                    continue
+            except UndefinedEnvironmentName:
+                continue
+        names.add(canonicalize_name(requirement.name))
+    return names
+
+
+class DependencyGraph:
+    def __init__(self, index, environment=None):
+        self.index = index
+        self.environment = environment  # marker environment overrides, None for this interpreter
+        self.forward = {}  # name -> names it requires
+        self.reverse = {}  # name -> names that require it
+        self._built = False
+        self._lock = threading.RLock()
+        index.add_listener(self.update)
+
+    def _ensure_built(self):
+        if self._built:
+            return
+        with self._lock:
+            if self._built:
+                return
+            for dist in self.index.distributions():
+                self._set_edges(dist.key, active_requirements(read_requires_dist(dist), self.environment))
+            self._built = True
+
+    def _set_edges(self, key, requires):
+        for old in self.forward.pop(key, set()):
+            dependents = self.reverse.get(old)
+            if dependents is not None:
+                dependents.discard(key)
+        if requires:
+            self.forward[key] = requires
+            for name in requires:
+                self.reverse.setdefault(name, set()).add(key)
+
+    def update(self, keys):
+        """Re-read the edges of the given distributions (installed, upgraded or removed)."""
+        with self._lock:
+            if not self._built:
+                return  # built from scratch on the next query anyway
+            for key in keys:
+                dist = self.index.get(key)
+                requires = active_requirements(read_requires_dist(dist), self.environment) if dist else set()
+                self._set_edges(key, requires)
+
+    def dependencies(self, name):
+        self._ensure_built()
+        with self._lock:
+            return sorted(self.forward.get(canonicalize_name(name.strip()), ()))
+
+    def dependents(self, name):
+        """Installed distributions that directly require name."""
+        self._ensure_built()
+        with self._lock:
+            return sorted(self.reverse.get(canonicalize_name(name.strip()), ()))
+
+    def _walk(self, starts, adjacency):
+        """Everything reachable from the start names, not counting the starts themselves."""
+        starts = set(starts)
+        seen = set()
+        queue = deque(starts)
+        while queue:
+            for neighbour in adjacency.get(queue.popleft(), ()):
+                if neighbour not in seen and neighbour not in starts:
+                    seen.add(neighbour)
+                    queue.append(neighbour)
+        return seen
+
+    def transitive_dependencies(self, name):
+        self._ensure_built()
+        with self._lock:
+            return sorted(self._walk([canonicalize_name(name.strip())], self.forward))
+
+    def transitive_dependents(self, name):
+        """Everything that would break, directly or not, if name were removed."""
+        self._ensure_built()
+        with self._lock:
+            return sorted(self._walk([canonicalize_name(name.strip())], self.reverse))
+
+    def removal_impact(self, names):
+        """What removing names together would leave with unmet requirements. Returns a RemovalImpact."""
+        self._ensure_built()
+        removed = {canonicalize_name(name.strip()) for name in names if name.strip()}
+        broken = {}
+        with self._lock:
+            for name in removed:
+                for dependent in self.reverse.get(name, ()):
+                    if dependent not in removed:
+                        broken.setdefault(dependent, []).append(name)
+            # Packages that only need a removed one through a broken package keep their own
+            # requirements met but will not import either; they are reported separately
+            indirect = self._walk(broken, self.reverse) - removed
+        return RemovalImpact({key: sorted(missing) for key, missing in broken.items()}, indirect)
+
+
+class RemovalImpact:
+    def __init__(self, broken, indirect):
+        self.broken = broken  # installed name -> removed names it requires
+        self.indirect = sorted(indirect)  # names that depend on a broken package
+
+    def __bool__(self):
+        return bool(self.broken)
+
+    def describe(self):
+        lines = [f"{name} requires {', '.join(missing)}" for name, missing in sorted(self.broken.items())]
+        if self.indirect:
+            lines.append(f"Also affected through those: {', '.join(self.indirect)}")
+        return '\n'.join(lines)
+
+
+MARKER_ENVIRONMENT_SCRIPT = """
+import json, os, platform, sys
+implementation = sys.implementation
+iver = '{0.major}.{0.minor}.{0.micro}'.format(implementation.version)
+if implementation.version.releaselevel != 'final':
+    iver += implementation.version.releaselevel[0] + str(implementation.version.serial)
+print(json.dumps({
+    'implementation_name': implementation.name,
+    'implementation_version': iver,
+    'os_name': os.name,
+    'platform_machine': platform.machine(),
+    'platform_release': platform.release(),
+    'platform_system': platform.system(),
+    'platform_version': platform.version(),
+    'python_full_version': platform.python_version(),
+    'platform_python_implementation': platform.python_implementation(),
+    'python_version': '.'.join(platform.python_version_tuple()[:2]),
+    'sys_platform': sys.platform,
+}))
+"""
+
+
+def marker_environment(python=None):
+    """Marker variables of another interpreter; None for this one (packaging's defaults apply)."""
+    python = python or sys.executable
+    if os.path.abspath(python) == os.path.abspath(sys.executable):
+        return None
+    try:
+        return json.loads(subprocess.check_output([python, '-c', MARKER_ENVIRONMENT_SCRIPT], text=True, timeout=30))
+    except (OSError, subprocess.SubprocessError, ValueError):
+        return None
+
+
+_graphs = {}
+_graphs_lock = threading.Lock()
+
+
+def get_dependency_graph(python=None):
+    """The shared graph for an interpreter's environment, built on the first query."""
+    python = python or sys.executable
+    with _graphs_lock:
+        graph = _graphs.get(python)
+        if graph is None:
+            graph = _graphs[python] = DependencyGraph(get_installed_index(python), marker_environment(python))
+        return graph
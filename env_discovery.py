@@ -0,0 +1,296 @@
+"""
+Discovery of the Python interpreters and environments on this host.
+
+System interpreters come from PATH. Virtualenvs (a `pyvenv.cfg`) and conda
+prefixes (a `conda-meta` directory) are found by walking the configured
+roots with a pool of threads, one directory listing per task. The walk is
+pruned: it never descends into an environment it found (apart from a conda
+base's `envs`), into hidden, VCS or dependency directories, or deeper than
+MAX_DEPTH. Each directory's result is cached with its mtime, and an
+unchanged directory is not listed again on the next run. Every environment
+found gets an installed index, built in parallel, so the main window can
+switch to it without waiting.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from installed_index import get_installed_index
+import threading
+import glob
+import json
+import sys
+import os
+import re
+
+
+KIND_SYSTEM = 'system'
+KIND_VENV = 'venv'
+KIND_CONDA = 'conda'
+
+MAX_DEPTH = 4
+MAX_WORKERS = 8
+PRUNED_NAMES = {'node_modules', '__pycache__', 'site-packages', 'dist-packages', 'Library'}
+HIDDEN_ALLOWED = {'.venv', '.tox', '.nox', '.virtualenvs', '.pyenv', '.conda'}
+PYTHON_NAME_RE = re.compile(r'^python(\d+(\.\d+)?)?(\.exe)?$')
+
+
+def default_roots():
+    """Where environments usually live: the home directory, /opt and the well-known tool directories."""
+    home = os.path.expanduser('~')
+    candidates = [home, os.path.join(home, '.virtualenvs'), os.path.join(home, '.pyenv', 'versions'),
+                  os.path.join(home, '.conda', 'envs'), os.path.join(home, '.local', 'share', 'virtualenvs'),
+                  '/opt']
+    return [path for path in candidates if os.path.isdir(path)]
+
+
+def default_cache_path():
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'PythonModuleInstaller', 'environments.json')
+
+
+class Environment:
+    def __init__(self, kind, prefix, python, version='', site_packages=None, isolated=True):
+        self.kind = kind
+        self.prefix = prefix
+        self.python = python
+        self.version = version
+        self.site_packages = site_packages or []
+        self.isolated = isolated  # False when the interpreter also sees packages outside its prefix
+        self.distribution_count = None  # filled in once the environment is indexed
+
+    @property
+    def key(self):
+        # A system prefix such as /usr can hold several interpreters
+        return os.path.realpath(self.python) if self.kind == KIND_SYSTEM else self.prefix
+
+    @property
+    def name(self):
+        if self.kind == KIND_SYSTEM:
+            return self.python
+        return os.path.basename(self.prefix.rstrip(os.sep)) or self.prefix
+
+    @property
+    def is_current(self):
+        """Whether this is the environment the app itself runs in."""
+        return self.prefix == sys.prefix and os.path.realpath(self.python) == os.path.realpath(sys.executable)
+
+    def index_paths(self):
+        """site-packages to index directly, None when only the interpreter itself can tell."""
+        return self.site_packages if self.isolated and self.site_packages else None
+
+    def describe(self):
+        text = f"{self.name} ({self.kind}{', Python ' + self.version if self.version else ''})"
+        if self.distribution_count is not None:
+            text += f" - {self.distribution_count} packages"
+        return text
+
+    def to_dict(self):
+        return {'kind': self.kind, 'prefix': self.prefix, 'python': self.python, 'version': self.version,
+                'site_packages': self.site_packages, 'isolated': self.isolated}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['kind'], data['prefix'], data['python'], data.get('version', ''),
+                   data.get('site_packages'), data.get('isolated', True))
+
+    def __repr__(self):
+        return f"Environment({self.kind!r}, {self.prefix!r})"
+
+
+def prefix_python(prefix):
+    for candidate in (os.path.join(prefix, 'bin', 'python'), os.path.join(prefix, 'bin', 'python3'),
+                      os.path.join(prefix, 'Scripts', 'python.exe'), os.path.join(prefix, 'python.exe')):
+        if os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+def prefix_site_packages(prefix):
+    paths = sorted(glob.glob(os.path.join(prefix, 'lib', 'python*', 'site-packages')))
+    windows_path = os.path.join(prefix, 'Lib', 'site-packages')
+    if os.path.isdir(windows_path):
+        paths.append(windows_path)
+    return paths
+
+
+def read_pyvenv_cfg(path):
+    values = {}
+    try:
+        with open(path) as cfg:
+            for line in cfg:
+                key, sep, value = line.partition('=')
+                if sep:
+                    values[key.strip().lower()] = value.strip()
+    except OSError:
+        pass
+    return values
+
+
+def detect_environment(path):
+    """The environment rooted at path, or None when it is not one."""
+    cfg_path = os.path.join(path, 'pyvenv.cfg')
+    if os.path.isfile(cfg_path):
+        python = prefix_python(path)
+        if python is None:
+            return None
+        cfg = read_pyvenv_cfg(cfg_path)
+        return Environment(KIND_VENV, path, python, cfg.get('version_info') or cfg.get('version', ''),
+                           prefix_site_packages(path),
+                           isolated=cfg.get('include-system-site-packages', 'false').lower() != 'true')
+
+    if os.path.isdir(os.path.join(path, 'conda-meta')):
+        python = prefix_python(path)
+        if python is None:
+            return None  # a conda environment without Python in it
+        records = glob.glob(os.path.join(path, 'conda-meta', 'python-[0-9]*.json'))
+        version = os.path.basename(records[0]).split('-')[1] if records else ''
+        return Environment(KIND_CONDA, path, python, version, prefix_site_packages(path))
+
+    # A standalone installation such as ~/.pyenv/versions/3.12.1
+    if os.path.isdir(os.path.join(path, 'bin')) and glob.glob(os.path.join(path, 'lib', 'python3*', 'os.py')):
+        python = prefix_python(path)
+        if python is not None:
+            site_packages = prefix_site_packages(path)
+            version = os.path.basename(os.path.dirname(site_packages[0]))[len('python'):] if site_packages else ''
+            return Environment(KIND_SYSTEM, path, python, version, site_packages, isolated=False)
+    return None
+
+
+def path_interpreters():
+    """The Python interpreters on PATH, one per real executable."""
+    found = {}
+    for directory in os.environ.get('PATH', '').split(os.pathsep):
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            match = PYTHON_NAME_RE.match(entry.name)
+            if not match or not os.access(entry.path, os.X_OK):
+                continue
+            real = os.path.realpath(entry.path)
+            if real in found or not os.path.isfile(real):
+                continue
+            # pyenv / asdf shims are scripts that pick an interpreter, not interpreters
+            if 'shims' in real.split(os.sep):
+                continue
+            # python3 -> python3.11 tells the minor version
+            real_match = PYTHON_NAME_RE.match(os.path.basename(real))
+            version = max(match.group(1) or '', (real_match.group(1) or '') if real_match else '', key=len)
+            prefix = os.path.dirname(os.path.dirname(real))
+            found[real] = Environment(KIND_SYSTEM, prefix, entry.path, version, isolated=False)
+    return list(found.values())
+
+
+class EnvironmentDiscovery:
+    def __init__(self, roots=None, cache_path=None, max_depth=MAX_DEPTH, max_workers=MAX_WORKERS,
+                 should_stop=None):
+        self.roots = [os.path.abspath(os.path.expanduser(root)) for root in (roots or default_roots())]
+        self.cache_path = cache_path or default_cache_path()
+        self.max_depth = max_depth
+        self.max_workers = max(1, max_workers)
+        self.should_stop = should_stop or (lambda: False)
+        self.stats = {'listed': 0, 'cached': 0}
+        self._cache = self._load_cache()  # directory -> {'mtime': ns, 'environment': dict|None, 'children': [names]}
+        self._cache_lock = threading.Lock()
+
+    def _load_cache(self):
+        try:
+            with open(self.cache_path) as cache_file:
+                cache = json.load(cache_file)
+            return cache if isinstance(cache, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _save_cache(self, visited):
+        # Directories that were not reached this time (removed, or no longer under a root) are dropped
+        cache = {path: entry for path, entry in self._cache.items() if path in visited}
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            temp_path = f"{self.cache_path}.tmp"
+            with open(temp_path, 'w') as cache_file:
+                json.dump(cache, cache_file)
+            os.replace(temp_path, self.cache_path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _pruned(name):
+        if name in PRUNED_NAMES:
+            return True
+        return name.startswith('.') and name not in HIDDEN_ALLOWED
+
+    def _scan(self, path):
+        """(Environment or None, child directories to visit) for one directory, from the cache when unchanged."""
+        try:
+            mtime = os.stat(path).st_mtime_ns
+        except OSError:
+            return None, []
+        cached = self._cache.get(path)
+        if cached is not None and cached['mtime'] == mtime:
+            with self._cache_lock:
+                self.stats['cached'] += 1
+            environment = Environment.from_dict(cached['environment']) if cached['environment'] else None
+            return environment, [os.path.join(path, name) for name in cached['children']]
+
+        environment = detect_environment(path)
+        children = []
+        if environment is None or environment.kind == KIND_CONDA:
+            try:
+                for entry in os.scandir(path):
+                    if environment is not None and entry.name != 'envs':
+                        continue  # only a conda base's envs hold more environments
+                    if entry.is_dir(follow_symlinks=False) and not self._pruned(entry.name):
+                        children.append(entry.name)
+            except OSError:
+                pass
+        with self._cache_lock:
+            self.stats['listed'] += 1
+            self._cache[path] = {'mtime': mtime, 'environment': environment.to_dict() if environment else None,
+                                 'children': children}
+        return environment, [os.path.join(path, name) for name in children]
+
+    def discover(self):
+        """Every environment under the roots plus the interpreters on PATH."""
+        found = {}
+        visited = set()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            pending = {}
+            for root in self.roots:
+                if root not in visited:
+                    visited.add(root)
+                    pending[pool.submit(self._scan, root)] = 0
+            while pending and not self.should_stop():
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    depth = pending.pop(future)
+                    environment, children = future.result()
+                    if environment is not None:
+                        found.setdefault(environment.key, environment)
+                    if depth >= self.max_depth:
+                        continue
+                    for child in children:
+                        if child not in visited:
+                            visited.add(child)
+                            pending[pool.submit(self._scan, child)] = depth + 1
+            for future in pending:
+                future.cancel()
+        self._save_cache(visited)
+
+        prefixes = {environment.prefix for environment in found.values() if environment.kind != KIND_SYSTEM}
+        for environment in path_interpreters():
+            if environment.prefix not in prefixes:  # an activated venv or conda base is already listed
+                found.setdefault(environment.key, environment)
+        return sorted(found.values(), key=lambda env: (env.kind, env.prefix))
+
+    def index(self, environments):
+        """Build every environment's installed index in parallel and record how many packages it has."""
+        def index_one(environment):
+            if self.should_stop():
+                return
+            installed = get_installed_index(environment.python, environment.index_paths())
+            environment.distribution_count = len(installed.distributions())
+
+        if environments:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(environments))) as pool:
+                list(pool.map(index_one, environments))
+        return environments
@@ -8,7 +8,7 @@ from PySide6.QtCore import QSize, QThread, Signal, QEvent, QTimer, QPoint, Slot,
 from threading import Thread
 from packaging import version
 import importlib.metadata
-from package import MODULE_POPULARITY, MODULE_CATEGORIES, MODULE_DEPENDENCIES, MODULE_DOCS
+from process_supervisor import SupervisedProcess
 
 import subprocess
 import threading
@@ -747,23 +747,8 @@ class SettingsDialog(QDialog):
                 # Create the command to run
                 command = f"echo {password} | sudo -S apt-get install -y {package_name}"
 
-                # Run the command and capture output
-                process = subprocess.Popen(command, shell=True, 
-                                           stdout=subprocess.PIPE,
-                                           stderr=subprocess.PIPE,
-                                           universal_newlines=True)
-
-                # Read the output in real-time
-                while True:
-                    output = process.stdout.readline()
-                    if output == '' and process.poll() is not None:
-                        break
-                    if output:
-                        self.set_monospace_font_sys_package()  # Ensure the font is set
-                        self.append_to_output1(output)  # Append the output to the QTextEdit
-
-                # Wait for the process to complete
-                process.wait()
+                # Run the command and read stdout and stderr together in real-time
+                SupervisedProcess(command, shell=True, on_chunk=self.append_output_chunk, keep_lines=False).run()
             else:
                 self.sys_package_output.setText("Password input was canceled or empty.")
         else:
@@ -864,15 +849,13 @@ class SettingsDialog(QDialog):
 
     def run_interactive_command(self, command):
         try:
-            self.process = subprocess.Popen(command, shell=True, cwd=self.current_directory, executable=self.user_shell,
-                                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-
-            while True:
-                output = self.process.stdout.readline()
-                if output == '' and self.process.poll() is not None:
-                    break
-                if output:
-                    self.command_output_signal.emit(output.strip())
+            supervised = SupervisedProcess(command, shell=True, cwd=self.current_directory, executable=self.user_shell,
+                                           stdin=subprocess.PIPE, keep_lines=False,
+                                           on_chunk=lambda lines: self.command_output_signal.emit(
+                                               ''.join(line.text for line in lines).strip()))
+            supervised.start()
+            self.process = supervised.proc
+            supervised.wait()
         except Exception as e:
             self.command_output_signal.emit(f"Error running {command}: \n{str(e)}")
 
@@ -917,20 +900,8 @@ class SettingsDialog(QDialog):
                 # Create the command to run
                 command = f"echo {password} | sudo -S apt-get remove -y {package_name1}"
 
-                # Run the command and capture output
-                process = subprocess.Popen(command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
-
-                # Read the output in real-time
-                while True:
-                    output = process.stdout.readline()
-                    if output == '' and process.poll() is not None:
-                        break
-                    if output:
-                        self.set_monospace_font_sys_package()  # Ensure the font is set
-                        self.append_to_output1(output)  # Append the output to the QTextEdit
-
-                # Wait for the process to complete
-                process.wait()
+                # Run the command and read stdout and stderr together in real-time
+                SupervisedProcess(command, shell=True, on_chunk=self.append_output_chunk, keep_lines=False).run()
             else:
                 self.sys_package_output.setText("Password input was canceled or empty.")
         else:
@@ -1282,6 +1253,10 @@ class SettingsDialog(QDialog):
         self.output_display1.moveCursor(QTextCursor.End)  # Move cursor to the end
         self.output_display1.insertPlainText(text + '\n')  # Append the text
         
+    def append_output_chunk(self, lines):
+        self.set_monospace_font_sys_package()  # Ensure the font is set
+        self.append_to_output1(''.join(line.text for line in lines).rstrip('\n'))
+
     def append_to_output1(self, text):
         self.sys_package_output.moveCursor(QTextCursor.End)
         self.sys_package_output.insertPlainText(text + '\n')
@@ -1508,13 +1483,7 @@ class SettingsDialog(QDialog):
 
                 try:
                     # Run the subprocess with output capture
-                    process = subprocess.Popen(
-                        conda_command,
-                        shell=True,
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.STDOUT,
-                        universal_newlines=True
-                    )
+                    process = SupervisedProcess(conda_command, shell=True, merge_stderr=True, keep_lines=False)
 
                     self.progress_bar.setValue(0)
                     self.downloading_status.setVisible(True)
@@ -1532,19 +1501,17 @@ class SettingsDialog(QDialog):
     def track_conda_installation_progress(self, process):
         """Track the installation progress for Conda installation."""
         progress = 0
-        while True:
-            output = process.stdout.readline()
-            
-            if output == "" and process.poll() is not None:
-                break
-
-            if output:
-                print(output.strip())  # Print for debugging
 
-                # You can implement logic to increment progress based on output
-                if "Downloading" in output:
+        def on_chunk(lines):
+            nonlocal progress
+            # You can implement logic to increment progress based on output
+            for line in lines:
+                if "Downloading" in line.text:
                     progress += 10  # Example increment, customize based on actual output
-                    self.progress_bar.setValue(progress)
+            self.progress_bar.setValue(min(progress, 100))
+
+        process.on_chunk = on_chunk
+        process.run()
 
         self.progress_bar.setValue(100)  # Ensure the progress bar is fully filled when done
         self.on_installation_complete("Module")  # Call completion handler
@@ -0,0 +1,347 @@
+"""
+Client for a package index's simple API.
+
+Project pages are requested as PEP 691 JSON
+(`application/vnd.pypi.simple.v1+json`). Servers that only speak the PEP 503
+HTML form are parsed as HTML instead, which keeps small local index servers
+usable. All requests share one pooled requests.Session, and every page is
+kept in an on-disk cache with its ETag / Last-Modified. A cached page is
+revalidated with a conditional request, so a project that did not change
+costs a 304 with no body. ReleaseCatalog keeps the release lists (yanked
+flags, Requires-Python) in memory on top of that for the version picker.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from packaging.utils import (canonicalize_name, parse_wheel_filename, parse_sdist_filename,
+                             InvalidWheelFilename, InvalidSdistFilename)
+from packaging.specifiers import SpecifierSet, InvalidSpecifier
+from packaging.version import InvalidVersion
+from html.parser import HTMLParser
+from urllib.parse import urljoin
+import threading
+import requests
+import hashlib
+import json
+import time
+import os
+
+
+DEFAULT_INDEX_URL = 'https://pypi.org/simple/'
+JSON_CONTENT_TYPE = 'application/vnd.pypi.simple.v1+json'
+ACCEPT = f'{JSON_CONTENT_TYPE}, application/vnd.pypi.simple.v1+html;q=0.2, text/html;q=0.1'
+POOL_SIZE = 16
+
+
+class IndexClientError(Exception):
+    pass
+
+
+def default_index_url():
+    """The index pip would use: PIP_INDEX_URL when set, PyPI otherwise."""
+    return os.environ.get('PIP_INDEX_URL') or DEFAULT_INDEX_URL
+
+
+def default_cache_dir():
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'PythonModuleInstaller', 'simple')
+
+
+def make_session(pool_size=POOL_SIZE):
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+class _SimpleHTMLParser(HTMLParser):
+    """PEP 503 project page: one anchor per file."""
+
+    def __init__(self, base_url):
+        super().__init__()
+        self.base_url = base_url
+        self.files = []
+        self._current = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'base':
+            self.base_url = dict(attrs).get('href') or self.base_url
+        if tag != 'a':
+            return
+        attrs = dict(attrs)
+        if not attrs.get('href'):
+            return
+        url = urljoin(self.base_url, attrs['href'])
+        file_info = {'url': url.split('#', 1)[0], 'hashes': {}, 'filename': ''}
+        if '#' in url:
+            algorithm, _, digest = url.split('#', 1)[1].partition('=')
+            file_info['hashes'][algorithm] = digest
+        if 'data-requires-python' in attrs:
+            file_info['requires-python'] = attrs['data-requires-python']
+        if 'data-yanked' in attrs:
+            file_info['yanked'] = attrs['data-yanked'] or True
+        self._current = file_info
+
+    def handle_data(self, data):
+        if self._current is not None:
+            self._current['filename'] += data.strip()
+
+    def handle_endtag(self, tag):
+        if tag == 'a' and self._current is not None:
+            if not self._current['filename']:
+                self._current['filename'] = self._current['url'].rsplit('/', 1)[-1]
+            self.files.append(self._current)
+            self._current = None
+
+
+def parse_html_page(name, text, url):
+    parser = _SimpleHTMLParser(url)
+    parser.feed(text)
+    return {'name': name, 'files': parser.files}
+
+
+def file_version(project_name, filename):
+    """The version a wheel or sdist filename carries, None when it cannot be told."""
+    try:
+        if filename.endswith('.whl'):
+            return parse_wheel_filename(filename)[1]
+        if filename.endswith(('.tar.gz', '.zip')):
+            name, file_ver = parse_sdist_filename(filename)
+            return file_ver if name == canonicalize_name(project_name) else None
+    except (InvalidWheelFilename, InvalidSdistFilename, InvalidVersion):
+        return None
+    return None
+
+
+def supports_python(file_info, python_version):
+    """Whether a file's Requires-Python admits python_version ('3.11.7'). Unparseable values admit everything."""
+    requires_python = file_info.get('requires-python')
+    if not requires_python or python_version is None:
+        return True
+    try:
+        return SpecifierSet(requires_python).contains(python_version, prereleases=True)
+    except InvalidSpecifier:
+        return True
+
+
+class ProjectPage:
+    def __init__(self, name, data):
+        self.name = name
+        self.files = data.get('files', [])
+        self._versions = None
+
+    def releases(self):
+        """{Version: [file dicts]} for every version that has a wheel or sdist."""
+        if self._versions is None:
+            releases = {}
+            for file_info in self.files:
+                file_ver = file_version(self.name, file_info.get('filename', ''))
+                if file_ver is not None:
+                    releases.setdefault(file_ver, []).append(file_info)
+            self._versions = releases
+        return self._versions
+
+    def versions(self, include_yanked=False, python_version=None):
+        """Sorted versions; a version counts as yanked when all of its files are."""
+        versions = []
+        for release, files in self.releases().items():
+            if not include_yanked and all(f.get('yanked') for f in files):
+                continue
+            if not any(supports_python(f, python_version) for f in files):
+                continue
+            versions.append(release)
+        return sorted(versions)
+
+    def latest(self, include_prereleases=False, python_version=None):
+        candidates = [v for v in self.versions(python_version=python_version)
+                      if include_prereleases or not v.is_prerelease]
+        return candidates[-1] if candidates else None
+
+
+class IndexClient:
+    def __init__(self, index_url=None, session=None, cache_dir=None, timeout=15):
+        self.index_url = (index_url or default_index_url()).rstrip('/') + '/'
+        self.session = session or make_session()
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.timeout = timeout
+        self.stats = {'fetched': 0, 'not_modified': 0, 'errors': 0}
+        self._stats_lock = threading.Lock()
+
+    def _count(self, key):
+        with self._stats_lock:
+            self.stats[key] += 1
+
+    def project_url(self, name):
+        return f"{self.index_url}{canonicalize_name(name)}/"
+
+    def _cache_path(self, name):
+        # One cache per index, so switching index URLs never mixes their pages
+        index_key = hashlib.sha256(self.index_url.encode()).hexdigest()[:16]
+        return os.path.join(self.cache_dir, index_key, canonicalize_name(name) + '.json')
+
+    def _load_cached(self, name):
+        try:
+            with open(self._cache_path(name)) as cache_file:
+                return json.load(cache_file)
+        except (OSError, ValueError):
+            return None
+
+    def _store_cached(self, name, entry):
+        path = self._cache_path(name)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'w') as cache_file:
+                json.dump(entry, cache_file)
+            os.replace(temp_path, path)
+        except OSError:
+            pass
+
+    def project_names(self):
+        """Every project name the index lists on its root page (PEP 691 JSON, or PEP 503 HTML)."""
+        try:
+            response = self.session.get(self.index_url, headers={'Accept': ACCEPT}, timeout=max(self.timeout, 120))
+        except requests.RequestException as e:
+            raise IndexClientError(f"Could not reach {self.index_url}: {e}")
+        if not response.ok:
+            raise IndexClientError(f"{self.index_url} returned HTTP {response.status_code}")
+        content_type = response.headers.get('Content-Type', '').split(';', 1)[0].strip()
+        if content_type == JSON_CONTENT_TYPE:
+            return [project['name'] for project in response.json().get('projects', [])]
+        return [file_info['filename'] for file_info in parse_html_page('', response.text, response.url)['files']]
+
+    def project(self, name):
+        """The project's page, revalidated against the index. None when the index does not have it."""
+        cached = self._load_cached(name)
+        headers = {'Accept': ACCEPT}
+        if cached:
+            if cached.get('etag'):
+                headers['If-None-Match'] = cached['etag']
+            if cached.get('last_modified'):
+                headers['If-Modified-Since'] = cached['last_modified']
+
+        url = self.project_url(name)
+        try:
+            response = self.session.get(url, headers=headers, timeout=self.timeout)
+        except requests.RequestException as e:
+            self._count('errors')
+            if cached:
+                return ProjectPage(name, cached['data'])  # stale is better than nothing offline
+            raise IndexClientError(f"Could not reach {url}: {e}")
+
+        if response.status_code == 304 and cached:
+            self._count('not_modified')
+            return ProjectPage(name, cached['data'])
+        if response.status_code == 404:
+            return None
+        if not response.ok:
+            self._count('errors')
+            raise IndexClientError(f"{url} returned HTTP {response.status_code}")
+
+        self._count('fetched')
+        content_type = response.headers.get('Content-Type', '').split(';', 1)[0].strip()
+        if content_type == JSON_CONTENT_TYPE:
+            data = response.json()
+            data['files'] = [{**f, 'url': urljoin(response.url, f.get('url', ''))} for f in data.get('files', [])]
+        else:
+            data = parse_html_page(name, response.text, response.url)
+        self._store_cached(name, {'etag': response.headers.get('ETag'),
+                                  'last_modified': response.headers.get('Last-Modified'),
+                                  'checked': time.time(),
+                                  'data': data})
+        return ProjectPage(name, data)
+
+
+RELEASE_TTL = 10 * 60  # seconds before a project's release list is revalidated
+
+
+class ReleaseInfo:
+    __slots__ = ('version', 'yanked', 'yanked_reason', 'requires_python')
+
+    def __init__(self, version, yanked=False, yanked_reason='', requires_python=''):
+        self.version = version
+        self.yanked = yanked
+        self.yanked_reason = yanked_reason
+        self.requires_python = requires_python
+
+    def supports(self, python_version):
+        return supports_python({'requires-python': self.requires_python}, python_version)
+
+    def __repr__(self):
+        return f"ReleaseInfo({self.version!r}, yanked={self.yanked!r})"
+
+
+def releases_from_page(page):
+    """ReleaseInfo for every version on a project page, newest first."""
+    releases = []
+    for release, files in page.releases().items():
+        yanked_files = [f for f in files if f.get('yanked')]
+        yanked = len(yanked_files) == len(files)
+        reason = next((f['yanked'] for f in yanked_files if isinstance(f['yanked'], str)), '') if yanked else ''
+        requires_python = next((f['requires-python'] for f in files if f.get('requires-python')), '')
+        releases.append((release, ReleaseInfo(str(release), yanked, reason, requires_python)))
+    return [info for _, info in sorted(releases, key=lambda pair: pair[0], reverse=True)]
+
+
+class ReleaseCatalog:
+    """
+    Release lists per project, kept in memory on top of the index client's
+    disk cache. A repeat lookup within the TTL is a dict lookup; after it, the
+    page is revalidated (usually a 304).
+    """
+
+    def __init__(self, client=None, ttl=RELEASE_TTL):
+        self.client = client or IndexClient()
+        self.ttl = ttl
+        self._releases = {}  # normalized name -> (fetched at, [ReleaseInfo])
+        self._lock = threading.Lock()
+
+    def cached(self, name):
+        """The release list if it is in memory and fresh, otherwise None. Never touches the network."""
+        entry = self._releases.get(canonicalize_name(name))
+        if entry is not None and time.monotonic() - entry[0] < self.ttl:
+            return entry[1]
+        return None
+
+    def releases(self, name):
+        """Release list for a project, newest first; [] when the index does not have it."""
+        releases = self.cached(name)
+        if releases is not None:
+            return releases
+        page = self.client.project(name)
+        releases = releases_from_page(page) if page is not None else []
+        with self._lock:
+            self._releases[canonicalize_name(name)] = (time.monotonic(), releases)
+        return releases
+
+    def prefetch(self, names, max_workers=POOL_SIZE, should_stop=None):
+        """Load every name that is not cached yet, in parallel. Returns the names that were loaded."""
+        should_stop = should_stop or (lambda: False)
+        missing = list(dict.fromkeys(name for name in names if name.strip() and self.cached(name) is None))
+        if not missing:
+            return []
+
+        def load(name):
+            if should_stop():
+                return None
+            try:
+                self.releases(name)
+                return name
+            except IndexClientError:
+                return None
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(missing))) as pool:
+            return [name for name in pool.map(load, missing) if name]
+
+
+_release_catalog = None
+_release_catalog_lock = threading.Lock()
+
+
+def get_release_catalog():
+    """The app-wide release catalog for the configured index."""
+    global _release_catalog
+    with _release_catalog_lock:
+        if _release_catalog is None:
+            _release_catalog = ReleaseCatalog()
+        return _release_catalog
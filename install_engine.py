@@ -0,0 +1,486 @@
+"""
+Install engine used by InstallThread.
+
+Instead of running one `pip install` per module, the engine builds wheels for
+every selected module concurrently into a staging wheelhouse (bounded worker
+pool), then installs the whole selection from that wheelhouse in a single pip
+transaction. When a resolution plan (see install_plan) was made first, its
+exact artifacts are downloaded in parallel and installed with --no-deps, so
+pip does not resolve again. Installs that the local wheelhouse can satisfy
+are served from it without touching the network. Updates fetch their wheels
+the same way, so they are kept in the wheelhouse too, and upgrade in one
+transaction. Uninstalls are batched as well: one pip call for the whole
+selection, with per-module outcomes recovered from pip's output afterwards.
+Uninstalls first check which modules are installed against the installed
+index, so modules that are not installed never reach pip.
+"""
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from packaging.utils import canonicalize_name
+from pip_worker import get_session_worker, PipWorkerError
+from progress import RAW_PROGRESS_ARGS, PROGRESS_RE, supports_raw_progress
+from install_plan import (PlanError, plan_from_report, fetch_sizes, requirement_key,
+                          get_cached_plan, cache_plan, forget_plans)
+from process_supervisor import SupervisedProcess
+from installed_index import get_installed_index
+from urllib.parse import urlparse, unquote
+import tempfile
+import threading
+import requests
+import hashlib
+import shutil
+import json
+import sys
+import re
+import os
+
+
+# Downloads are network bound, so a few more workers than cores is fine,
+# but keep it bounded so a big selection does not open dozens of pip processes.
+DEFAULT_MAX_WORKERS = min(8, (os.cpu_count() or 2) * 2)
+ARTIFACT_CHUNK_SIZE = 256 * 1024
+
+
+# pip has no structured report for uninstall, these are its stable summary lines
+# The project name runs up to the last '-<version>', names such as python-dateutil have hyphens of their own
+UNINSTALLED_RE = re.compile(r'Successfully uninstalled (\S+)-[^-\s]+$')
+SKIPPED_RE = re.compile(r'Skipping (\S+) as it is not installed')
+
+# (present participle, past tense) used in per-module messages
+ACTION_WORDS = {
+    'install': ('installing', 'installed'),
+    'update': ('updating', 'updated'),
+}
+
+
+_raw_progress_support = {}
+
+
+def parse_uninstall_output(lines):
+    """(removed, skipped) canonical project names from the output of `pip uninstall`."""
+    removed, skipped = set(), set()
+    for line in lines:
+        match = UNINSTALLED_RE.search(line.strip())
+        if match:
+            removed.add(canonicalize_name(match.group(1)))
+            continue
+        match = SKIPPED_RE.search(line)
+        if match:
+            skipped.add(canonicalize_name(match.group(1)))
+    return removed, skipped
+
+
+def progress_args(python):
+    """`--progress-bar raw` when the interpreter's pip understands it, cached per interpreter."""
+    if python not in _raw_progress_support:
+        pip_version = get_installed_index(python).version('pip')
+        _raw_progress_support[python] = bool(pip_version) and supports_raw_progress(pip_version)
+    return list(RAW_PROGRESS_ARGS) if _raw_progress_support[python] else []
+
+
+class InstallEngine:
+    def __init__(self, python=None, max_workers=DEFAULT_MAX_WORKERS,
+                 on_status=None, on_error=None, on_output=None, should_stop=None, progress=None,
+                 wheelhouse=None, offline=False):
+        self.python = python or sys.executable
+        self.max_workers = max(1, max_workers)
+        self.progress = progress  # Optional ProgressTracker fed with every pip process' output
+        self.wheelhouse = wheelhouse  # Optional Wheelhouse keeping every downloaded wheel
+        self.offline = offline  # Only the wheelhouse may be used
+
+        # Callbacks, InstallThread binds these to its Qt signals
+        self.on_status = on_status or (lambda message: None)
+        self.on_error = on_error or (lambda message: None)
+        self.on_output = on_output or (lambda line: None)
+        self.should_stop = should_stop or (lambda: False)
+
+        self._procs = set()
+        self._worker_busy = False
+        self._session = None
+        self._procs_lock = threading.Lock()
+        self._merge_lock = threading.Lock()
+
+    def pip_command(self, *args):
+        return [self.python, '-m', 'pip', *args]
+
+    def _run(self, command):
+        """Run a pip command, forwarding its output line by line. Returns (returncode, output_lines)."""
+        lines = []
+        supervised = SupervisedProcess(command, should_stop=self.should_stop, keep_lines=False)
+
+        def on_line(line):
+            if self.progress:
+                self.progress.feed(line.text, supervised.pid)
+            if PROGRESS_RE.match(line.text):
+                return
+            lines.append(line.text)
+            self.on_output(line.text)
+
+        supervised.on_line = on_line
+        supervised.start()
+        with self._procs_lock:
+            self._procs.add(supervised)
+        try:
+            supervised.wait()
+        finally:
+            with self._procs_lock:
+                self._procs.discard(supervised)
+            if self.progress:
+                self.progress.finish_stream(supervised.pid)
+        return supervised.returncode, lines
+
+    def _run_with_report(self, command):
+        """Run a `pip install` command with --report. Returns (returncode, output_lines, report)."""
+        fd, report_path = tempfile.mkstemp(prefix='pip-report-', suffix='.json')
+        os.close(fd)
+        try:
+            returncode, lines = self._run(command + ['--report', report_path])
+            report = None
+            if returncode == 0:
+                try:
+                    with open(report_path) as report_file:
+                        report = json.load(report_file)
+                except (OSError, ValueError):
+                    report = None
+            return returncode, lines, report
+        finally:
+            os.remove(report_path)
+
+    @staticmethod
+    def _requested_from_report(report):
+        """Canonical names of the distributions pip actually installed for this job."""
+        names = set()
+        for item in (report or {}).get('install', []):
+            name = item.get('metadata', {}).get('name')
+            if name:
+                names.add(canonicalize_name(name))
+        return names
+
+    def cancel(self):
+        """Terminate every pip process the engine is currently running."""
+        with self._procs_lock:
+            procs = list(self._procs)
+        for supervised in procs:
+            supervised.terminate()
+        if self._worker_busy:
+            # An in-process pip command can only be stopped by stopping the worker
+            get_session_worker(self.python).kill()
+
+    @staticmethod
+    def _error_text(lines):
+        errors = [line.strip() for line in lines if line.lstrip().startswith('ERROR')]
+        return '\n'.join(errors) if errors else ''.join(lines[-10:]).strip()
+
+    def _report_batch_error(self, modules, doing, done, error_message):
+        # One error for the whole transaction, each module only gets a status line
+        self.on_error(f"Error {doing} {', '.join(modules)}: {error_message}")
+        for module in modules:
+            self.on_status(f"{module} was not {done}.")
+
+    def _download_one(self, module, staging_dir):
+        # Every worker gets its own directory so two workers fetching the same
+        # shared dependency never write the same file at once.
+        work_dir = tempfile.mkdtemp(prefix='download-', dir=staging_dir)
+        try:
+            command = self.pip_command('wheel', module, '--wheel-dir', work_dir, *progress_args(self.python))
+            if self.wheelhouse:
+                # Wheels we already have are picked up from disk instead of downloaded again
+                command += ['--find-links', self.wheelhouse.links_dir]
+            returncode, lines = self._run(command)
+            if returncode != 0:
+                return False, self._error_text(lines)
+
+            with self._merge_lock:
+                for filename in os.listdir(work_dir):
+                    target = os.path.join(staging_dir, filename)
+                    if not os.path.exists(target):
+                        shutil.move(os.path.join(work_dir, filename), target)
+            return True, ''
+        finally:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    def download(self, modules, staging_dir):
+        """Fetch wheels for all modules (and their dependencies) concurrently. Returns (downloaded, failed)."""
+        downloaded, failed, errors = [], [], []
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(modules))) as pool:
+            futures = {pool.submit(self._download_one, module, staging_dir): module for module in modules}
+            for future in as_completed(futures):
+                module = futures[future]
+                if self.should_stop():
+                    self.cancel()
+                try:
+                    ok, error_message = future.result()
+                except Exception as e:
+                    ok, error_message = False, str(e)
+
+                if ok:
+                    downloaded.append(module)
+                    self.on_status(f"{module} downloaded.")
+                elif not self.should_stop():
+                    failed.append(module)
+                    errors.append(f"{module}: {error_message}")
+        if errors:
+            self._report_batch_error(failed, 'downloading', 'installed', '\n'.join(errors))
+        return downloaded, failed
+
+    def install(self, modules):
+        """Download every module in parallel, then install them in one pip transaction. Returns (installed, failed)."""
+        if not modules:
+            return [], []
+
+        if self.wheelhouse and not self.wheelhouse.is_empty():
+            result = self.install_from_wheelhouse(modules)
+            if result is not None or self.should_stop():
+                return result or ([], [])
+
+        if self.offline:
+            self._report_batch_error(modules, 'installing', 'installed',
+                                     "not available in the local wheelhouse and there is no internet connection")
+            return [], list(modules)
+
+        staging_dir = tempfile.mkdtemp(prefix='pmi-wheelhouse-')
+        try:
+            downloaded, failed = self.download(modules, staging_dir)
+            if self.should_stop() or not downloaded:
+                return [], failed
+
+            if self.wheelhouse:
+                self.wheelhouse.add_directory(staging_dir)
+
+            self.on_status(f"Installing {len(downloaded)} module(s) in a single transaction...")
+            command = self.pip_command('install', '--no-index', '--find-links', staging_dir, *downloaded)
+            installed, install_failed = self._install_transaction(command, downloaded, 'install')
+            return installed, failed + install_failed
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            if self.wheelhouse:
+                self.wheelhouse.evict()
+
+    def install_from_wheelhouse(self, modules):
+        """
+        Install the whole selection from the wheelhouse alone. Returns (installed, failed),
+        or None when the wheelhouse cannot satisfy the resolution (nothing is changed then).
+        """
+        command = self.pip_command('install', '--no-index', '--find-links', self.wheelhouse.links_dir, *modules)
+        returncode, lines, report = self._run_with_report(command)
+        if returncode != 0 or self.should_stop():
+            return None
+
+        used = [item.get('download_info', {}).get('url', '').rsplit('/', 1)[-1]
+                for item in (report or {}).get('install', [])]
+        self.wheelhouse.touch(used)
+        for module in modules:
+            self.on_status(f"{module} installed successfully from the local wheelhouse.")
+        return list(modules), []
+
+    @property
+    def session(self):
+        """Pooled HTTP session for artifact downloads and size lookups."""
+        if self._session is None:
+            self._session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_maxsize=self.max_workers)
+            self._session.mount('https://', adapter)
+            self._session.mount('http://', adapter)
+        return self._session
+
+    def plan(self, modules):
+        """Dry-run resolution of the whole selection. Cached plans are reused. Raises PlanError."""
+        plan = get_cached_plan(self.python, modules)
+        if plan is not None:
+            return plan
+
+        command = self.pip_command('install', '--dry-run', *modules)
+        if self.offline and self.wheelhouse:
+            command += ['--no-index', '--find-links', self.wheelhouse.links_dir]
+        elif self.wheelhouse:
+            command += ['--find-links', self.wheelhouse.links_dir]
+        returncode, lines, report = self._run_with_report(command)
+        if self.should_stop():
+            raise PlanError("Planning cancelled")
+        if returncode != 0 or report is None:
+            raise PlanError(self._error_text(lines) or "pip could not resolve the selection")
+
+        plan = plan_from_report(self.python, modules, report, self.wheelhouse)
+        fetch_sizes(plan.items, self.session)
+        cache_plan(plan)
+        return plan
+
+    def _fetch_artifact(self, item, staging_dir):
+        """Put the planned artifact into staging_dir, checking its hash. Returns its path."""
+        target = os.path.join(staging_dir, item.filename)
+        parsed = urlparse(item.url)
+        if item.cached or parsed.scheme == 'file':
+            # Local copies are hashed and reported like downloads, a local index is no more trusted
+            source = self.wheelhouse.object_path(item.sha256) if item.cached else unquote(parsed.path)
+            with open(source, 'rb') as artifact:
+                chunks = iter(lambda: artifact.read(ARTIFACT_CHUNK_SIZE), b'')
+                digest = self._write_artifact(item, target, chunks, os.path.getsize(source))
+        else:
+            with self.session.get(item.url, stream=True, timeout=30) as response:
+                response.raise_for_status()
+                total = int(response.headers.get('Content-Length') or item.size or 0)
+                digest = self._write_artifact(item, target, response.iter_content(chunk_size=ARTIFACT_CHUNK_SIZE), total)
+        if item.sha256 and digest.hexdigest() != item.sha256:
+            raise PlanError(f"Hash mismatch for {item.filename}")
+        return target
+
+    def _write_artifact(self, item, target, chunks, total):
+        """Write chunks to target, reporting progress. Returns their sha256."""
+        digest = hashlib.sha256()
+        done = 0
+        with open(target, 'wb') as artifact:
+            for chunk in chunks:
+                if self.should_stop():
+                    raise PlanError("Download cancelled")
+                artifact.write(chunk)
+                digest.update(chunk)
+                done += len(chunk)
+                if self.progress:
+                    self.progress.update_file(item.filename, done, total)
+        return digest
+
+    def install_plan(self, plan):
+        """Install exactly what the plan resolved, without resolving again. Returns (installed, failed)."""
+        for module in plan.satisfied:
+            self.on_status(f"{module} is already satisfied.")
+        pending = [module for module in plan.modules if module not in plan.satisfied]
+        if not plan.items:
+            return list(plan.modules), []
+
+        if self.progress:
+            for item in plan.items:
+                if item.download_bytes:
+                    self.progress.add_expected(item.filename, item.download_bytes)
+
+        staging_dir = tempfile.mkdtemp(prefix='pmi-wheelhouse-')
+        try:
+            paths, errors = [], []
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(plan.items))) as pool:
+                futures = {pool.submit(self._fetch_artifact, item, staging_dir): item for item in plan.items}
+                for future in as_completed(futures):
+                    try:
+                        paths.append(future.result())
+                    except (requests.RequestException, OSError, PlanError) as e:
+                        errors.append(f"{futures[future].filename}: {e}")
+            if self.should_stop():
+                return [], []
+            if errors:
+                forget_plans(self.python)
+                self._report_batch_error(pending, 'downloading', 'installed', '\n'.join(errors))
+                return [], pending
+
+            if self.wheelhouse:
+                self.wheelhouse.add_directory(staging_dir)
+
+            self.on_status(f"Installing {len(paths)} planned package(s) in a single transaction...")
+            command = self.pip_command('install', '--no-deps', *paths)
+            if all(item.is_wheel for item in plan.items):
+                command.append('--no-index')
+            installed, failed = self._install_transaction(command, pending, 'install')
+            return list(plan.satisfied) + installed, failed
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            if self.wheelhouse:
+                self.wheelhouse.evict()
+
+    def _install_transaction(self, command, modules, action):
+        """Run one `pip install` for all modules and split them into (succeeded, failed) using pip's report."""
+        doing, done = ACTION_WORDS[action]
+        returncode, lines, report = self._run_with_report(command)
+        if self.should_stop():
+            return [], []
+
+        if returncode != 0:
+            # pip resolves before touching the environment, so a failed
+            # transaction means none of the modules were changed
+            self._report_batch_error(modules, doing, done, self._error_text(lines))
+            return [], list(modules)
+
+        # The environment changed, cached plans for it may now be wrong
+        forget_plans(self.python)
+        changed = self._requested_from_report(report)
+        for module in modules:
+            if report is not None and requirement_key(module) not in changed:
+                self.on_status(f"{module} is already up to date.")
+            else:
+                self.on_status(f"{module} {done} successfully.")
+        return list(modules), []
+
+    def update(self, modules):
+        """
+        Fetch the newest wheels the way install does, keep them in the wheelhouse, then
+        upgrade every module in one pip transaction. Returns (updated, failed).
+        """
+        if not modules:
+            return [], []
+
+        staging_dir = tempfile.mkdtemp(prefix='pmi-wheelhouse-')
+        try:
+            downloaded, failed = self.download(modules, staging_dir)
+            if self.should_stop() or not downloaded:
+                return [], failed
+
+            if self.wheelhouse:
+                self.wheelhouse.add_directory(staging_dir)
+
+            self.on_status(f"Updating {len(downloaded)} module(s) in a single transaction...")
+            command = self.pip_command('install', '--upgrade', '--no-index', '--find-links', staging_dir, *downloaded)
+            updated, update_failed = self._install_transaction(command, downloaded, 'update')
+            return updated, failed + update_failed
+        finally:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            if self.wheelhouse:
+                self.wheelhouse.evict()
+
+    def installed_modules(self, modules):
+        """The subset of modules installed in the target environment, from its installed index."""
+        index = get_installed_index(self.python)
+        return [module for module in modules if index.is_installed(module)]
+
+    def uninstall(self, modules):
+        """Remove every module with one `pip uninstall`. Returns (uninstalled, not_installed, failed)."""
+        if not modules:
+            return [], [], []
+
+        try:
+            installed = self.installed_modules(modules)
+        except OSError:
+            installed = list(modules)  # Let pip sort it out
+        not_installed = [module for module in modules if module not in installed]
+        if not installed:
+            return [], not_installed, []
+        modules = installed
+
+        # Uninstall runs in the session's pip worker, no new interpreter per job
+        self._worker_busy = True
+        try:
+            result = get_session_worker(self.python).uninstall(modules, on_output=self.on_output,
+                                                                should_stop=self.should_stop)
+            returncode, lines = result['returncode'], result['output']
+        except PipWorkerError:
+            if self.should_stop():
+                return [], [], []
+            returncode, lines = self._run(self.pip_command('uninstall', '-y', *modules))
+        finally:
+            self._worker_busy = False
+        if self.should_stop():
+            return [], [], []
+
+        forget_plans(self.python)
+        removed, skipped = parse_uninstall_output(lines)
+
+        uninstalled, failed = [], []
+        error_message = self._error_text(lines) if returncode != 0 else ''
+        for module in modules:
+            name = canonicalize_name(module)
+            if name in removed:
+                uninstalled.append(module)
+                self.on_status(f"{module} uninstalled successfully.")
+            elif name in skipped:
+                not_installed.append(module)
+            else:
+                failed.append(module)
+        if failed:
+            self._report_batch_error(failed, 'uninstalling', 'uninstalled',
+                                     error_message or 'pip did not report it as removed')
+        return uninstalled, not_installed, failed
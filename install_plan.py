@@ -0,0 +1,166 @@
+"""
+Resolution plans for installs.
+
+A plan is built from `pip install --dry-run --report` for the whole
+selection: the full transitive set with exact versions and artifact URLs,
+which requested modules are already satisfied, and the download size of
+every artifact (a HEAD request each, in parallel; artifacts already in the
+wheelhouse cost nothing). Plans are cached so the real install can download
+exactly those artifacts and install them with `--no-deps`, without
+resolving again.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, unquote
+from packaging.requirements import Requirement, InvalidRequirement
+from packaging.utils import canonicalize_name
+import threading
+import requests
+import time
+import os
+
+
+PLAN_CACHE_TTL = 10 * 60  # seconds, the index may publish new releases
+HEAD_WORKERS = 8
+
+
+class PlanError(Exception):
+    pass
+
+
+def requirement_key(requirement):
+    """Normalized project name of a module or pinned requirement ('NumPy', 'numpy==2.1.0')."""
+    try:
+        return canonicalize_name(Requirement(requirement).name)
+    except InvalidRequirement:
+        return canonicalize_name(requirement.strip())
+
+
+class PlanItem:
+    def __init__(self, name, version, url, sha256=None, requested=False):
+        self.name = name
+        self.version = version
+        self.url = url
+        self.sha256 = sha256
+        self.requested = requested
+        self.size = None  # bytes, None when the server did not say
+        self.cached = False  # already in the local wheelhouse
+
+    @property
+    def filename(self):
+        return unquote(urlparse(self.url).path.rsplit('/', 1)[-1])
+
+    @property
+    def is_wheel(self):
+        return self.filename.endswith('.whl')
+
+    @property
+    def download_bytes(self):
+        return 0 if self.cached else (self.size or 0)
+
+
+class InstallPlan:
+    def __init__(self, python, modules, items, satisfied):
+        self.python = python
+        self.modules = list(modules)
+        self.items = items
+        self.satisfied = satisfied  # requested modules that need no change
+        self.created = time.time()
+
+    @property
+    def total_download_bytes(self):
+        return sum(item.download_bytes for item in self.items)
+
+    @property
+    def unknown_sizes(self):
+        return [item for item in self.items if item.size is None and not item.cached]
+
+    def is_fresh(self):
+        return time.time() - self.created < PLAN_CACHE_TTL
+
+
+def archive_sha256(archive_info):
+    """sha256 of an artifact from a report's archive_info, also from the legacy 'hash' ("sha256=<hex>") field."""
+    sha256 = archive_info.get('hashes', {}).get('sha256')
+    if sha256:
+        return sha256
+    algorithm, _, digest = archive_info.get('hash', '').partition('=')
+    return digest if algorithm == 'sha256' and digest else None
+
+
+def plan_from_report(python, modules, report, wheelhouse=None):
+    items = []
+    for entry in (report or {}).get('install', []):
+        metadata = entry.get('metadata', {})
+        download_info = entry.get('download_info', {})
+        item = PlanItem(metadata.get('name', ''), metadata.get('version', ''), download_info.get('url', ''),
+                        archive_sha256(download_info.get('archive_info', {})), entry.get('requested', False))
+        item.cached = bool(wheelhouse and item.sha256 and wheelhouse.has(item.sha256))
+        items.append(item)
+
+    planned = {canonicalize_name(item.name) for item in items}
+    satisfied = [module for module in modules if requirement_key(module) not in planned]
+    return InstallPlan(python, modules, items, satisfied)
+
+
+def fetch_sizes(items, session=None):
+    """Fill in item.size with a HEAD request per artifact, in parallel."""
+    session = session or requests.Session()
+
+    def size_of(item):
+        parsed = urlparse(item.url)
+        if parsed.scheme == 'file':
+            try:
+                return os.path.getsize(unquote(parsed.path))
+            except OSError:
+                return None
+        try:
+            response = session.head(item.url, allow_redirects=True, timeout=10)
+            length = response.headers.get('Content-Length')
+            return int(length) if response.ok and length else None
+        except (requests.RequestException, ValueError):
+            return None
+
+    pending = [item for item in items if not item.cached]
+    if not pending:
+        return
+    with ThreadPoolExecutor(max_workers=min(HEAD_WORKERS, len(pending))) as pool:
+        for item, size in zip(pending, pool.map(size_of, pending)):
+            item.size = size
+
+
+_plan_cache = {}
+_plan_cache_lock = threading.Lock()
+
+
+def _normalize_requirement(module):
+    """The requirement with its name and extras normalized, 'Foo_Bar[X]>=1' -> 'foo-bar[x]>=1'."""
+    try:
+        requirement = Requirement(module)
+    except InvalidRequirement:
+        return canonicalize_name(module.strip())
+    requirement.name = canonicalize_name(requirement.name)
+    requirement.extras = {canonicalize_name(extra) for extra in requirement.extras}
+    return str(requirement)
+
+
+def plan_cache_key(python, modules):
+    return python, tuple(sorted(_normalize_requirement(module) for module in modules))
+
+
+def get_cached_plan(python, modules):
+    with _plan_cache_lock:
+        plan = _plan_cache.get(plan_cache_key(python, modules))
+    return plan if plan and plan.is_fresh() else None
+
+
+def cache_plan(plan):
+    with _plan_cache_lock:
+        _plan_cache[plan_cache_key(plan.python, plan.modules)] = plan
+
+
+def forget_plans(python=None):
+    """Drop cached plans, e.g. after the environment changed."""
+    with _plan_cache_lock:
+        for key in [key for key in _plan_cache if python is None or key[0] == python]:
+            del _plan_cache[key]
@@ -0,0 +1,295 @@
+"""
+Index of the distributions installed in an environment.
+
+Built from one pass over the environment's site-packages directories
+(reading `.dist-info` / `.egg-info` entries) and keyed by normalized name, so
+"is X installed" and "which version of X" are dictionary lookups instead of
+a pkg_resources import, a `pip show` subprocess or an importlib.metadata
+search per module. The index stays valid while the modification times of
+those directories are unchanged: installing, upgrading or removing anything
+adds or removes a metadata directory there, which bumps the mtime and
+triggers a rescan on the next lookup. When a watcher reports which directory
+changed, update_directory() re-reads only the entries that appeared or
+vanished there. Listeners are told which names changed either way.
+"""
+
+from importlib.metadata import PathDistribution
+from packaging.utils import canonicalize_name
+import subprocess
+import csv
+import threading
+import pathlib
+import json
+import sys
+import os
+
+
+METADATA_SUFFIXES = ('.dist-info', '.egg-info')
+SITE_DIR_NAMES = ('site-packages', 'dist-packages')
+
+
+class InstalledDistribution:
+    def __init__(self, name, version, path):
+        self.name = name
+        self.version = version
+        self.path = path  # the .dist-info / .egg-info directory
+        self._metadata = None
+        self._tags = None
+
+    @property
+    def key(self):
+        return canonicalize_name(self.name)
+
+    @property
+    def location(self):
+        return os.path.dirname(self.path)
+
+    @property
+    def installer(self):
+        """The tool that installed it (the INSTALLER file), '' when unknown."""
+        try:
+            with open(os.path.join(self.path, 'INSTALLER')) as installer_file:
+                return installer_file.read().strip()
+        except OSError:
+            return ''
+
+    @property
+    def size(self):
+        """Installed size in bytes from the RECORD file, None when there is no RECORD."""
+        try:
+            with open(os.path.join(self.path, 'RECORD'), newline='') as record_file:
+                return sum(int(row[2]) for row in csv.reader(record_file) if len(row) > 2 and row[2].isdigit())
+        except OSError:
+            return None
+
+    @property
+    def tags(self):
+        """Wheel tags from the WHEEL file ('cp311-cp311-manylinux_2_17_x86_64'), () when not installed from a wheel."""
+        if self._tags is None:
+            tags = []
+            try:
+                with open(os.path.join(self.path, 'WHEEL')) as wheel_file:
+                    tags = [line.split(':', 1)[1].strip() for line in wheel_file if line.lower().startswith('tag:')]
+            except OSError:
+                pass
+            self._tags = tuple(sorted(tags))
+        return self._tags
+
+    @property
+    def direct_url(self):
+        """Contents of direct_url.json (PEP 610) for URL, VCS and local installs, None otherwise."""
+        try:
+            with open(os.path.join(self.path, 'direct_url.json')) as direct_url_file:
+                return json.load(direct_url_file)
+        except (OSError, ValueError):
+            return None
+
+    @property
+    def metadata(self):
+        """Full core metadata, only parsed when something asks for it."""
+        if self._metadata is None:
+            self._metadata = PathDistribution(pathlib.Path(self.path)).metadata
+        return self._metadata
+
+    def __repr__(self):
+        return f"InstalledDistribution({self.name!r}, {self.version!r})"
+
+
+def read_distribution(path):
+    """InstalledDistribution for one metadata directory, or None when it is not one."""
+    entry = os.path.basename(path)
+    stem, suffix = os.path.splitext(entry)
+    if suffix not in METADATA_SUFFIXES or not os.path.isdir(path):
+        return None
+
+    # `<name>-<version>.dist-info` already carries both, no need to parse METADATA
+    name, _, version = stem.rpartition('-')
+    if suffix == '.dist-info' and name and version:
+        return InstalledDistribution(name, version, path)
+
+    try:
+        metadata = PathDistribution(pathlib.Path(path)).metadata
+    except OSError:
+        return None
+    if not metadata or not metadata['Name']:
+        return None
+    return InstalledDistribution(metadata['Name'], metadata['Version'] or '', path)
+
+
+def site_paths(python=None):
+    """The site-packages directories an interpreter imports distributions from."""
+    python = python or sys.executable
+    if os.path.abspath(python) == os.path.abspath(sys.executable):
+        search_path = sys.path
+    else:
+        try:
+            output = subprocess.check_output([python, '-c', 'import json, sys; print(json.dumps(sys.path))'],
+                                             text=True, timeout=30)
+            search_path = json.loads(output)
+        except (OSError, subprocess.SubprocessError, ValueError):
+            return []
+
+    paths = []
+    for entry in search_path:
+        if entry and os.path.basename(entry.rstrip(os.sep)) in SITE_DIR_NAMES and os.path.isdir(entry):
+            if entry not in paths:
+                paths.append(entry)
+    return paths
+
+
+class InstalledIndex:
+    def __init__(self, paths):
+        self.paths = list(paths)
+        self.scans = 0  # how many full scans were needed, handy when profiling
+        self._entries = {}  # site directory -> {metadata directory: InstalledDistribution}
+        self._by_name = {}
+        self._signature = None
+        self._listeners = []
+        self._lock = threading.RLock()
+
+    def add_listener(self, callback):
+        """callback(keys) is called with the normalized names whose install state changed."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self, keys):
+        if keys:
+            for callback in list(self._listeners):
+                callback(sorted(keys))
+
+    def _stat(self, path):
+        try:
+            return os.stat(path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _current_signature(self):
+        return tuple(self._stat(path) for path in self.paths)
+
+    def refresh(self, force=False):
+        """Rescan if any site-packages directory changed. Returns True when it rescanned."""
+        signature = self._current_signature()
+        with self._lock:
+            if not force and signature == self._signature:
+                return False
+            first_scan = self._signature is None
+            old = self._by_name
+            self._entries = {path: self._scan_directory(path) for path in self.paths}
+            self._by_name = {}
+            for path in self.paths:
+                # The first site directory on the path wins, as it does for imports
+                for entry, dist in sorted(self._entries[path].items()):
+                    self._by_name.setdefault(dist.key, dist)
+            self._signature = signature
+            self.scans += 1
+            changed = set() if first_scan else self._changed_keys(old, self._by_name)
+        self._notify(changed)
+        return True
+
+    def update_directory(self, path):
+        """
+        Re-read only the metadata directories that appeared in or vanished from
+        one site directory since it was last read. Returns the changed keys.
+        """
+        if path not in self.paths:
+            return []
+        with self._lock:
+            if self._signature is None:
+                self.refresh()
+                return []
+            known = self._entries.get(path, {})
+            current = self._list_metadata_dirs(path)
+            affected = set()
+            for entry in set(known) - current:
+                affected.add(known.pop(entry).key)
+            for entry in current - set(known):
+                dist = read_distribution(entry)
+                if dist is not None:
+                    known[entry] = dist
+                    affected.add(dist.key)
+            self._entries[path] = known
+
+            old = {key: self._by_name.get(key) for key in affected}
+            self._resolve(affected)
+            changed = self._changed_keys(old, {key: self._by_name.get(key) for key in affected})
+
+            signature = list(self._signature)
+            signature[self.paths.index(path)] = self._stat(path)
+            self._signature = tuple(signature)
+        self._notify(changed)
+        return sorted(changed)
+
+    @staticmethod
+    def _list_metadata_dirs(path):
+        try:
+            return {entry.path for entry in os.scandir(path) if entry.name.endswith(METADATA_SUFFIXES)}
+        except OSError:
+            return set()
+
+    def _scan_directory(self, path):
+        entries = {}
+        for entry in sorted(self._list_metadata_dirs(path)):
+            dist = read_distribution(entry)
+            if dist is not None:
+                entries[entry] = dist
+        return entries
+
+    def _resolve(self, keys):
+        for key in set(keys):
+            self._by_name.pop(key, None)
+            for path in self.paths:
+                match = next((dist for entry, dist in sorted(self._entries.get(path, {}).items())
+                              if dist.key == key), None)
+                if match is not None:
+                    self._by_name[key] = match
+                    break
+
+    @staticmethod
+    def _changed_keys(old, new):
+        changed = set()
+        for key in set(old) | set(new):
+            before, after = old.get(key), new.get(key)
+            if (before and (before.version, before.path)) != (after and (after.version, after.path)):
+                changed.add(key)
+        return changed
+
+    def get(self, name):
+        """The installed distribution called name (any spelling), or None."""
+        name = (name or '').strip()
+        if not name:
+            return None
+        self.refresh()
+        with self._lock:
+            return self._by_name.get(canonicalize_name(name))
+
+    def is_installed(self, name):
+        return self.get(name) is not None
+
+    def version(self, name):
+        dist = self.get(name)
+        return dist.version if dist else None
+
+    def distributions(self):
+        self.refresh()
+        with self._lock:
+            return sorted(self._by_name.values(), key=lambda dist: dist.key)
+
+
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+
+def get_installed_index(python=None, paths=None):
+    """
+    The shared index for an interpreter's environment, created on first use.
+    paths skips asking the interpreter for its site-packages when they are already known.
+    """
+    python = python or sys.executable
+    with _indexes_lock:
+        index = _indexes.get(python)
+        if index is None:
+            index = _indexes[python] = InstalledIndex(paths if paths is not None else site_paths(python))
+        return index
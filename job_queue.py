@@ -0,0 +1,213 @@
+"""
+Persistent, prioritized job queue for install / update / uninstall jobs.
+
+Jobs that target the same environment (interpreter) run one at a time, so an
+update and an uninstall can no longer race on the same site-packages. Jobs
+for different environments run in parallel. Nothing here ever waits on a
+worker thread: completion is signalled, and finished threads are dropped
+once Qt reports them finished.
+
+Queued jobs are saved to disk on every change. Jobs left over from a
+previous session come back "held" and only run once the user resumes them.
+"""
+
+from PySide6.QtCore import QObject, Signal, Slot
+import itertools
+import json
+import time
+import sys
+import os
+
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+PRIORITY_NAMES = {PRIORITY_HIGH: 'high', PRIORITY_NORMAL: 'normal', PRIORITY_LOW: 'low'}
+
+
+def default_state_path():
+    data_home = os.environ.get('XDG_DATA_HOME') or os.path.join(os.path.expanduser('~'), '.local', 'share')
+    return os.path.join(data_home, 'PythonModuleInstaller', 'jobs.json')
+
+
+class Job:
+    def __init__(self, job_id, action, modules, env=None, priority=PRIORITY_NORMAL, offline=False,
+                 held=False, created=None):
+        self.id = job_id
+        self.action = action
+        self.modules = list(modules)
+        self.env = env or sys.executable  # interpreter the job runs against
+        self.priority = priority
+        self.offline = offline
+        self.held = held
+        self.created = created or time.time()
+        self.plan = None  # InstallPlan, only kept in memory
+
+        self.state = 'queued'  # queued, running, done, failed, cancelled
+        self.succeeded = []
+        self.not_installed = []
+        self.errors = []
+
+    def sort_key(self):
+        return self.priority, self.created, self.id
+
+    def describe(self):
+        modules = ', '.join(self.modules[:4]) + (f" (+{len(self.modules) - 4})" if len(self.modules) > 4 else '')
+        state = 'held' if self.held and self.state == 'queued' else self.state
+        return f"#{self.id} [{state}] {self.action} {modules}  ({PRIORITY_NAMES[self.priority]}, {self.env})"
+
+    def to_dict(self):
+        return {'id': self.id, 'action': self.action, 'modules': self.modules, 'env': self.env,
+                'priority': self.priority, 'offline': self.offline, 'created': self.created}
+
+    @classmethod
+    def from_dict(cls, data, held=True):
+        return cls(data['id'], data['action'], data['modules'], data.get('env'),
+                   data.get('priority', PRIORITY_NORMAL), data.get('offline', False),
+                   held=held, created=data.get('created'))
+
+
+class JobQueue(QObject):
+    job_started = Signal(object)
+    job_finished = Signal(object)
+    queue_changed = Signal()
+
+    def __init__(self, thread_factory, state_path=None, parent=None):
+        super().__init__(parent)
+        # thread_factory(job) -> QThread with a `finished` signal and requestInterruption()
+        self.thread_factory = thread_factory
+        self.state_path = state_path or default_state_path()
+        self.pending = []
+        self.running = {}  # env -> (job, thread)
+        self.history = []  # finished jobs of this session, newest last
+        self._retired = []  # threads that reported finished but may not have exited yet
+        self._ids = itertools.count(1)
+        self.load()
+
+    def submit(self, action, modules, env=None, priority=PRIORITY_NORMAL, offline=False, plan=None):
+        job = Job(next(self._ids), action, modules, env, priority, offline)
+        job.plan = plan
+        self.pending.append(job)
+        self._changed()
+        self.schedule()
+        return job
+
+    def jobs(self):
+        """Every job of this session: running, then queued in run order, then finished."""
+        running = [job for job, _ in self.running.values()]
+        return running + sorted(self.pending, key=Job.sort_key) + list(reversed(self.history))
+
+    def find(self, job_id):
+        for job in self.jobs():
+            if job.id == job_id:
+                return job
+        return None
+
+    def running_jobs(self):
+        return [job for job, _ in self.running.values()]
+
+    def is_busy(self):
+        return bool(self.running)
+
+    def schedule(self):
+        """Start the best queued job for every environment that is idle."""
+        self._retired = [thread for thread in self._retired if not thread.isFinished()]
+        for job in sorted(self.pending, key=Job.sort_key):
+            if job.held or job.env in self.running:
+                continue
+            self.pending.remove(job)
+            job.state = 'running'
+            thread = self.thread_factory(job)
+            # A bound slot, so the queue reacts on its own (GUI) thread, not the worker's
+            thread.finished.connect(self._on_thread_finished)
+            self.running[job.env] = (job, thread)
+            self.job_started.emit(job)
+            thread.start()
+        self._changed()
+
+    @Slot()
+    def _on_thread_finished(self):
+        thread = self.sender()
+        for env, (job, running_thread) in list(self.running.items()):
+            if running_thread is thread:
+                break
+        else:
+            return
+        del self.running[env]
+        self._retired.append(thread)
+        if job.state == 'running':
+            job.state = 'failed' if job.errors else 'done'
+        self.history.append(job)
+        self.job_finished.emit(job)
+        self.schedule()
+
+    def cancel(self, job_id):
+        """Drop a queued job, or interrupt it when it is running. Returns the job or None."""
+        for job in self.pending:
+            if job.id == job_id:
+                self.pending.remove(job)
+                job.state = 'cancelled'
+                self.history.append(job)
+                self._changed()
+                return job
+        for job, thread in self.running.values():
+            if job.id == job_id:
+                job.state = 'cancelled'
+                thread.requestInterruption()
+                return job
+        return None
+
+    def cancel_running(self):
+        jobs = self.running_jobs()
+        for job in jobs:
+            self.cancel(job.id)
+        return jobs
+
+    def set_priority(self, job_id, priority):
+        for job in self.pending:
+            if job.id == job_id:
+                job.priority = priority
+                self._changed()
+                return True
+        return False
+
+    def resume_held(self):
+        for job in self.pending:
+            job.held = False
+        self.schedule()
+
+    def shutdown(self, timeout_ms=5000):
+        """Interrupt running jobs on exit. They are saved and come back held next session."""
+        for job, thread in list(self.running.values()):
+            thread.requestInterruption()
+        self.save(include_running=True)
+        for job, thread in list(self.running.values()):
+            thread.wait(timeout_ms)
+
+    def _changed(self):
+        self.save()
+        self.queue_changed.emit()
+
+    def save(self, include_running=False):
+        jobs = sorted(self.pending, key=Job.sort_key)
+        if include_running:
+            jobs = self.running_jobs() + jobs
+        try:
+            os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+            temp_path = self.state_path + '.tmp'
+            with open(temp_path, 'w') as state_file:
+                json.dump([job.to_dict() for job in jobs], state_file)
+            os.replace(temp_path, self.state_path)
+        except OSError:
+            pass
+
+    def load(self):
+        try:
+            with open(self.state_path) as state_file:
+                saved = json.load(state_file)
+        except (OSError, ValueError):
+            return
+        self.pending = [Job.from_dict(data, held=True) for data in saved]
+        if self.pending:
+            self._ids = itertools.count(max(job.id for job in self.pending) + 1)
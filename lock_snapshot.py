@@ -0,0 +1,120 @@
+"""
+Environment fingerprints and lock snapshots.
+
+The fingerprint is a sha256 over the sorted `name==version tags` lines of
+every installed distribution, taken from the installed index. Names are
+normalized and versions put in canonical form, so two environments with
+the same package set get the same fingerprint no matter how the names
+were spelled. Wheel tags are part of it, so a linux and a
+windows build of the same version do not compare equal. Tags are read once
+per distribution and kept, which makes a repeat fingerprint a pass over the
+index and one hash.
+
+A lock snapshot is the same data written to JSON, together with fully
+pinned requirements that the batch install engine can replay.
+"""
+
+from packaging.version import Version, InvalidVersion
+from installed_index import get_installed_index
+from outdated import python_version_of
+import hashlib
+import json
+import time
+import sys
+import os
+
+
+SNAPSHOT_FORMAT = 1
+
+
+def canonical_version(text):
+    try:
+        return str(Version(text))
+    except InvalidVersion:
+        return text
+
+
+def fingerprint_of(distributions):
+    lines = sorted(f"{dist.key}=={canonical_version(dist.version)} {','.join(dist.tags)}".rstrip()
+                   for dist in distributions)
+    return hashlib.sha256('\n'.join(lines).encode()).hexdigest()
+
+
+def environment_fingerprint(python=None):
+    """Stable hex digest of an environment's package set."""
+    return fingerprint_of(get_installed_index(python).distributions())
+
+
+def short_fingerprint(fingerprint):
+    return fingerprint[:12]
+
+
+def pinned_requirement(dist):
+    """
+    A requirement that reinstalls exactly this distribution, None when it cannot be replayed
+    (installed from a local directory or an editable checkout).
+    """
+    direct_url = dist.direct_url
+    if direct_url is None:
+        return f"{dist.name}=={dist.version}"
+    url = direct_url.get('url', '')
+    if direct_url.get('dir_info') is not None or url.startswith('file:'):
+        return None
+    vcs_info = direct_url.get('vcs_info')
+    if vcs_info:
+        return f"{dist.name} @ {vcs_info['vcs']}+{url}@{vcs_info.get('commit_id', '')}"
+    return f"{dist.name} @ {url}"
+
+
+def create_snapshot(python=None):
+    """Lock snapshot of an environment as a JSON-ready dict."""
+    distributions = get_installed_index(python).distributions()
+    packages, skipped = [], []
+    for dist in distributions:
+        requirement = pinned_requirement(dist)
+        if requirement is None:
+            skipped.append(dist.name)
+        packages.append({'name': dist.name, 'version': dist.version, 'tags': list(dist.tags),
+                         'requirement': requirement})
+    return {
+        'format': SNAPSHOT_FORMAT,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': python_version_of(python),
+        'platform': sys.platform,
+        'fingerprint': fingerprint_of(distributions),
+        'packages': packages,
+        'skipped': skipped,  # cannot be reinstalled from a requirement
+    }
+
+
+def write_snapshot(path, python=None):
+    snapshot = create_snapshot(python)
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w') as snapshot_file:
+        json.dump(snapshot, snapshot_file, indent=2)
+    os.replace(temp_path, path)
+    return snapshot
+
+
+def read_snapshot(path):
+    """Load a snapshot written by write_snapshot. Raises ValueError when the file is not one."""
+    with open(path) as snapshot_file:
+        snapshot = json.load(snapshot_file)
+    if not isinstance(snapshot, dict) or snapshot.get('format') != SNAPSHOT_FORMAT:
+        raise ValueError(f"{path} is not a lock snapshot")
+    return snapshot
+
+
+def replay_requirements(snapshot, python=None):
+    """The snapshot's pinned requirements that the environment does not already satisfy."""
+    index = get_installed_index(python)
+    requirements = []
+    for package in snapshot.get('packages', []):
+        requirement = package.get('requirement')
+        if not requirement:
+            continue
+        installed = index.get(package['name'])
+        if installed is not None and canonical_version(installed.version) == canonical_version(package['version']):
+            continue
+        requirements.append(requirement)
+    return requirements
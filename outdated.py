@@ -0,0 +1,91 @@
+"""
+Outdated-package detection.
+
+Looks up the latest release of every installed distribution at once: one
+project page per distribution, fetched in parallel over the index client's
+pooled session and revalidated against its on-disk cache. The result maps
+each outdated distribution's normalized name to (installed, latest), so
+the update action and the module list can use it without asking pip.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from packaging.version import Version, InvalidVersion
+from index_client import IndexClient, IndexClientError, POOL_SIZE
+from installed_index import get_installed_index
+import subprocess
+import threading
+import sys
+import os
+
+
+class OutdatedResult:
+    def __init__(self, outdated, checked, errors):
+        self.outdated = outdated  # normalized name -> (installed version, latest version)
+        self.checked = checked  # how many distributions were looked up
+        self.errors = errors  # normalized name -> error message
+
+    def is_outdated(self, key):
+        return key in self.outdated
+
+    def latest(self, key):
+        entry = self.outdated.get(key)
+        return entry[1] if entry else None
+
+
+_python_versions = {}
+
+
+def python_version_of(python=None):
+    """'3.11.7' for an interpreter, so Requires-Python can be checked against the environment."""
+    python = python or sys.executable
+    if os.path.abspath(python) == os.path.abspath(sys.executable):
+        return '.'.join(str(part) for part in sys.version_info[:3])
+    if python not in _python_versions:
+        try:
+            _python_versions[python] = subprocess.check_output(
+                [python, '-c', 'import platform; print(platform.python_version())'], text=True, timeout=30).strip()
+        except (OSError, subprocess.SubprocessError):
+            return None
+    return _python_versions[python]
+
+
+class OutdatedChecker:
+    def __init__(self, python=None, client=None, max_workers=POOL_SIZE, should_stop=None):
+        self.python = python or sys.executable
+        self.client = client or IndexClient()
+        self.max_workers = max(1, max_workers)
+        self.should_stop = should_stop or (lambda: False)
+
+    def check(self, distributions=None):
+        """Compare every installed distribution (or the given ones) with the index. Returns an OutdatedResult."""
+        if distributions is None:
+            distributions = get_installed_index(self.python).distributions()
+        python_version = python_version_of(self.python)
+        outdated, errors = {}, {}
+        lock = threading.Lock()
+
+        def check_one(dist):
+            if self.should_stop():
+                return
+            try:
+                installed = Version(dist.version)
+            except InvalidVersion:
+                return
+            try:
+                page = self.client.project(dist.name)
+            except IndexClientError as e:
+                with lock:
+                    errors[dist.key] = str(e)
+                return
+            if page is None:
+                return  # not on this index, e.g. a local package
+            # Pre-releases are only offered to someone who already runs one
+            latest = page.latest(include_prereleases=installed.is_prerelease, python_version=python_version)
+            if latest is not None and latest > installed:
+                with lock:
+                    outdated[dist.key] = (dist.version, str(latest))
+
+        if distributions:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(distributions))) as pool:
+                list(pool.map(check_one, distributions))
+        return OutdatedResult(outdated, len(distributions), errors)
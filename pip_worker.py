@@ -0,0 +1,291 @@
+"""
+Long-lived pip worker.
+
+Starting `python -m pip ...` costs several hundred milliseconds of interpreter
+startup and imports before pip does any work. The worker is started once per
+app session (per target interpreter) and takes JSON requests, one per line, on
+its stdin:
+
+    {"id": 1, "command": "show", "names": ["numpy", "six"]}
+    {"id": 2, "command": "uninstall", "names": ["six"]}
+    {"id": 3, "command": "install", "args": ["--upgrade", "six"]}
+
+Metadata queries (`show`) are answered from importlib.metadata and never import
+pip. pip itself is imported once, on the first install/uninstall request, and
+reused. While a pip command runs, its output is streamed back as
+{"id": .., "output": line} messages before the final {"id": .., "result": ..}.
+
+This file is both the client (PipWorker, imported by the GUI) and the worker
+(run as a script by the target interpreter), so the worker side only uses the
+standard library.
+"""
+
+import contextlib
+import subprocess
+import threading
+import queue
+import json
+import sys
+import re
+import os
+
+
+STOP_POLL_INTERVAL = 0.1  # seconds between cancellation checks while a request runs
+
+# Runs this file in the target interpreter without putting the app directory (or the
+# working directory, for -c) on its sys.path, where it would shadow installed modules
+WORKER_BOOTSTRAP = "import runpy, sys; del sys.path[0]; runpy.run_path(sys.argv[1], run_name='__main__')"
+
+
+def normalize_name(name):
+    # PEP 503 normalization, kept local so the worker does not need `packaging`
+    return re.sub(r'[-_.]+', '-', name).lower()
+
+
+##########################################################################################
+                                # Worker side
+
+class _LineWriter:
+    """File-like object that forwards every complete line to a callback."""
+
+    def __init__(self, emit):
+        self.emit = emit
+        self.buffer = ''
+
+    def write(self, text):
+        self.buffer += text
+        while '\n' in self.buffer:
+            line, self.buffer = self.buffer.split('\n', 1)
+            self.emit(line + '\n')
+        return len(text)
+
+    def flush(self):
+        if self.buffer:
+            self.emit(self.buffer)
+            self.buffer = ''
+
+    def isatty(self):
+        return False
+
+
+class _WorkerServer:
+    def __init__(self, protocol_out):
+        self.protocol_out = protocol_out
+        self.pip_main = None
+
+    def send(self, message):
+        self.protocol_out.write(json.dumps(message) + '\n')
+        self.protocol_out.flush()
+
+    def show(self, names):
+        import importlib
+        import importlib.metadata
+
+        # pip may have changed site-packages since the last request
+        importlib.invalidate_caches()
+        wanted = {normalize_name(name): name for name in names}
+        found = {}
+        for dist in importlib.metadata.distributions():
+            dist_name = dist.metadata['Name']
+            if not dist_name:
+                continue
+            key = normalize_name(dist_name)
+            if key in wanted and wanted[key] not in found:
+                found[wanted[key]] = {
+                    'name': dist_name,
+                    'version': dist.version,
+                    'summary': dist.metadata.get('Summary', ''),
+                    'requires': dist.requires or [],
+                }
+        return {name: found.get(name) for name in names}
+
+    def run_pip(self, request_id, args):
+        if self.pip_main is None:
+            from pip._internal.cli.main import main as pip_main
+            self.pip_main = pip_main
+
+        lines = []
+
+        def emit(line):
+            lines.append(line)
+            self.send({'id': request_id, 'output': line})
+
+        writer = _LineWriter(emit)
+        with contextlib.redirect_stdout(writer), contextlib.redirect_stderr(writer):
+            try:
+                returncode = self.pip_main(list(args))
+            except SystemExit as e:
+                returncode = e.code if isinstance(e.code, int) else 1
+            writer.flush()
+        return {'returncode': returncode, 'output': lines}
+
+    def handle(self, request):
+        command = request.get('command')
+        if command == 'ping':
+            return {'pid': os.getpid(), 'path': sys.path}
+        if command == 'show':
+            return self.show(request.get('names', []))
+        if command == 'install':
+            return self.run_pip(request['id'], ['install', *request.get('args', [])])
+        if command == 'uninstall':
+            return self.run_pip(request['id'], ['uninstall', '-y', *request.get('names', [])])
+        raise ValueError(f"Unknown command: {command}")
+
+    def serve(self, protocol_in):
+        for raw in protocol_in:
+            if not raw.strip():
+                continue
+            request = json.loads(raw)
+            try:
+                self.send({'id': request.get('id'), 'result': self.handle(request)})
+            except Exception as e:
+                self.send({'id': request.get('id'), 'error': f"{type(e).__name__}: {e}"})
+
+
+def serve():
+    # Keep a private copy of stdout for the protocol and point fd 1 at stderr,
+    # so anything else that prints (pip, build backends) cannot corrupt it.
+    protocol_out = os.fdopen(os.dup(sys.stdout.fileno()), 'w', encoding='utf-8')
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    _WorkerServer(protocol_out).serve(sys.stdin)
+
+
+##########################################################################################
+                                # Client side
+
+class PipWorkerError(RuntimeError):
+    pass
+
+
+class PipWorker:
+    def __init__(self, python=None):
+        self.python = python or sys.executable
+        self.proc = None
+        self._messages = None  # lines read from the running worker, None once its stdout closed
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def start(self):
+        if self.proc and self.proc.poll() is None:
+            return
+        from process_supervisor import new_group_kwargs
+
+        self.proc = subprocess.Popen(self.command(),
+                                     stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                     stderr=subprocess.DEVNULL, text=True, bufsize=1,
+                                     **new_group_kwargs())
+        # stdout is read on a thread, so a waiting request can still notice a cancellation
+        self._messages = queue.Queue()
+        threading.Thread(target=self._read, args=(self.proc.stdout, self._messages), daemon=True).start()
+
+    def command(self):
+        return [self.python, '-c', WORKER_BOOTSTRAP, os.path.abspath(__file__)]
+
+    @staticmethod
+    def _read(stdout, messages):
+        try:
+            for raw in stdout:
+                messages.put(raw)
+        except (OSError, ValueError):
+            pass
+        messages.put(None)
+
+    def is_running(self):
+        return self.proc is not None and self.proc.poll() is None
+
+    def request(self, command, on_output=None, should_stop=None, **params):
+        """
+        Send one request and wait for its result. Output lines are passed to on_output as they
+        arrive. When should_stop() turns true the worker is killed and PipWorkerError raised.
+        """
+        with self._lock:
+            self.start()
+            self._next_id += 1
+            request_id = self._next_id
+            messages = self._messages
+            try:
+                self.proc.stdin.write(json.dumps({'id': request_id, 'command': command, **params}) + '\n')
+                self.proc.stdin.flush()
+                while True:
+                    # Checked before every message, a worker that never stops printing is still cancelled in time
+                    if should_stop and should_stop():
+                        self.kill()
+                        raise PipWorkerError("pip worker request cancelled")
+                    try:
+                        raw = messages.get(timeout=STOP_POLL_INTERVAL)
+                    except queue.Empty:
+                        continue
+                    if raw is None:
+                        break
+                    message = json.loads(raw)
+                    if message.get('id') != request_id:
+                        continue
+                    if 'output' in message:
+                        if on_output:
+                            on_output(message['output'])
+                        continue
+                    if 'error' in message:
+                        raise PipWorkerError(message['error'])
+                    return message['result']
+            except (BrokenPipeError, ValueError) as e:
+                self.kill()
+                raise PipWorkerError(f"pip worker failed: {e}")
+            # stdout closed: the worker died (or was killed to cancel a job)
+            self.kill()
+            raise PipWorkerError("pip worker exited unexpectedly")
+
+    def show(self, names):
+        """Metadata for each name, or None when it is not installed."""
+        return self.request('show', names=list(names))
+
+    def is_installed(self, name):
+        return self.show([name]).get(name) is not None
+
+    def install(self, args, on_output=None, should_stop=None):
+        return self.request('install', on_output=on_output, should_stop=should_stop, args=list(args))
+
+    def uninstall(self, names, on_output=None, should_stop=None):
+        return self.request('uninstall', on_output=on_output, should_stop=should_stop, names=list(names))
+
+    def kill(self):
+        """Stop the worker and anything pip started, e.g. to cancel a running command. It restarts on the next request."""
+        # Imported here, the worker side of this file only uses the standard library
+        from process_supervisor import kill_process_tree
+
+        if self.proc:
+            kill_process_tree(self.proc)
+
+    def close(self):
+        if self.proc and self.proc.poll() is None:
+            try:
+                self.proc.stdin.close()
+                self.proc.wait(timeout=2)
+            except (OSError, subprocess.TimeoutExpired):
+                self.kill()
+        self.proc = None
+
+
+_session_workers = {}
+_session_lock = threading.Lock()
+
+
+def get_session_worker(python=None):
+    """The shared worker for an interpreter, created on first use and kept for the app session."""
+    python = python or sys.executable
+    with _session_lock:
+        worker = _session_workers.get(python)
+        if worker is None:
+            worker = _session_workers[python] = PipWorker(python)
+        return worker
+
+
+def shutdown_session_workers():
+    with _session_lock:
+        workers = list(_session_workers.values())
+        _session_workers.clear()
+    for worker in workers:
+        worker.close()
+
+
+if __name__ == '__main__':
+    serve()
@@ -0,0 +1,282 @@
+"""
+Subprocess supervisor used by everything in the app that streams command output.
+
+Reading stdout line by line and only draining stderr at the end can hang: a
+child that writes a lot to stderr (compiler output from an sdist build) fills
+that pipe and blocks forever. SupervisedProcess reads both streams at the
+same time (selectors on POSIX, one reader thread per stream elsewhere),
+timestamps every line, and hands lines to the caller in chunks so Qt signals
+fire a few times a second instead of once per line.
+
+Each process runs in its own process group, so cancelling stops the whole
+tree (pip and the compilers it spawned), escalating from SIGTERM to SIGKILL
+after a grace period.
+"""
+
+import subprocess
+import selectors
+import threading
+import psutil
+import signal
+import codecs
+import queue
+import time
+import os
+
+
+TERMINATE_GRACE = 2.0  # seconds between SIGTERM and SIGKILL
+
+
+def new_group_kwargs():
+    """Popen arguments that start the child in its own process group."""
+    if os.name == 'posix':
+        return {'start_new_session': True}
+    return {'creationflags': subprocess.CREATE_NEW_PROCESS_GROUP}
+
+
+def _signal_group(pgid, sig):
+    try:
+        os.killpg(pgid, sig)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+def kill_process_tree(proc, grace=TERMINATE_GRACE):
+    """
+    Stop proc and all of its descendants: SIGTERM first, SIGKILL for whatever
+    is still alive after grace seconds. Returns how long it took, in seconds.
+    """
+    started = time.monotonic()
+    try:
+        parent = psutil.Process(proc.pid)
+        tree = [parent] + parent.children(recursive=True)
+    except psutil.Error:
+        tree = []
+
+    # The group catches children we could not list, psutil catches the ones
+    # that moved to a group of their own
+    if os.name == 'posix':
+        _signal_group(proc.pid, signal.SIGTERM)
+    for member in tree:
+        try:
+            member.terminate()
+        except psutil.Error:
+            pass
+
+    _, alive = psutil.wait_procs(tree, timeout=grace)
+    if alive:
+        if os.name == 'posix':
+            _signal_group(proc.pid, signal.SIGKILL)
+        for member in alive:
+            try:
+                member.kill()
+            except psutil.Error:
+                pass
+        psutil.wait_procs(alive, timeout=grace)
+
+    try:
+        proc.wait(timeout=grace)
+    except subprocess.TimeoutExpired:
+        pass
+    return time.monotonic() - started
+
+
+class OutputLine:
+    __slots__ = ('stream', 'text', 'timestamp')
+
+    def __init__(self, stream, text, timestamp):
+        self.stream = stream  # 'stdout' or 'stderr'
+        self.text = text
+        self.timestamp = timestamp
+
+    def __repr__(self):
+        return f"OutputLine({self.stream!r}, {self.text!r})"
+
+
+class _LineSplitter:
+    """Incremental bytes -> text lines for one stream."""
+
+    def __init__(self, stream, encoding):
+        self.stream = stream
+        self.decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        self.buffer = ''
+
+    def feed(self, data, final=False):
+        self.buffer += self.decoder.decode(data, final)
+        now = time.time()
+        lines = []
+        while True:
+            index = self.buffer.find('\n')
+            if index < 0:
+                break
+            lines.append(OutputLine(self.stream, self.buffer[:index + 1], now))
+            self.buffer = self.buffer[index + 1:]
+        if final and self.buffer:
+            lines.append(OutputLine(self.stream, self.buffer, now))
+            self.buffer = ''
+        return lines
+
+
+class SupervisedProcess:
+    def __init__(self, command, on_line=None, on_chunk=None, should_stop=None, input_text=None,
+                 chunk_interval=0.1, chunk_size=200, keep_lines=True, encoding='utf-8',
+                 merge_stderr=False, grace=TERMINATE_GRACE, **popen_kwargs):
+        self.command = command
+        self.on_line = on_line  # called for every OutputLine as soon as it is read
+        self.on_chunk = on_chunk  # called with a list of OutputLine, at most every chunk_interval
+        self.should_stop = should_stop or (lambda: False)
+        self.input_text = input_text
+        self.chunk_interval = chunk_interval
+        self.chunk_size = chunk_size
+        self.keep_lines = keep_lines
+        self.encoding = encoding
+        self.merge_stderr = merge_stderr
+        self.grace = grace
+        self.popen_kwargs = {**new_group_kwargs(), **popen_kwargs}
+
+        self.proc = None
+        self.lines = []
+        self.stopped = False
+        self.cancel_duration = None  # seconds it took to stop the process tree
+        self._terminate_lock = threading.Lock()
+        self._pending = []
+        self._last_flush = 0.0
+
+    @property
+    def pid(self):
+        return self.proc.pid if self.proc else None
+
+    @property
+    def returncode(self):
+        return self.proc.returncode if self.proc else None
+
+    def start(self):
+        self.proc = subprocess.Popen(
+            self.command,
+            stdin=subprocess.PIPE if self.input_text is not None else self.popen_kwargs.pop('stdin', None),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT if self.merge_stderr else subprocess.PIPE,
+            **self.popen_kwargs)
+        if self.input_text is not None:
+            try:
+                self.proc.stdin.write(self.input_text.encode(self.encoding))
+                self.proc.stdin.close()
+            except BrokenPipeError:
+                pass
+        return self
+
+    def run(self):
+        """Start the process, stream its output until it exits, and return its exit code."""
+        self.start()
+        return self.wait()
+
+    def wait(self):
+        streams = {self.proc.stdout: _LineSplitter('stdout', self.encoding)}
+        if self.proc.stderr is not None:
+            streams[self.proc.stderr] = _LineSplitter('stderr', self.encoding)
+
+        if os.name == 'posix':
+            self._read_with_selectors(streams)
+        else:
+            self._read_with_threads(streams)
+
+        self.proc.wait()
+        self._flush()
+        return self.proc.returncode
+
+    def _read_with_selectors(self, streams):
+        selector = selectors.DefaultSelector()
+        for pipe in streams:
+            os.set_blocking(pipe.fileno(), False)
+            selector.register(pipe, selectors.EVENT_READ)
+        try:
+            while selector.get_map():
+                if self._check_stop():
+                    break
+                for key, _ in selector.select(timeout=self.chunk_interval):
+                    try:
+                        data = os.read(key.fileobj.fileno(), 65536)
+                    except BlockingIOError:
+                        continue
+                    splitter = streams[key.fileobj]
+                    if not data:
+                        selector.unregister(key.fileobj)
+                        self._deliver(splitter.feed(b'', final=True))
+                        continue
+                    self._deliver(splitter.feed(data))
+                self._maybe_flush()
+        finally:
+            selector.close()
+            for pipe in streams:
+                pipe.close()
+
+    def _read_with_threads(self, streams):
+        chunks = queue.Queue()
+
+        def reader(pipe):
+            for data in iter(lambda: pipe.read1(65536) if hasattr(pipe, 'read1') else pipe.read(65536), b''):
+                chunks.put((pipe, data))
+            chunks.put((pipe, b''))
+
+        for pipe in streams:
+            threading.Thread(target=reader, args=(pipe,), daemon=True).start()
+
+        open_streams = len(streams)
+        while open_streams:
+            if self._check_stop():
+                break
+            try:
+                pipe, data = chunks.get(timeout=self.chunk_interval)
+            except queue.Empty:
+                self._maybe_flush()
+                continue
+            if not data:
+                open_streams -= 1
+                self._deliver(streams[pipe].feed(b'', final=True))
+            else:
+                self._deliver(streams[pipe].feed(data))
+            self._maybe_flush()
+
+    def _check_stop(self):
+        if not self.stopped and self.should_stop():
+            self.stopped = True
+            self.terminate()
+        return self.stopped
+
+    def terminate(self):
+        """Stop the whole process tree. Safe to call more than once, and from another thread."""
+        with self._terminate_lock:
+            if self.proc and self.cancel_duration is None:
+                self.cancel_duration = kill_process_tree(self.proc, self.grace)
+
+    def _deliver(self, lines):
+        for line in lines:
+            if self.keep_lines:
+                self.lines.append(line)
+            if self.on_line:
+                self.on_line(line)
+        if self.on_chunk:
+            self._pending.extend(lines)
+            if len(self._pending) >= self.chunk_size:
+                self._flush()
+
+    def _maybe_flush(self):
+        if self._pending and time.monotonic() - self._last_flush >= self.chunk_interval:
+            self._flush()
+
+    def _flush(self):
+        self._last_flush = time.monotonic()
+        if self._pending and self.on_chunk:
+            pending, self._pending = self._pending, []
+            self.on_chunk(pending)
+
+    def output(self, stream=None):
+        """Collected output as text, optionally only one stream."""
+        return ''.join(line.text for line in self.lines if stream is None or line.stream == stream)
+
+
+def run_supervised(command, **kwargs):
+    """Run command under a SupervisedProcess. Returns the finished SupervisedProcess."""
+    supervised = SupervisedProcess(command, **kwargs)
+    supervised.run()
+    return supervised
@@ -0,0 +1,168 @@
+"""
+Byte-accurate progress reporting for pip jobs.
+
+pip (24.1+) prints machine-readable progress with `--progress-bar raw`:
+
+    Downloading https://.../numpy-2.1.0-cp311-....whl (16.3 MB)
+    Progress 262144 of 17068032
+    Progress 5505024 of 17068032
+
+ProgressTracker reads those lines from every pip process of a job (several
+run in parallel during downloads, so each process feeds with its own key),
+keeps bytes done / total per file, and sends one summed snapshot to a
+callback at a capped rate instead of once per line.
+"""
+
+import threading
+import time
+import re
+
+
+RAW_PROGRESS_ARGS = ['--progress-bar', 'raw']
+RAW_PROGRESS_MIN_PIP = (24, 1)
+
+DOWNLOADING_RE = re.compile(r'^\s*(Downloading|Using cached)\s+(\S+)(?:\s+\(([\d.]+)\s*(bytes|kB|MB|GB)\))?')
+PROGRESS_RE = re.compile(r'^\s*Progress (\d+) of (\d+)')
+
+# pip's format_size() uses powers of 1000
+UNITS = {'bytes': 1, 'kB': 1000, 'MB': 1000 ** 2, 'GB': 1000 ** 3}
+
+
+def format_bytes(size):
+    for unit in ('bytes', 'kB', 'MB'):
+        if size < 1000:
+            return f"{size:.0f} {unit}" if unit == 'bytes' else f"{size:.1f} {unit}"
+        size /= 1000
+    return f"{size:.1f} GB"
+
+
+def supports_raw_progress(pip_version):
+    """Whether the given pip version string understands --progress-bar raw."""
+    parts = []
+    for part in pip_version.split('.')[:2]:
+        digits = re.match(r'\d+', part)
+        parts.append(int(digits.group()) if digits else 0)
+    return tuple(parts) >= RAW_PROGRESS_MIN_PIP
+
+
+class FileProgress:
+    def __init__(self, name, total=0, cached=False):
+        self.name = name
+        self.total = total
+        self.done = total if cached else 0
+        self.started = time.monotonic()
+        self.updated = self.started
+
+    @property
+    def rate(self):
+        elapsed = self.updated - self.started
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    @property
+    def finished(self):
+        return self.total > 0 and self.done >= self.total
+
+
+class ProgressTracker:
+    def __init__(self, on_update=None, max_rate=10):
+        self.on_update = on_update or (lambda snapshot: None)
+        self.min_interval = 1.0 / max_rate
+        self.files = {}
+        self.current = {}  # stream key -> name of the file that stream is downloading
+        self.started = time.monotonic()
+        self._last_emit = 0.0
+        self._lock = threading.Lock()
+
+    def add_expected(self, name, total):
+        """Register a file whose size is known before pip starts (e.g. from a resolution plan)."""
+        with self._lock:
+            if name not in self.files:
+                self.files[name] = FileProgress(name, total)
+
+    def feed(self, line, key=None):
+        """Consume one line of pip output from the stream identified by key."""
+        match = PROGRESS_RE.match(line)
+        if match:
+            done, total = int(match.group(1)), int(match.group(2))
+            with self._lock:
+                name = self.current.get(key)
+                if name is None:
+                    return
+                progress = self.files[name]
+                progress.done = done
+                progress.total = max(total, done)
+                progress.updated = time.monotonic()
+            self._maybe_emit()
+            return
+
+        match = DOWNLOADING_RE.match(line)
+        if match:
+            kind, url, size, unit = match.groups()
+            name = url.rsplit('/', 1)[-1].split('#', 1)[0]
+            total = int(float(size) * UNITS[unit]) if size else 0
+            with self._lock:
+                progress = self.files.get(name)
+                if progress is None:
+                    progress = self.files[name] = FileProgress(name, total)
+                elif total and not progress.total:
+                    progress.total = total
+                progress.started = progress.updated = time.monotonic()
+                # Cached files and small files (pip prints no progress under 512 kB)
+                # are complete as soon as they are announced
+                if kind == 'Using cached' or progress.total <= 512 * 1024:
+                    progress.done = progress.total
+                self.current[key] = name
+            self._maybe_emit()
+
+    def update_file(self, name, done, total=None):
+        """Direct byte count for a file the app downloads itself (no pip output to parse)."""
+        with self._lock:
+            progress = self.files.get(name)
+            if progress is None:
+                progress = self.files[name] = FileProgress(name, total or 0)
+            if total:
+                progress.total = total
+            progress.done = done
+            progress.updated = time.monotonic()
+        self._maybe_emit()
+
+    def finish_stream(self, key=None):
+        """The process behind key exited, whatever it was downloading is done."""
+        with self._lock:
+            name = self.current.pop(key, None)
+            if name is not None:
+                progress = self.files[name]
+                progress.done = progress.total = max(progress.done, progress.total)
+        self._maybe_emit()
+
+    def snapshot(self):
+        with self._lock:
+            files = list(self.files.values())
+        bytes_done = sum(f.done for f in files)
+        bytes_total = sum(f.total for f in files)
+        elapsed = time.monotonic() - self.started
+        rate = bytes_done / elapsed if elapsed > 0 else 0.0
+        remaining = max(bytes_total - bytes_done, 0)
+        return {
+            'bytes_done': bytes_done,
+            'bytes_total': bytes_total,
+            'percent': (100.0 * bytes_done / bytes_total) if bytes_total else 0.0,
+            'rate': rate,
+            'eta': (remaining / rate) if rate > 0 else None,
+            'files': [{'name': f.name, 'done': f.done, 'total': f.total, 'rate': f.rate}
+                      for f in files if not f.finished],
+        }
+
+    def _maybe_emit(self):
+        now = time.monotonic()
+        with self._lock:
+            if now - self._last_emit < self.min_interval:
+                return
+            self._last_emit = now
+        self.on_update(self.snapshot())
+
+    def flush(self):
+        """Send the final state regardless of the rate cap."""
+        with self._lock:
+            self._last_emit = time.monotonic()
+        self.on_update(self.snapshot())
@@ -0,0 +1,374 @@
+"""
+Search index over module names.
+
+Two structures answer a query without looking at every name:
+
+* a sorted array of normalized names, where the names starting with the
+  query are one contiguous range found with two bisections (the prefix
+  lookup a trie would give, at a fraction of the memory);
+* trigram postings, the ids of the names containing each three-letter
+  sequence, for matches inside a name.
+
+Names are compared in their PEP 503 normalized form, so `-`, `_` and `.`
+are interchangeable. Results are ranked by match quality (exact, prefix,
+start of a word inside the name, anywhere) and then by popularity. Every
+name's position in the popularity order (its rank) is precomputed, also
+aligned with the sorted array, so the best k of a prefix range is a
+selection over plain integers.
+When the candidates are a big share of all names they are found in
+popularity order instead: the names are also kept as one newline-separated
+string in that order, and str.find walks it at C speed until k matches
+turned up.
+
+When that leaves room, typos are forgiven: names sharing enough trigrams
+with the query are candidates, the most promising few get a bounded edit
+distance (adjacent transpositions count once) between the query and the
+start of the name, separators ignored, and a bounded heap keeps the best
+scores, where a lower distance and a higher popularity both count.
+"""
+
+from packaging.utils import canonicalize_name
+from collections import defaultdict, Counter
+from array import array
+import threading
+import heapq
+import bisect
+import math
+
+from catalog import DEFAULT_CATEGORY
+
+
+EXACT, PREFIX, WORD, SUBSTRING = range(4)
+WORD_SEPARATORS = '-'  # the only separator left in a normalized key
+
+RANGE_SELECT_LIMIT = 5000  # candidates up to this many are ranked directly, beyond it the popularity order is walked
+DEFAULT_LIMIT = 50
+
+FUZZY_MIN_LENGTH = 3  # shorter queries match too much to guess what was meant
+FUZZY_CANDIDATES = 100  # names sharing the most trigrams with the query that get an edit distance
+FUZZY_PREFIX_CANDIDATES = 50  # popular names starting like the query that get one too
+FUZZY_POSTINGS_BUDGET = 20000  # ids counted for shared trigrams, rarest trigrams first
+POPULARITY_WEIGHT = 1.0  # the most popular name scores like one edit less than an unknown one
+PARTIAL_PENALTY = 0.5  # matching only the start of a name scores worse than matching all of it
+
+
+def normalize(name):
+    return canonicalize_name(name.strip())
+
+
+def compact(key):
+    """A normalized key without its separators ('sci-kit' and 'scikit' compare equal)."""
+    return key.replace('-', '')
+
+
+def trigrams(key):
+    return {key[i:i + 3] for i in range(len(key) - 2)}
+
+
+def max_distance(query):
+    return 1 if len(query) < 6 else 2
+
+
+def prefix_distance(query, key, bound):
+    """
+    (distance, whole) for query and the closest start of key, where swapping two neighbouring
+    letters is one edit and whole tells whether that start is all of key. The distance is
+    bound + 1 once it is known to exceed bound.
+    """
+    length = len(key)
+    key = key[:len(query) + bound]  # A longer start is more than bound insertions away
+    size = len(key)
+    over = bound + 1
+    if size < len(query) - bound:
+        return over, False
+    # Only cells within bound of the diagonal can stay within bound
+    previous = None
+    current = [j if j <= bound else over for j in range(size + 1)]
+    before = ''
+    for i, letter in enumerate(query, 1):
+        row = [over] * (size + 1)
+        if i <= bound:
+            row[0] = i
+        best = left = row[0]
+        for j in range(i - bound if i > bound else 1, min(size, i + bound) + 1):
+            other = key[j - 1]
+            cost = current[j - 1] if letter == other else current[j - 1] + 1
+            if current[j] + 1 < cost:
+                cost = current[j] + 1
+            if left + 1 < cost:
+                cost = left + 1
+            if other == before and j > 1 and key[j - 2] == letter and previous[j - 2] + 1 < cost:
+                cost = previous[j - 2] + 1  # the two letters swapped
+            row[j] = left = cost
+            if cost < best:
+                best = cost
+        if best > bound:
+            return over, False
+        previous, current = current, row
+        before = letter
+    distance = min(current)
+    if distance > bound:
+        return over, False
+    return distance, length == size and current[-1] == distance
+
+
+class SearchIndex:
+    def __init__(self, entries=()):
+        """entries: (name, popularity, category) tuples; later duplicates of a name are ignored."""
+        self.names = []
+        self.keys = []
+        self.popularity = array('d')
+        self.categories = array('H')
+        self.category_ids = {}
+        self.max_popularity = 0.0
+        self._ids = {}
+        self._lock = threading.Lock()  # searches run off the GUI thread while names are added
+        for name, popularity, category in entries:
+            self._append(name, popularity, category)
+        self._build()
+
+    def _category_id(self, category):
+        return self.category_ids.setdefault(category or '', len(self.category_ids))
+
+    def _append(self, name, popularity=0.0, category=None):
+        key = normalize(name)
+        if not key or key in self._ids:
+            return None
+        entry_id = len(self.names)
+        self._ids[key] = entry_id
+        self.names.append(name.strip())
+        self.keys.append(key)
+        self.popularity.append(popularity or 0.0)
+        self.max_popularity = max(self.max_popularity, popularity or 0.0)
+        self.categories.append(self._category_id(category))
+        return entry_id
+
+    def _build(self):
+        keys = self.keys
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        self.sorted_keys = [keys[i] for i in order]
+        self.sorted_ids = array('I', order)
+
+        popularity = self.popularity
+        self.by_popularity = array('I', sorted(range(len(keys)), key=lambda i: (-popularity[i], len(keys[i]), keys[i])))
+        self.rank = array('I', bytes(4 * len(keys)))
+        for position, entry_id in enumerate(self.by_popularity):
+            self.rank[entry_id] = position
+        self.sorted_ranks = array('I', (self.rank[entry_id] for entry_id in order))
+
+        # Keys in popularity order, each followed by a newline; offsets[rank] is where a key starts
+        self.offsets = array('I')
+        offset = 1
+        for entry_id in self.by_popularity:
+            self.offsets.append(offset)
+            offset += len(keys[entry_id]) + 1
+        self.text = '\n' + ''.join(keys[entry_id] + '\n' for entry_id in self.by_popularity)
+
+        postings = defaultdict(lambda: array('I'))
+        for entry_id, key in enumerate(keys):
+            for trigram in trigrams(key):
+                postings[trigram].append(entry_id)
+        self.postings = dict(postings)
+
+        # One- and two-letter queries are answered from the trigrams that contain them;
+        # keys shorter than a trigram are few and simply checked
+        self.short_grams = defaultdict(list)
+        for trigram in self.postings:
+            self._add_short_grams(trigram)
+        self.short_ids = [entry_id for entry_id, key in enumerate(keys) if len(key) < 3]
+
+    def _add_short_grams(self, trigram):
+        for gram in {trigram[0], trigram[1], trigram[2], trigram[:2], trigram[1:]}:
+            self.short_grams[gram].append(trigram)
+
+    def add(self, name, popularity=0.0, category=None):
+        """Add one name after the index was built (e.g. a newly installed distribution). It ranks last on popularity."""
+        with self._lock:
+            return self._add(name, popularity, category)
+
+    def _add(self, name, popularity, category):
+        entry_id = self._append(name, popularity, category)
+        if entry_id is None:
+            return False
+        key = self.keys[entry_id]
+        position = bisect.bisect_left(self.sorted_keys, key)
+        rank = len(self.by_popularity)
+        self.sorted_keys.insert(position, key)
+        self.sorted_ids.insert(position, entry_id)
+        self.sorted_ranks.insert(position, rank)
+        self.by_popularity.append(entry_id)
+        self.rank.append(rank)
+        self.offsets.append(len(self.text))
+        self.text += key + '\n'
+        for trigram in trigrams(key):
+            if trigram not in self.postings:
+                self.postings[trigram] = array('I')
+                self._add_short_grams(trigram)
+            self.postings[trigram].append(entry_id)
+        if len(key) < 3:
+            self.short_ids.append(entry_id)
+        return True
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return normalize(name) in self._ids
+
+    def _accept(self, category):
+        if category is None:
+            return None
+        category_id = self.category_ids.get(category)
+        categories = self.categories
+        return lambda entry_id: categories[entry_id] == category_id
+
+    def _walk_popular(self, needle, limit, accept):
+        """Ids of the first `limit` keys in popularity order that contain needle ('\\n' + query for a prefix)."""
+        found = []
+        text, offsets, by_popularity = self.text, self.offsets, self.by_popularity
+        position = text.find(needle)
+        while position >= 0:
+            rank = bisect.bisect_right(offsets, position) - 1  # a prefix needle starts on the newline before its key
+            if needle[0] == '\n':
+                rank += 1
+                if rank == len(offsets):
+                    break  # the newline after the last key
+            entry_id = by_popularity[rank]
+            if accept is None or accept(entry_id):
+                found.append(entry_id)
+                if len(found) == limit:
+                    break
+            # Continue after this key, one match per key is enough
+            position = text.find(needle, offsets[rank + 1] - 1 if rank + 1 < len(offsets) else len(text))
+        return found
+
+    def _best(self, ranks, limit, accept):
+        """Ids of the `limit` most popular of the given ranks."""
+        by_popularity = self.by_popularity
+        if accept is not None:
+            ranks = [rank for rank in ranks if accept(by_popularity[rank])]
+        return [by_popularity[rank] for rank in heapq.nsmallest(limit, ranks)]
+
+    def _has_prefix(self, query):
+        position = bisect.bisect_left(self.sorted_keys, query)
+        return position < len(self.sorted_keys) and self.sorted_keys[position].startswith(query)
+
+    def _prefix_matches(self, query, limit, accept):
+        low = bisect.bisect_left(self.sorted_keys, query)
+        high = bisect.bisect_left(self.sorted_keys, query + '\uffff')
+        if high - low <= RANGE_SELECT_LIMIT:
+            return self._best(self.sorted_ranks[low:high], limit, accept)
+        # A big share of all names: the most popular matches turn up early in the popularity order
+        return self._walk_popular('\n' + query, limit, accept)
+
+    def _substring_matches(self, query, limit, accept):
+        keys, rank = self.keys, self.rank
+        if len(query) >= 3:
+            # Every match contains every trigram of the query, so the rarest one bounds the candidates
+            rarest = min((self.postings.get(trigram, ()) for trigram in trigrams(query)), key=len)
+            if len(rarest) <= RANGE_SELECT_LIMIT:
+                return self._best([rank[entry_id] for entry_id in rarest if query in keys[entry_id]], limit, accept)
+        else:
+            # Every key of three letters or more that contains query has a trigram containing it
+            groups = [self.postings[trigram] for trigram in self.short_grams.get(query, ())]
+            if sum(map(len, groups)) <= RANGE_SELECT_LIMIT:
+                matches = set().union(*groups)
+                matches.update(entry_id for entry_id in self.short_ids if query in keys[entry_id])
+                return self._best([rank[entry_id] for entry_id in matches], limit, accept)
+        # Common enough that the most popular matches turn up early in the popularity order
+        return self._walk_popular(query, limit, accept)
+
+    def match_quality(self, entry_id, query):
+        key = self.keys[entry_id]
+        if key == query:
+            return EXACT
+        if key.startswith(query):
+            return PREFIX
+        position = key.find(query)
+        while position > 0:
+            if key[position - 1] in WORD_SEPARATORS:
+                return WORD
+            position = key.find(query, position + 1)
+        return SUBSTRING
+
+    def _fuzzy_matches(self, query, limit, accept, exclude):
+        """Ids of the best `limit` names within a few typos of query, by distance and popularity."""
+        target = compact(query)
+        if len(target) < FUZZY_MIN_LENGTH:
+            return []
+        bound = max_distance(target)
+        # Rare trigrams are counted first; the most common ones narrow little down and take long to count
+        postings = sorted((self.postings.get(gram, ()) for gram in trigrams(target)), key=len)
+        counted = []
+        budget = FUZZY_POSTINGS_BUDGET
+        for ids in postings:
+            if len(ids) > budget:
+                break
+            counted.append(ids)
+            budget -= len(ids)
+        # Each edit changes at most four of the query's trigrams (a swap), a close name shares the rest
+        needed = max(1, len(counted) - 4 * bound)
+        shared = Counter()
+        for ids in counted:
+            shared.update(ids)
+        keys = self.keys
+        first = target[0]
+        # Among names sharing as many trigrams, those starting with the same letter are likelier meant
+        candidates = {entry_id for entry_id, _ in heapq.nlargest(
+            FUZZY_CANDIDATES, (item for item in shared.items() if item[1] >= needed),
+            key=lambda item: 2 * item[1] + (keys[item[0]][0] == first))}
+
+        # The names starting with the longest start of the query that any name has; a typo right
+        # after it, or in the first few letters where no trigram is left intact, is covered this way
+        length = len(query)
+        while length > 1 and not self._has_prefix(query[:length]):
+            length -= 1
+        candidates.update(self._prefix_matches(query[:length], FUZZY_PREFIX_CANDIDATES, accept))
+
+        popularity = self.popularity
+        scale = math.log1p(self.max_popularity) or 1.0
+        scored = []
+        for entry_id in candidates:
+            if entry_id in exclude or (accept is not None and not accept(entry_id)):
+                continue
+            distance, whole = prefix_distance(target, compact(keys[entry_id]), bound)
+            if distance <= bound:
+                score = (distance + (0 if whole else PARTIAL_PENALTY)
+                         - POPULARITY_WEIGHT * math.log1p(popularity[entry_id]) / scale)
+                scored.append((score, self.rank[entry_id], entry_id))
+        return [entry_id for _, _, entry_id in heapq.nsmallest(limit, scored)]
+
+    def search(self, query, limit=DEFAULT_LIMIT, category=None):
+        """The best `limit` names for query, optionally only those in category."""
+        with self._lock:
+            return self._search(normalize(query), limit, category)
+
+    def _search(self, query, limit, category):
+        accept = self._accept(category)
+        if not query:
+            return [self.names[entry_id] for entry_id in self._walk_popular('\n', limit, accept)]
+
+        # Prefix matches outrank everything else, so when there are enough of them nothing else is needed
+        ids = self._prefix_matches(query, limit, accept)
+        exact = self._ids.get(query)
+        if exact is not None and exact not in ids and (accept is None or accept(exact)):
+            ids.insert(0, exact)  # An unpopular exact match is not among the most popular prefixes
+        if len(ids) < limit:
+            seen = set(ids)
+            more = [entry_id for entry_id in self._substring_matches(query, limit + len(ids), accept)
+                    if entry_id not in seen]
+            ids.extend(more)
+        rank = self.rank
+        ids.sort(key=lambda entry_id: (self.match_quality(entry_id, query), rank[entry_id]))
+        ids = ids[:limit]
+        if len(ids) < limit:
+            # Few or no matches as typed, likely a typo
+            ids.extend(self._fuzzy_matches(query, limit - len(ids), accept, set(ids)))
+        return [self.names[entry_id] for entry_id in ids]
+
+
+def build_search_index(catalog, extra_names=()):
+    """Index every catalog name plus extra names (e.g. installed distributions) that the catalog does not have."""
+    entries = list(catalog.iter_columns('popularity', 'category'))
+    entries.extend((name, 0.0, DEFAULT_CATEGORY) for name in extra_names)
+    return SearchIndex(entries)
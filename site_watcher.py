@@ -0,0 +1,61 @@
+"""
+Watches an environment's site-packages directories and keeps its installed
+index current.
+
+QFileSystemWatcher uses inotify on Linux (kqueue / ReadDirectoryChangesW
+elsewhere), so the app hears about every `.dist-info` directory that is
+added or removed, also when a pip run from a terminal makes the change.
+One pip transaction touches the directory many times, so events are
+coalesced for a short moment before the index re-reads only the entries
+that changed. The names whose install state changed are sent to the GUI
+thread through distributions_changed.
+"""
+
+from PySide6.QtCore import QObject, QFileSystemWatcher, QTimer, Signal
+import os
+
+
+SETTLE_MS = 300  # quiet period after the last event before the index is updated
+
+
+class SiteWatcher(QObject):
+    distributions_changed = Signal(list)  # normalized names
+
+    def __init__(self, index, parent=None):
+        super().__init__(parent)
+        self.index = index
+        self.pending = set()
+
+        self.watcher = QFileSystemWatcher(self)
+        existing = [path for path in index.paths if os.path.isdir(path)]
+        if existing:
+            self.watcher.addPaths(existing)
+        self.watcher.directoryChanged.connect(self.on_directory_changed)
+
+        self.settle_timer = QTimer(self)
+        self.settle_timer.setSingleShot(True)
+        self.settle_timer.setInterval(SETTLE_MS)
+        self.settle_timer.timeout.connect(self.apply_changes)
+
+        # The index may also notice changes itself (an mtime check on lookup, possibly
+        # from a worker thread); a signal emitted there is delivered on the GUI thread
+        index.add_listener(self.distributions_changed.emit)
+
+    def close(self):
+        """Stop watching, e.g. when the window switches to another environment."""
+        self.settle_timer.stop()
+        self.index.remove_listener(self.distributions_changed.emit)
+        if self.watcher.directories():
+            self.watcher.removePaths(self.watcher.directories())
+
+    def on_directory_changed(self, path):
+        self.pending.add(path)
+        self.settle_timer.start()
+
+    def apply_changes(self):
+        pending, self.pending = self.pending, set()
+        for path in pending:
+            # A directory that was removed and recreated is dropped from the watch list
+            if os.path.isdir(path) and path not in self.watcher.directories():
+                self.watcher.addPath(path)
+            self.index.update_directory(path)
@@ -11,7 +11,6 @@ from PySide6.QtCore import (QSize, QThread, Signal, QEvent, QTimer,
 from threading import Thread
 from packaging import version
 import importlib.metadata
-from package import MODULE_POPULARITY, MODULE_CATEGORIES, MODULE_DEPENDENCIES, MODULE_DOCS
 
 import subprocess
 import threading
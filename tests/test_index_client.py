@@ -0,0 +1,190 @@
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import threading
+import unittest
+import tempfile
+import shutil
+import json
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from index_client import IndexClient, JSON_CONTENT_TYPE, make_session
+from installed_index import InstalledDistribution
+from outdated import OutdatedChecker
+
+
+LAST_MODIFIED = 'Wed, 01 May 2024 10:00:00 GMT'
+
+# PEP 691 JSON, served under /json/
+JSON_PROJECTS = {
+    'demo-pkg': {
+        'meta': {'api-version': '1.0'},
+        'name': 'demo-pkg',
+        'files': [
+            {'filename': 'demo_pkg-1.0-py3-none-any.whl', 'url': '../../files/demo_pkg-1.0-py3-none-any.whl',
+             'hashes': {'sha256': 'aa' * 32}},
+            {'filename': 'demo_pkg-2.0-py3-none-any.whl', 'url': '../../files/demo_pkg-2.0-py3-none-any.whl',
+             'hashes': {'sha256': 'bb' * 32}, 'requires-python': '>=3.8'},
+            {'filename': 'demo_pkg-3.0-py3-none-any.whl', 'url': '../../files/demo_pkg-3.0-py3-none-any.whl',
+             'hashes': {}, 'yanked': 'broken upload'},
+            {'filename': 'demo_pkg-4.0b1-py3-none-any.whl', 'url': '../../files/demo_pkg-4.0b1-py3-none-any.whl',
+             'hashes': {}},
+        ],
+    },
+    'current-pkg': {
+        'meta': {'api-version': '1.0'},
+        'name': 'current-pkg',
+        'files': [{'filename': 'current_pkg-1.5-py3-none-any.whl', 'url': '/files/current_pkg-1.5-py3-none-any.whl',
+                   'hashes': {}}],
+    },
+}
+
+# PEP 503 HTML, served under /html/
+HTML_PROJECTS = {
+    'old-pkg': """<!DOCTYPE html><html><body>
+<a href="../../files/old_pkg-0.9.tar.gz#sha256={h1}">old_pkg-0.9.tar.gz</a>
+<a href="../../files/old_pkg-1.0-py3-none-any.whl#sha256={h2}" data-requires-python="&gt;=3.6">old_pkg-1.0-py3-none-any.whl</a>
+<a href="../../files/old_pkg-1.1-py3-none-any.whl" data-yanked="">old_pkg-1.1-py3-none-any.whl</a>
+</body></html>""".format(h1='cc' * 32, h2='dd' * 32),
+}
+
+
+class IndexHandler(BaseHTTPRequestHandler):
+    requests = []  # (path, headers) of every request, reset per test
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        IndexHandler.requests.append((self.path, dict(self.headers)))
+        kind, _, rest = self.path.strip('/').partition('/')
+        parts = rest.split('/')
+        name = parts[1] if len(parts) > 1 else ''
+
+        if kind == 'json':
+            if not name:
+                return self.send_body(JSON_CONTENT_TYPE, json.dumps(
+                    {'meta': {'api-version': '1.0'}, 'projects': [{'name': n} for n in JSON_PROJECTS]}))
+            if name not in JSON_PROJECTS:
+                return self.send_error(404)
+            etag = f'"{name}-v1"'
+            if self.headers.get('If-None-Match') == etag:
+                return self.send_not_modified()
+            return self.send_body(JSON_CONTENT_TYPE, json.dumps(JSON_PROJECTS[name]), ETag=etag)
+
+        if kind == 'html':
+            if not name:
+                links = ''.join(f'<a href="{n}/">{n}</a>' for n in HTML_PROJECTS)
+                return self.send_body('text/html', f'<html><body>{links}</body></html>')
+            if name not in HTML_PROJECTS:
+                return self.send_error(404)
+            if self.headers.get('If-Modified-Since') == LAST_MODIFIED:
+                return self.send_not_modified()
+            return self.send_body('text/html', HTML_PROJECTS[name], **{'Last-Modified': LAST_MODIFIED})
+        self.send_error(404)
+
+    def send_body(self, content_type, text, **headers):
+        body = text.encode()
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_not_modified(self):
+        self.send_response(304)
+        self.end_headers()
+
+
+class LocalIndexTestCase(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), IndexHandler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        IndexHandler.requests = []
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+    def client(self, kind):
+        session = make_session()
+        session.trust_env = False  # no proxy between the test and localhost
+        return IndexClient(f"{self.base_url}/{kind}/simple/", session=session, cache_dir=self.cache_dir)
+
+
+class IndexClientTest(LocalIndexTestCase):
+    def test_json_page(self):
+        page = self.client('json').project('Demo_Pkg')
+        self.assertEqual(IndexHandler.requests[0][0], '/json/simple/demo-pkg/')
+        self.assertIn(JSON_CONTENT_TYPE, IndexHandler.requests[0][1]['Accept'])
+        self.assertEqual([str(v) for v in page.versions()], ['1.0', '2.0', '4.0b1'])
+        self.assertEqual(str(page.latest()), '2.0')
+        self.assertEqual(page.files[0]['url'], f"{self.base_url}/json/files/demo_pkg-1.0-py3-none-any.whl")
+
+    def test_html_fallback(self):
+        page = self.client('html').project('old-pkg')
+        self.assertEqual([str(v) for v in page.versions()], ['0.9', '1.0'])
+        self.assertEqual([str(v) for v in page.versions(include_yanked=True)], ['0.9', '1.0', '1.1'])
+        wheel = page.files[1]
+        self.assertEqual(wheel['url'], f"{self.base_url}/html/files/old_pkg-1.0-py3-none-any.whl")
+        self.assertEqual(wheel['hashes'], {'sha256': 'dd' * 32})
+        self.assertEqual(wheel['requires-python'], '>=3.6')
+
+    def test_etag_revalidation(self):
+        client = self.client('json')
+        first = client.project('demo-pkg')
+        second = client.project('demo-pkg')
+        self.assertEqual(IndexHandler.requests[1][1].get('If-None-Match'), '"demo-pkg-v1"')
+        self.assertEqual(client.stats, {'fetched': 1, 'not_modified': 1, 'errors': 0})
+        self.assertEqual(second.files, first.files)
+
+    def test_last_modified_revalidation(self):
+        client = self.client('html')
+        first = client.project('old-pkg')
+        second = self.client('html').project('old-pkg')  # a new client, only the disk cache is shared
+        self.assertEqual(IndexHandler.requests[1][1].get('If-Modified-Since'), LAST_MODIFIED)
+        self.assertEqual(second.files, first.files)
+
+    def test_missing_project(self):
+        self.assertIsNone(self.client('json').project('not-there'))
+
+    def test_project_names(self):
+        self.assertEqual(self.client('json').project_names(), ['demo-pkg', 'current-pkg'])
+        self.assertEqual(self.client('html').project_names(), ['old-pkg'])
+
+
+class OutdatedCheckerTest(LocalIndexTestCase):
+    def test_check(self):
+        distributions = [
+            InstalledDistribution('demo_pkg', '1.0', None),  # 3.0 is yanked, 4.0b1 a pre-release
+            InstalledDistribution('current-pkg', '1.5', None),
+            InstalledDistribution('local-only', '0.1', None),  # not on the index
+        ]
+        client = self.client('json')
+        result = OutdatedChecker(client=client).check(distributions)
+        self.assertEqual(result.outdated, {'demo-pkg': ('1.0', '2.0')})
+        self.assertEqual((result.checked, result.errors), (3, {}))
+
+        # A second check revalidates every page instead of downloading it again
+        OutdatedChecker(client=client).check(distributions)
+        self.assertEqual(client.stats['not_modified'], 2)
+
+    def test_prerelease_offered_to_prerelease_users(self):
+        result = OutdatedChecker(client=self.client('json')).check([InstalledDistribution('demo-pkg', '4.0a1', None)])
+        self.assertEqual(result.latest('demo-pkg'), '4.0b1')
+
+
+if __name__ == '__main__':
+    unittest.main()
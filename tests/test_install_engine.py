@@ -0,0 +1,88 @@
+import unittest
+import tempfile
+import hashlib
+import shutil
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from install_engine import InstallEngine, parse_uninstall_output
+from install_plan import PlanItem, PlanError
+from progress import ProgressTracker
+
+
+class ParseUninstallOutputTest(unittest.TestCase):
+    def test_hyphenated_names(self):
+        lines = [
+            'Found existing installation: python-dateutil 2.9.0.post0\n',
+            'Uninstalling python-dateutil-2.9.0.post0:\n',
+            '  Successfully uninstalled python-dateutil-2.9.0.post0\n',
+            '  Successfully uninstalled scikit-learn-1.5.0\n',
+            '  Successfully uninstalled torch-2.3.0+cpu\n',
+            '  Successfully uninstalled six-1.16.0\n',
+        ]
+        removed, skipped = parse_uninstall_output(lines)
+        self.assertEqual(removed, {'python-dateutil', 'scikit-learn', 'torch', 'six'})
+        self.assertEqual(skipped, set())
+
+    def test_names_are_normalized(self):
+        removed, _ = parse_uninstall_output(['Successfully uninstalled Flask_SQLAlchemy-3.1.1'])
+        self.assertEqual(removed, {'flask-sqlalchemy'})
+
+    def test_skipped(self):
+        lines = ['WARNING: Skipping not-there as it is not installed.\n']
+        removed, skipped = parse_uninstall_output(lines)
+        self.assertEqual(removed, set())
+        self.assertEqual(skipped, {'not-there'})
+
+
+class FailingTransactionEngine(InstallEngine):
+    def _run_with_report(self, command):
+        return 1, ['ERROR: ResolutionImpossible\n'], None
+
+
+class BatchErrorTest(unittest.TestCase):
+    def test_failed_transaction_reports_one_error(self):
+        errors, statuses = [], []
+        engine = FailingTransactionEngine(on_error=errors.append, on_status=statuses.append)
+        modules = [f"module{i}" for i in range(20)]
+        succeeded, failed = engine._install_transaction(['pip', 'install'], modules, 'update')
+        self.assertEqual((succeeded, failed), ([], modules))
+        self.assertEqual(len(errors), 1)
+        self.assertIn('ResolutionImpossible', errors[0])
+        self.assertIn('module19 was not updated.', statuses)
+
+
+class LocalArtifactTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.staging = os.path.join(self.directory, 'staging')
+        os.mkdir(self.staging)
+        self.content = b'wheel bytes' * 1000
+        self.path = os.path.join(self.directory, 'demo-1.0-py3-none-any.whl')
+        with open(self.path, 'wb') as wheel:
+            wheel.write(self.content)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def item(self, sha256):
+        return PlanItem('demo', '1.0', 'file://' + self.path, sha256=sha256)
+
+    def test_file_url_is_hashed_and_reported(self):
+        tracker = ProgressTracker()
+        engine = InstallEngine(progress=tracker)
+        target = engine._fetch_artifact(self.item(hashlib.sha256(self.content).hexdigest()), self.staging)
+        with open(target, 'rb') as wheel:
+            self.assertEqual(wheel.read(), self.content)
+        progress = tracker.files['demo-1.0-py3-none-any.whl']
+        self.assertEqual((progress.done, progress.total), (len(self.content), len(self.content)))
+
+    def test_file_url_hash_mismatch(self):
+        with self.assertRaises(PlanError):
+            InstallEngine()._fetch_artifact(self.item('0' * 64), self.staging)
+
+
+if __name__ == '__main__':
+    unittest.main()
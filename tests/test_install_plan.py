@@ -0,0 +1,46 @@
+import unittest
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from install_plan import plan_from_report, plan_cache_key
+
+
+def report_entry(archive_info):
+    return {
+        'metadata': {'name': 'demo', 'version': '1.0'},
+        'download_info': {'url': 'https://example.invalid/demo-1.0-py3-none-any.whl', 'archive_info': archive_info},
+        'requested': True,
+    }
+
+
+class PlanFromReportTest(unittest.TestCase):
+    def sha256_of(self, archive_info):
+        plan = plan_from_report('python', ['demo'], {'install': [report_entry(archive_info)]})
+        return plan.items[0].sha256
+
+    def test_hashes(self):
+        self.assertEqual(self.sha256_of({'hashes': {'sha256': 'ab' * 32}}), 'ab' * 32)
+
+    def test_legacy_hash(self):
+        self.assertEqual(self.sha256_of({'hash': 'sha256=' + 'cd' * 32}), 'cd' * 32)
+
+    def test_no_sha256(self):
+        self.assertIsNone(self.sha256_of({'hash': 'md5=' + 'ef' * 16}))
+        self.assertIsNone(self.sha256_of({}))
+
+
+class PlanCacheKeyTest(unittest.TestCase):
+    def test_name_is_normalized(self):
+        self.assertEqual(plan_cache_key('python', ['Foo_Bar>=1', 'six']),
+                         plan_cache_key('python', ['six', 'foo-bar>=1']))
+        self.assertEqual(plan_cache_key('python', ['Foo.Bar[B,a]']), plan_cache_key('python', ['foo-bar[a,b]']))
+
+    def test_specifiers_and_extras_are_kept(self):
+        self.assertNotEqual(plan_cache_key('python', ['foo>=1']), plan_cache_key('python', ['foo>=2']))
+        self.assertNotEqual(plan_cache_key('python', ['foo']), plan_cache_key('python', ['foo[extra]']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+import unittest
+import time
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pip_worker import PipWorker, PipWorkerError
+
+
+# Answers a request with output lines and never a result, like a long pip download
+CHATTY_WORKER = """
+import json, sys
+request = json.loads(sys.stdin.readline())
+while True:
+    sys.stdout.write(json.dumps({'id': request['id'], 'output': 'Downloading...\\n'}) + '\\n')
+    sys.stdout.flush()
+"""
+
+
+class ChattyWorker(PipWorker):
+    def command(self):
+        return [self.python, '-c', CHATTY_WORKER]
+
+
+class CancelTest(unittest.TestCase):
+    def test_cancel_during_continuous_output(self):
+        worker = ChattyWorker()
+        lines = []
+        start = time.monotonic()
+        with self.assertRaises(PipWorkerError):
+            worker.install(['anything'], on_output=lines.append,
+                           should_stop=lambda: time.monotonic() - start > 0.5)
+        self.assertLess(time.monotonic() - start, 5)
+        self.assertTrue(lines)
+        self.assertFalse(worker.is_running())
+        worker.close()
+
+
+class IsolationTest(unittest.TestCase):
+    def test_app_directory_not_on_worker_path(self):
+        worker = PipWorker()
+        app_directory = os.path.dirname(os.path.abspath(sys.modules['pip_worker'].__file__))
+        try:
+            path = [os.path.abspath(entry or os.getcwd()) for entry in worker.request('ping')['path']]
+        finally:
+            worker.close()
+        self.assertNotIn(app_directory, path)
+
+
+if __name__ == '__main__':
+    unittest.main()
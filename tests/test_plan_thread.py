@@ -0,0 +1,26 @@
+import unittest
+import tempfile
+import sys
+import os
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from GUI import PlanThread
+
+
+class PlanThreadTest(unittest.TestCase):
+    def test_missing_interpreter_reports_an_error(self):
+        python = os.path.join(tempfile.gettempdir(), 'no-such-dir', 'python')
+        thread = PlanThread(['six'], python=python)
+        errors, plans = [], []
+        thread.error_occurred.connect(errors.append)
+        thread.plan_ready.connect(plans.append)
+        thread.run()  # in this thread, the signals are delivered directly
+        self.assertEqual(plans, [])
+        self.assertEqual(len(errors), 1)
+        self.assertIn('Could not resolve the selection', errors[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
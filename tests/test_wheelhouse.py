@@ -0,0 +1,71 @@
+import unittest
+import tempfile
+import shutil
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from wheelhouse import Wheelhouse
+
+
+class TouchTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.wheelhouse = Wheelhouse(root=os.path.join(self.directory, 'wheelhouse'))
+        path = os.path.join(self.directory, 'torch-2.3.0+cpu-cp312-cp312-linux_x86_64.whl')
+        with open(path, 'wb') as wheel:
+            wheel.write(b'not really a wheel')
+        self.sha256 = self.wheelhouse.add(path)
+        self.wheelhouse.entries[self.sha256]['last_used'] = 0
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_url_encoded_name(self):
+        # pip's report names the file as it appears in the URL
+        self.wheelhouse.touch(['torch-2.3.0%2Bcpu-cp312-cp312-linux_x86_64.whl'])
+        self.assertGreater(self.wheelhouse.entries[self.sha256]['last_used'], 0)
+
+
+class CountingWheelhouse(Wheelhouse):
+    saves = 0
+
+    def _save_index(self):
+        self.saves += 1
+        super()._save_index()
+
+
+class BatchTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.wheels = os.path.join(self.directory, 'wheels')
+        os.mkdir(self.wheels)
+        for i in range(10):
+            with open(os.path.join(self.wheels, f"demo{i}-1.0-py3-none-any.whl"), 'wb') as wheel:
+                wheel.write(b'wheel %d' % i)
+        self.wheelhouse = CountingWheelhouse(root=os.path.join(self.directory, 'wheelhouse'))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def test_add_directory_saves_once(self):
+        self.assertEqual(len(self.wheelhouse.add_directory(self.wheels)), 10)
+        self.assertEqual(self.wheelhouse.saves, 1)
+        self.assertEqual(len(Wheelhouse(root=self.wheelhouse.root).entries), 10)
+
+    def test_evict_and_clear_save_once(self):
+        self.wheelhouse.add_directory(self.wheels)
+        self.assertEqual(len(self.wheelhouse.evict(max_bytes=0)), 10)
+        self.assertEqual(self.wheelhouse.saves, 2)
+        self.assertTrue(Wheelhouse(root=self.wheelhouse.root).is_empty())
+        self.assertEqual(os.listdir(self.wheelhouse.links_dir), [])
+
+        self.wheelhouse.add_directory(self.wheels)
+        self.wheelhouse.clear()
+        self.assertEqual(self.wheelhouse.saves, 4)
+        self.assertTrue(Wheelhouse(root=self.wheelhouse.root).is_empty())
+
+
+if __name__ == '__main__':
+    unittest.main()
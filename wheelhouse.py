@@ -0,0 +1,209 @@
+"""
+Content-addressed local wheelhouse.
+
+Every wheel the app downloads is kept here, keyed by its sha256:
+
+    <root>/objects/ab/abcdef...      the artifact itself
+    <root>/links/numpy-2.1.0-....whl hard link (or copy) named the way pip expects
+    <root>/index.json                hash -> filename, size, added, last_used
+
+`links/` is a flat directory that pip can use with `--no-index --find-links`,
+so installs that the wheelhouse can satisfy never touch the network. The
+store is trimmed to a size limit by evicting the least recently used wheels.
+"""
+
+from urllib.parse import unquote
+import threading
+import hashlib
+import shutil
+import json
+import time
+import os
+
+
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+
+def default_root():
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'PythonModuleInstaller', 'wheelhouse')
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as artifact:
+        for chunk in iter(lambda: artifact.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Wheelhouse:
+    def __init__(self, root=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root or default_root()
+        self.max_bytes = max_bytes
+        self.objects_dir = os.path.join(self.root, 'objects')
+        self.links_dir = os.path.join(self.root, 'links')
+        self.index_path = os.path.join(self.root, 'index.json')
+        self._lock = threading.RLock()
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.links_dir, exist_ok=True)
+        self.entries = self._load_index()
+
+    def _load_index(self):
+        try:
+            with open(self.index_path) as index_file:
+                entries = json.load(index_file)
+        except (OSError, ValueError):
+            return {}
+        # Drop entries whose artifact disappeared behind our back
+        return {sha: entry for sha, entry in entries.items() if os.path.exists(self.object_path(sha))}
+
+    def _save_index(self):
+        temp_path = self.index_path + '.tmp'
+        with open(temp_path, 'w') as index_file:
+            json.dump(self.entries, index_file)
+        os.replace(temp_path, self.index_path)
+
+    def object_path(self, sha256):
+        return os.path.join(self.objects_dir, sha256[:2], sha256)
+
+    def link_path(self, filename):
+        return os.path.join(self.links_dir, filename)
+
+    def has(self, sha256):
+        return sha256 in self.entries
+
+    def is_empty(self):
+        return not self.entries
+
+    def total_bytes(self):
+        return sum(entry['size'] for entry in self.entries.values())
+
+    def add(self, path):
+        """Store the artifact at path (the original is left in place). Returns its sha256."""
+        sha256 = file_sha256(path)
+        with self._lock:
+            self._add(path, sha256)
+            self._save_index()
+        return sha256
+
+    def add_directory(self, directory):
+        """Store every wheel found in directory. Returns the list of hashes."""
+        paths = [os.path.join(directory, filename)
+                 for filename in sorted(os.listdir(directory)) if filename.endswith('.whl')]
+        hashes = [file_sha256(path) for path in paths]
+        if not hashes:
+            return hashes
+        # One index write for the whole batch, not one per wheel
+        with self._lock:
+            for path, sha256 in zip(paths, hashes):
+                self._add(path, sha256)
+            self._save_index()
+        return hashes
+
+    def _add(self, path, sha256):
+        filename = os.path.basename(path)
+        target = self.object_path(sha256)
+        if not os.path.exists(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            temp_path = target + '.tmp'
+            shutil.copyfile(path, temp_path)
+            os.replace(temp_path, target)
+        self._link(target, filename)
+
+        now = time.time()
+        entry = self.entries.setdefault(sha256, {'filename': filename, 'size': os.path.getsize(target),
+                                                 'added': now, 'last_used': now})
+        entry['last_used'] = now
+
+    def _link(self, target, filename):
+        link = self.link_path(filename)
+        if os.path.exists(link):
+            os.remove(link)
+        try:
+            os.link(target, link)
+        except OSError:
+            shutil.copyfile(target, link)
+
+    def touch(self, filenames):
+        """Mark the artifacts with these file names as used now. URL-encoded names (torch-2.3.0%2Bcpu...) match too."""
+        filenames = {unquote(filename) for filename in filenames}
+        if not filenames:
+            return
+        with self._lock:
+            now = time.time()
+            for entry in self.entries.values():
+                if entry['filename'] in filenames:
+                    entry['last_used'] = now
+            self._save_index()
+
+    def remove(self, sha256):
+        with self._lock:
+            if self._remove(sha256):
+                self._save_index()
+
+    def _remove(self, sha256):
+        entry = self.entries.pop(sha256, None)
+        if entry is None:
+            return False
+        # The link may already point at a newer artifact with the same name
+        if not any(other['filename'] == entry['filename'] for other in self.entries.values()):
+            try:
+                os.remove(self.link_path(entry['filename']))
+            except OSError:
+                pass
+        try:
+            os.remove(self.object_path(sha256))
+        except OSError:
+            pass
+        return True
+
+    def evict(self, max_bytes=None):
+        """Remove least recently used artifacts until the store fits in max_bytes. Returns the evicted file names."""
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        evicted = []
+        with self._lock:
+            total = self.total_bytes()
+            for sha256, entry in sorted(self.entries.items(), key=lambda item: item[1]['last_used']):
+                if total <= max_bytes:
+                    break
+                total -= entry['size']
+                evicted.append(entry['filename'])
+                self._remove(sha256)
+            if evicted:
+                self._save_index()
+        return evicted
+
+    def clear(self):
+        with self._lock:
+            if not self.entries:
+                return
+            for sha256 in list(self.entries):
+                self._remove(sha256)
+            self._save_index()
+
+    def status(self):
+        """Summary for the status view: counts, sizes and entries, most recently used first."""
+        with self._lock:
+            entries = sorted(({'sha256': sha256, **entry} for sha256, entry in self.entries.items()),
+                             key=lambda entry: entry['last_used'], reverse=True)
+        return {
+            'root': self.root,
+            'count': len(entries),
+            'total_bytes': sum(entry['size'] for entry in entries),
+            'max_bytes': self.max_bytes,
+            'entries': entries,
+        }
+
+
+_default_wheelhouse = None
+_default_lock = threading.Lock()
+
+
+def get_wheelhouse():
+    """The wheelhouse shared by the whole app."""
+    global _default_wheelhouse
+    with _default_lock:
+        if _default_wheelhouse is None:
+            _default_wheelhouse = Wheelhouse()
+        return _default_wheelhouse